@@ -1,8 +1,20 @@
 import streamlit as st
 import json
+import logging
 import os
 import sys
-from typing import Dict, List, Any
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[logging.StreamHandler(sys.stderr)]
+)
+logger = logging.getLogger("notion-viewer")
 
 # 환경변수 설정
 @st.cache_data
@@ -37,112 +49,453 @@ def setup_notion_env():
 
 # MCP 서버 함수들 import
 sys.path.append('application')
-from mcp_server_notion import get_notion_page, get_notion_blocks, get_notion_images, get_child_pages
+from mcp_server_notion import get_notion_blocks
+import notion_api
+import notion_diff
+import notion_images
+import notion_mirror
+import notion_model
+import notion_render
+import notion_tree
 
-def get_page_content_mcp() -> Dict[str, Any]:
-    """페이지 정보 가져오기"""
+@st.cache_resource
+def start_mirror_sync():
+    """NOTION_MIRROR_INTERVAL 이 설정되어 있으면 로컬 미러 동기화 스레드를 시작합니다."""
+    return notion_mirror.start_background_sync(notion_api.get_client(), os.environ["NOTION_PAGE_ID"])
+
+# 전체 컨텐츠: 한 번에 가져오는 최상위 블록 수, 처음/더 보기 때마다 보여 줄 구역 수
+TOP_PAGE_SIZE = 100
+SECTIONS_PER_VIEW = int(os.getenv("NOTION_VIEWER_SECTIONS", "10"))
+# 이 시간(초) 안에는 같은 페이지를 Notion 에 다시 확인하지 않음 (세션 공유)
+VIEWER_TTL = float(os.getenv("NOTION_VIEWER_TTL", "60"))
+# 제목 + 이미지: 한 화면에 보여 줄 이미지 수와 격자 열 수
+IMAGES_PER_VIEW = int(os.getenv("NOTION_VIEWER_IMAGES", "12"))
+IMAGE_COLUMNS = 3
+# 공유 캐시에 두는 최대 페이지 수 (오래 안 본 페이지부터 버림)
+VIEWER_MAX_PAGES = int(os.getenv("NOTION_VIEWER_MAX_PAGES", "50"))
+# 하위 페이지 미리 가져오기: 목록당 최대 페이지 수(0이면 끔), 동시에 가져올 페이지 수, 페이지당 크롤링 동시 호출 수
+PREFETCH_PAGES = int(os.getenv("NOTION_PREFETCH_PAGES", "20"))
+PREFETCH_WORKERS = int(os.getenv("NOTION_PREFETCH_WORKERS", "2"))
+PREFETCH_CRAWL_WORKERS = 2
+# 화면 쪽 호출이 토큰을 기다리는 동안 미리 가져오기가 쉬는 간격(초)
+PREFETCH_YIELD = 0.2
+
+def image_source(block_id: str, url: str) -> str:
+    """로컬 저장소의 썸네일 경로 (만료된 Notion URL 은 다시 받아 옴). 실패하면 원래 URL"""
+    if not block_id or not url:
+        return url
+    local = notion_images.get_store().get(notion_api.get_client(), block_id, url, notion_images.THUMBNAIL_WIDTH)
+    return local["thumbnail"] or url
+
+class PageEntry:
+    """
+    페이지 하나의 뷰어 데이터. last_edited_time 이 바뀌거나 새로고침하면 통째로 버립니다.
+    tree/images/child_pages 는 처음 필요할 때 채우고, top/subtrees 는 전체 컨텐츠 보기가 조금씩 채웁니다.
+    """
+    def __init__(self, page_id: str):
+        self.page_id = page_id
+        self.lock = threading.RLock()
+        self.page: Dict[str, Any] = {}
+        self.last_edited_time = ""
+        self.checked_at = 0.0
+        self.refresh_tree = False
+        self.clear()
+
+    def clear(self) -> None:
+        self.tree = None
+        self.version = ""
+        self.images = None
+        self.child_pages = None
+        self.top = {"blocks": [], "cursor": "", "done": False}
+        self.subtrees: Dict[str, List[Dict[str, Any]]] = {}
+
+class PageCache:
+    """
+    세션이 함께 쓰는 페이지 데이터 (page_id -> PageEntry).
+    VIEWER_TTL 안에는 Notion 을 부르지 않고, 지나면 페이지의 last_edited_time 만 확인해
+    바뀌었을 때만 트리를 다시 가져옵니다.
+    하위 페이지 목록을 보여 주면 그 페이지들의 트리를 백그라운드 풀에서 미리 채워 둡니다.
+    """
+    def __init__(self):
+        self.entries: "OrderedDict[str, PageEntry]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.prefetching = set()
+        self.pool = ThreadPoolExecutor(max_workers=max(1, PREFETCH_WORKERS), thread_name_prefix="notion-prefetch")
+
+    def entry(self, page_id: str, refresh: bool = False) -> PageEntry:
+        with self.lock:
+            entry = self.entries.get(page_id)
+            if entry is None:
+                entry = self.entries[page_id] = PageEntry(page_id)
+            self.entries.move_to_end(page_id)
+            while len(self.entries) > VIEWER_MAX_PAGES:
+                self.entries.popitem(last=False)
+        with entry.lock:
+            if refresh or not entry.page or time.monotonic() - entry.checked_at >= VIEWER_TTL:
+                page = notion_api.get_client().pages.retrieve(page_id=page_id)
+                changed = page.get("last_edited_time", "") != entry.last_edited_time
+                if refresh or changed:
+                    # 처음 가져오는 페이지는 미러/트리 캐시를 써도 되지만, 바뀐 페이지는 다시 크롤링
+                    entry.refresh_tree = refresh or bool(entry.page)
+                    entry.clear()
+                entry.page = page
+                entry.last_edited_time = page.get("last_edited_time", "")
+                entry.checked_at = time.monotonic()
+        return entry
+
+    def tree(self, entry: PageEntry, max_workers: int = notion_tree.MAX_WORKERS) -> List[Dict[str, Any]]:
+        with entry.lock:
+            if entry.tree is None:
+                entry.tree = notion_tree.get_tree(notion_api.get_client(), entry.page_id,
+                                                  refresh=entry.refresh_tree, max_workers=max_workers)
+                entry.version = notion_diff.tree_version(entry.tree)
+                entry.refresh_tree = False
+            return entry.tree
+
+    def is_ready(self, page_id: str) -> bool:
+        """트리를 이미 가지고 있는 페이지인지 (Notion 을 부르지 않음)"""
+        with self.lock:
+            entry = self.entries.get(page_id)
+        return entry is not None and entry.tree is not None
+
+    def prefetch(self, pages: List[Dict[str, Any]]) -> int:
+        """
+        하위 페이지들의 트리를 백그라운드에서 미리 가져옵니다.
+        최근에 수정한 페이지부터 PREFETCH_PAGES 개까지, 이미 있거나 가져오는 중인 페이지는 건너뜁니다.
+        새로 맡긴 페이지 수를 반환합니다.
+        """
+        ordered = sorted(pages, key=lambda page: page.get("last_edited_time", ""), reverse=True)
+        queued = 0
+        for page in ordered[:PREFETCH_PAGES]:
+            if self.is_ready(page["id"]):
+                continue
+            with self.lock:
+                if page["id"] in self.prefetching:
+                    continue
+                self.prefetching.add(page["id"])
+            self.pool.submit(self._prefetch, page["id"])
+            queued += 1
+        return queued
+
+    def _prefetch(self, page_id: str) -> None:
+        """
+        미리 가져오기 한 페이지. 모든 호출이 공유 클라이언트의 토큰 버킷을 거치며,
+        화면 쪽 호출이 토큰을 기다리는 동안에는 새 페이지를 시작하지 않고,
+        크롤링도 적은 동시 호출로 해 화면 쪽 요청을 밀어내지 않습니다.
+        """
+        try:
+            while notion_api.get_stats()["queue_depth"] > 0:
+                time.sleep(PREFETCH_YIELD)
+            started = time.monotonic()
+            entry = self.entry(page_id)
+            tree = self.tree(entry, max_workers=PREFETCH_CRAWL_WORKERS)
+            logger.info(f"하위 페이지 미리 가져오기: page={page_id}, 최상위 블록 {len(tree)}개, {time.monotonic() - started:.2f}초")
+        except Exception as e:
+            logger.error(f"하위 페이지 미리 가져오기 실패: page={page_id}, {e}")
+        finally:
+            with self.lock:
+                self.prefetching.discard(page_id)
+
+@st.cache_resource
+def get_page_cache() -> PageCache:
+    """모든 세션이 공유하는 페이지 캐시"""
+    return PageCache()
+
+def current_page_id() -> str:
+    """보고 있는 페이지. 하위 페이지로 들어갔으면 그 페이지, 아니면 설정된 페이지"""
+    path = st.session_state.get("page_path")
+    return path[-1]["id"] if path else notion_tree.parse_id(os.environ["NOTION_PAGE_ID"])
+
+def reset_view() -> None:
+    """다른 페이지로 옮길 때 전체 컨텐츠 보기를 처음부터 시작"""
+    st.session_state["mode"] = "full"
+    for key in list(st.session_state):
+        if key.startswith(("expand_", "original_")) or key in ("section_start", "section_limit", "section_jump", "image_page"):
+            del st.session_state[key]
+
+def open_page(page: Dict[str, Any]) -> None:
+    """하위 페이지로 들어가기 (미리 가져온 트리가 있으면 바로 그려짐)"""
+    st.session_state.setdefault("page_path", []).append({"id": page["id"], "title": page.get("title", "")})
+    reset_view()
+
+def close_page() -> None:
+    """상위 페이지로 돌아가기"""
+    path = st.session_state.get("page_path")
+    if path:
+        path.pop()
+    reset_view()
+
+def get_page_entry() -> Optional[PageEntry]:
+    """현재 페이지의 공유 데이터. 새로고침을 누른 뒤 첫 호출이면 Notion 에서 다시 확인합니다."""
     if not setup_notion_env():
-        return {}
+        return None
     try:
-        result = get_notion_page()
-        return json.loads(result) if isinstance(result, str) else result
+        return get_page_cache().entry(current_page_id(), refresh=st.session_state.pop("refresh", False))
     except Exception as e:
         st.error(f"페이지 정보 가져오기 실패: {e}")
-        return {}
+        return None
+
+def get_page_content_mcp() -> Dict[str, Any]:
+    """페이지 정보 가져오기"""
+    entry = get_page_entry()
+    return entry.page if entry else {}
 
 def get_blocks_mcp() -> List[Dict[str, Any]]:
-    """블록 정보 가져오기"""
-    if not setup_notion_env():
+    """블록 정보 가져오기 (전체 트리)"""
+    entry = get_page_entry()
+    if entry is None:
         return []
     try:
-        result = get_notion_blocks()
-        data = json.loads(result) if isinstance(result, str) else result
-        return data.get("blocks", [])
+        return get_page_cache().tree(entry)
     except Exception as e:
         st.error(f"블록 정보 가져오기 실패: {e}")
         return []
 
 def get_images_mcp() -> List[Dict[str, Any]]:
-    """이미지 정보 가져오기"""
-    if not setup_notion_env():
+    """이미지 정보 가져오기 (공유 트리에서 추림)"""
+    entry = get_page_entry()
+    if entry is None:
         return []
     try:
-        result = get_notion_images()
-        data = json.loads(result) if isinstance(result, str) else result
-        return data.get("images", [])
+        tree = get_page_cache().tree(entry)
+        with entry.lock:
+            if entry.images is None:
+                entry.images = notion_tree.project_images(tree)
+            return entry.images
     except Exception as e:
         st.error(f"이미지 정보 가져오기 실패: {e}")
         return []
 
 def get_child_pages_mcp() -> List[Dict[str, Any]]:
-    """하위 페이지 정보 가져오기"""
-    if not setup_notion_env():
+    """하위 페이지 정보 가져오기 (공유 트리에서 추림)"""
+    entry = get_page_entry()
+    if entry is None:
         return []
     try:
-        result = get_child_pages()
-        data = json.loads(result) if isinstance(result, str) else result
-        return data.get("child_pages", [])
+        tree = get_page_cache().tree(entry)
+        with entry.lock:
+            if entry.child_pages is None:
+                entry.child_pages = notion_tree.project_child_pages(notion_api.get_client(), tree)
+            return entry.child_pages
     except Exception as e:
         st.error(f"하위 페이지 정보 가져오기 실패: {e}")
         return []
 
-def render_block(block: Dict[str, Any], level: int = 0) -> None:
-    """블록을 렌더링"""
-    block_type = block.get("type", "")
-    indent = "  " * level
-    
-    if block_type == "paragraph":
-        text = block.get("text", "")
-        if text.strip():
-            st.write(f"{indent}{text}")
-            
-    elif block_type.startswith("heading"):
-        text = block.get("text", "")
-        if block_type == "heading_1":
-            st.header(f"{indent}{text}")
-        elif block_type == "heading_2":
-            st.subheader(f"{indent}{text}")
-        else:
-            st.write(f"{indent}### {text}")
-        
-    elif block_type == "bulleted_list_item":
-        text = block.get("text", "")
-        st.write(f"{indent}• {text}")
-        
-    elif block_type == "numbered_list_item":
-        text = block.get("text", "")
-        st.write(f"{indent}1. {text}")
-        
-    elif block_type == "toggle":
-        text = block.get("text", "")
-        with st.expander(f"{indent}🔽 {text}"):
-            children = block.get("children", [])
-            for child in children:
-                render_block(child, level + 1)
-                    
-    elif block_type == "image":
-        image_url = block.get("url", "")
-        caption = block.get("caption", "")
-        
+def get_top_blocks_mcp(entry: PageEntry) -> None:
+    """
+    최상위 블록 한 페이지를 더 가져와 entry.top 에 붙입니다. (하위 블록은 collapsed 로 표시됨)
+    전체 트리가 이미 있으면 그 트리의 최상위 블록을 씁니다.
+    """
+    with entry.lock:
+        top = entry.top
+        if top["done"]:
+            return
+        if entry.tree is not None:
+            top.update(blocks=notion_tree.limit_depth(entry.tree, 1), cursor="", done=True)
+            return
         try:
-            st.image(image_url, caption=caption, use_container_width=True)
+            result = get_notion_blocks(block_id=entry.page_id, max_depth=1, page_size=TOP_PAGE_SIZE, cursor=top["cursor"])
+            data = json.loads(result) if isinstance(result, str) else result
+            if not isinstance(data, dict):
+                raise ValueError(result)
+        except Exception as e:
+            st.error(f"블록 정보 가져오기 실패: {e}")
+            top["done"] = True
+            return
+        top["blocks"].extend(data["blocks"])
+        top["cursor"] = data.get("next_cursor") or ""
+        top["done"] = not data.get("has_more") or not top["cursor"]
+
+def get_subtree_mcp(entry: PageEntry, block_id: str) -> List[Dict[str, Any]]:
+    """블록 하나의 하위 트리 전체 (펼칠 때 한 번만 가져옴, 전체 트리가 있으면 거기서 찾음)"""
+    with entry.lock:
+        if block_id in entry.subtrees:
+            return entry.subtrees[block_id]
+        if entry.tree is not None:
+            found = next((block for block in entry.tree if block["id"] == block_id), None)
+            if found is not None:
+                return found["children"]
+    try:
+        result = get_notion_blocks(block_id=block_id)
+        data = json.loads(result) if isinstance(result, str) else result
+        children = data.get("blocks", [])
+    except Exception as e:
+        st.error(f"하위 블록 가져오기 실패: {e}")
+        return []
+    with entry.lock:
+        entry.subtrees[block_id] = children
+    return children
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def render_document(version: str, _blocks: List[Dict[str, Any]]) -> List[Any]:
+    """
+    블록 트리를 HTML 문서 조각으로 한 번에 바꿉니다. 트리 버전(내용 해시)이 같으면 다시 만들지 않습니다.
+    (_blocks 는 Streamlit 이 해시하지 않음)
+    """
+    return notion_render.render_html(_blocks)
+
+def render_blocks(blocks: List[Dict[str, Any]], version: str = "") -> None:
+    """
+    문서 조각마다 st.markdown 한 번, 최상위 이미지는 로컬 썸네일로 표시
+    version 을 모르면 트리에서 계산합니다.
+    """
+    for kind, value in render_document(version or notion_diff.tree_version(blocks), blocks):
+        if kind == "html":
+            st.markdown(value, unsafe_allow_html=True)
+            continue
+        try:
+            st.image(image_source(value["id"], value["url"]), caption=value["caption"] or None, use_container_width=True)
         except Exception as e:
             st.error(f"이미지 로드 실패: {e}")
-            
-    elif block_type == "code":
-        code_text = block.get("text", "")
-        language = block.get("language", "")
-        st.code(code_text, language=language)
-        
-    elif block_type == "quote":
-        text = block.get("text", "")
-        st.info(f"{indent}> {text}")
-    
-    # 하위 블록들 렌더링
-    children = block.get("children", [])
-    if children and block_type != "toggle":
-        for child in children:
-            render_block(child, level + 1)
+
+def render_lazy_block(entry: PageEntry, block: Dict[str, Any]) -> None:
+    """하위 블록을 아직 가져오지 않은 블록. 펼칠 때 그 블록의 하위 트리만 가져옵니다."""
+    if block["type"] == "toggle":
+        label = f"🔽 {block.get('text', '')}"
+    else:
+        render_blocks([dict(block, children=[], collapsed=False)])
+        label = "↳ 하위 블록 보기"
+    if st.toggle(label, key=f"expand_{block['id']}"):
+        with st.container(border=True):
+            children = get_subtree_mcp(entry, block["id"])
+            if children:
+                render_blocks(children)
+            else:
+                st.caption("하위 블록이 없습니다.")
+
+def render_section(entry: PageEntry, section: Dict[str, Any]) -> None:
+    """구역 하나. 펼칠 수 있는 블록 사이의 블록들은 문서 하나로 묶어 표시"""
+    run: List[Dict[str, Any]] = []
+    for block in section["blocks"]:
+        if not block.get("collapsed"):
+            run.append(block)
+            continue
+        if run:
+            render_blocks(run)
+            run = []
+        render_lazy_block(entry, block)
+    if run:
+        render_blocks(run)
+
+def show_full_content() -> None:
+    """
+    최상위 블록을 TOP_PAGE_SIZE 개씩 받아 오는 대로 구역 단위로 그립니다.
+    처음에는 SECTIONS_PER_VIEW 개 구역만 보여 주고, 더 보기/구역 이동으로 나머지를 봅니다.
+    """
+    entry = get_page_entry()
+    if entry is None:
+        return
+    state = entry.top
+    start = st.session_state.get("section_start", 0)
+    limit = st.session_state.get("section_limit", SECTIONS_PER_VIEW)
+
+    nav = st.empty()
+    body = st.container()
+    status = st.empty()
+    rendered = 0
+
+    def render_ready() -> None:
+        # 아직 목록을 다 받지 않았으면 마지막 구역은 이어질 수 있으므로 미룸
+        nonlocal rendered
+        sections = notion_render.split_sections(state["blocks"])
+        ready = sections if state["done"] else sections[:-1]
+        for section in ready[start + rendered:start + limit]:
+            with body:
+                render_section(entry, section)
+            rendered += 1
+
+    render_ready()
+    while not state["done"]:
+        status.caption(f"블록 목록을 가져오는 중... ({len(state['blocks'])}개)")
+        get_top_blocks_mcp(entry)
+        render_ready()
+    status.empty()
+
+    sections = notion_render.split_sections(state["blocks"])
+    if not sections:
+        st.info("표시할 컨텐츠가 없습니다.")
+        return
+
+    def jump() -> None:
+        st.session_state["section_start"] = st.session_state["section_jump"]
+        st.session_state["section_limit"] = SECTIONS_PER_VIEW
+
+    def load_more() -> None:
+        st.session_state["section_limit"] = limit + SECTIONS_PER_VIEW
+
+    nav.selectbox(
+        "구역 이동",
+        range(len(sections)),
+        index=min(start, len(sections) - 1),
+        format_func=lambda i: f"{i + 1}. {sections[i]['title'] or '(처음)'}",
+        key="section_jump",
+        on_change=jump,
+    )
+    shown = min(start + limit, len(sections))
+    st.caption(f"구역 {start + 1}-{shown} / {len(sections)}")
+    if shown < len(sections):
+        st.button(f"⬇️ 더 보기 ({len(sections) - shown}개 구역 남음)", on_click=load_more)
+
+def show_images() -> None:
+    """
+    이미지를 IMAGES_PER_VIEW 개씩 나눠 격자로 보여 줍니다.
+    제목/캡션과 자리표시를 먼저 그린 뒤, 지금 화면의 썸네일만 동시에 로컬 저장소로 받아
+    도착하는 대로 채웁니다. 원본은 "🔍 원본" 을 켠 이미지만 그 줄 아래에 크게 보여 줍니다.
+    """
+    with st.spinner("이미지 목록을 가져오는 중..."):
+        images = get_images_mcp()
+    if not images:
+        st.info("이미지가 없습니다.")
+        return
+
+    pages = (len(images) + IMAGES_PER_VIEW - 1) // IMAGES_PER_VIEW
+    page = min(st.session_state.get("image_page", 0), pages - 1)
+    start = page * IMAGES_PER_VIEW
+    shown = images[start:start + IMAGES_PER_VIEW]
+
+    def move(step: int) -> None:
+        st.session_state["image_page"] = page + step
+
+    prev_col, info_col, next_col = st.columns([1, 3, 1])
+    with prev_col:
+        st.button("◀ 이전", on_click=move, args=(-1,), disabled=page == 0, use_container_width=True)
+    with info_col:
+        st.caption(f"이미지 {start + 1}-{start + len(shown)} / {len(images)} (페이지 {page + 1} / {pages})")
+    with next_col:
+        st.button("다음 ▶", on_click=move, args=(1,), disabled=page >= pages - 1, use_container_width=True)
+
+    # 1) 텍스트 뼈대: 같은 제목의 이미지끼리 묶어 IMAGE_COLUMNS 열 격자로, 이미지 자리는 비워 둠
+    slots = []
+    title = None
+    row: List[Any] = []
+    for i, img in enumerate(shown, start + 1):
+        if not row or img.get("title") != title:
+            if img.get("title") != title:
+                title = img.get("title")
+                if title:
+                    st.subheader(f"📝 {title}")
+            row = list(st.columns(IMAGE_COLUMNS))
+            expanded = st.container()
+        with row.pop(0):
+            st.write(f"**이미지 {i}**")
+            slot = st.empty()
+            slot.caption("⏳ 불러오는 중...")
+            if img.get("caption"):
+                st.write(f"*{img['caption']}*")
+            original = st.toggle("🔍 원본", key=f"original_{img['block_id']}")
+        slots.append((img, slot, original, expanded))
+
+    # 2) 썸네일을 동시에 받으며 끝나는 순서대로 채움 (이미 받은 이미지는 로컬 파일)
+    store = notion_images.get_store()
+    for index, local in store.iter_fetch(notion_api.get_client(), shown):
+        img, slot, original, expanded = slots[index]
+        if local["error"]:
+            slot.error(f"이미지 로드 실패: {local['error']}")
+            continue
+        slot.image(local["thumbnail"], use_container_width=True)
+        if original:
+            with expanded:
+                st.image(local["path"], caption=img.get("caption") or None)
 
 def main():
     st.set_page_config(page_title="Notion Page Viewer (MCP Direct)", layout="wide")
@@ -150,60 +503,71 @@ def main():
     st.title("📄 Notion Page Viewer (MCP Direct)")
     st.write("MCP 서버를 직접 import해서 Notion 페이지를 가져옵니다")
     
+    if setup_notion_env():
+        start_mirror_sync()
+    
+    # 공유 캐시를 건너뛰고 Notion 에서 다시 가져오기
+    refresh_col, info_col = st.columns([1, 4])
+    with refresh_col:
+        if st.button("🔄 새로고침", use_container_width=True):
+            st.session_state["refresh"] = True
+            for key in list(st.session_state):
+                if key.startswith("expand_"):
+                    del st.session_state[key]
+    entry = get_page_entry() if st.session_state.get("mode") or st.session_state.get("refresh") else None
+    with info_col:
+        if entry is not None:
+            st.caption(f"수정 시각 {entry.last_edited_time} · {int(time.monotonic() - entry.checked_at)}초 전 확인 "
+                       f"(NOTION_VIEWER_TTL={VIEWER_TTL:g}초)")
+    
+    # 하위 페이지로 들어갔으면 위치와 돌아가기 버튼
+    page_path = st.session_state.get("page_path")
+    if page_path:
+        back_col, path_col = st.columns([1, 4])
+        with back_col:
+            st.button("⬅️ 상위 페이지", on_click=close_page, use_container_width=True)
+        with path_col:
+            st.write(" › ".join(["🏠"] + [f"📄 {page['title'] or '제목 없음'}" for page in page_path]))
+    
     # 버튼들
     col1, col2, col3, col4 = st.columns(4)
     
+    # 보기 모드는 다시 실행(더 보기, 펼치기 등)해도 유지
     with col1:
-        show_full_content = st.button("🔍 전체 컨텐츠", use_container_width=True)
+        if st.button("🔍 전체 컨텐츠", use_container_width=True):
+            st.session_state["mode"] = "full"
+            # 다시 누르면 처음 구역부터
+            for key in ("section_start", "section_limit", "section_jump"):
+                st.session_state.pop(key, None)
     with col2:
-        show_title_images = st.button("🖼️ 제목 + 이미지", use_container_width=True)
+        if st.button("🖼️ 제목 + 이미지", use_container_width=True):
+            st.session_state["mode"] = "images"
+            st.session_state.pop("image_page", None)
     with col3:
-        show_child_pages = st.button("📑 하위 페이지", use_container_width=True)
+        if st.button("📑 하위 페이지", use_container_width=True):
+            st.session_state["mode"] = "child_pages"
     with col4:
-        show_raw_data = st.button("🔧 원본 데이터", use_container_width=True)
+        if st.button("🔧 원본 데이터", use_container_width=True):
+            st.session_state["mode"] = "raw"
+    mode = st.session_state.get("mode")
     
     # 결과 표시 영역
     result_container = st.container()
     
     # 전체 컨텐츠 보기
-    if show_full_content:
+    if mode == "full":
         with result_container:
             st.subheader("🔍 전체 컨텐츠 (MCP Direct)")
-            
-            with st.spinner("컨텐츠를 가져오는 중..."):
-                blocks = get_blocks_mcp()
-                
-                if blocks:
-                    for block in blocks:
-                        render_block(block)
-                else:
-                    st.info("표시할 컨텐츠가 없습니다.")
+            show_full_content()
     
     # 제목 + 이미지만 보기
-    elif show_title_images:
+    elif mode == "images":
         with result_container:
             st.subheader("🖼️ 제목 + 이미지 (MCP Direct)")
-            
-            with st.spinner("이미지를 가져오는 중..."):
-                images = get_images_mcp()
-                
-                if images:
-                    for i, img in enumerate(images):
-                        if img.get("title"):
-                            st.subheader(f"📝 {img['title']}")
-                        st.write(f"**이미지 {i+1}**")
-                        if img.get("caption"):
-                            st.write(f"*{img['caption']}*")
-                        try:
-                            st.image(img["url"], use_container_width=True)
-                        except Exception as e:
-                            st.error(f"이미지 로드 실패: {e}")
-                        st.divider()
-                else:
-                    st.info("이미지가 없습니다.")
+            show_images()
     
     # 하위 페이지 리스트
-    elif show_child_pages:
+    elif mode == "child_pages":
         with result_container:
             st.subheader("📑 하위 페이지 리스트 (MCP Direct)")
             
@@ -212,17 +576,26 @@ def main():
                 
                 if child_pages:
                     st.write(f"**총 {len(child_pages)}개의 하위 페이지가 있습니다:**")
+                    # 들어가 볼 페이지의 트리를 백그라운드에서 미리 채움 (최근 수정한 페이지부터)
+                    page_cache = get_page_cache()
+                    page_cache.prefetch(child_pages)
                     
                     for i, page in enumerate(child_pages, 1):
-                        st.write(f"**{i}.** 📄 {page.get('title', '제목 없음')}")
-                        if page.get('url'):
-                            st.write(f"   🔗 [Notion에서 열기]({page['url']})")
+                        title_col, open_col = st.columns([4, 1])
+                        with title_col:
+                            ready = " ⚡" if page_cache.is_ready(page["id"]) else ""
+                            st.write(f"**{i}.** 📄 {page.get('title', '제목 없음')}{ready}")
+                            if page.get('url'):
+                                st.write(f"   🔗 [Notion에서 열기]({page['url']})")
+                        with open_col:
+                            st.button("열기", key=f"open_{page['id']}", on_click=open_page, args=(page,), use_container_width=True)
                         st.write("")
+                    st.caption("⚡ 표시는 미리 가져와 바로 열리는 페이지입니다.")
                 else:
                     st.info("하위 페이지가 없습니다.")
     
     # 원본 데이터 보기
-    elif show_raw_data:
+    elif mode == "raw":
         with result_container:
             st.subheader("🔧 원본 데이터 (MCP Direct)")
             
@@ -232,7 +605,7 @@ def main():
             
             with st.expander("블록 데이터"):
                 blocks = get_blocks_mcp()
-                st.json(blocks)
+                st.json(json.loads(notion_model.dumps(blocks)))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
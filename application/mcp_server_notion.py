@@ -2,284 +2,337 @@ import json
 import logging
 import sys
 import os
+import time
 from mcp.server.fastmcp import FastMCP
-from notion_client import Client
+import notion_api
+import notion_cache
+import notion_database
+import notion_diff
+import notion_images
+import notion_mirror
+import notion_model
+import notion_queue
+import notion_render
+import notion_report
+import notion_search
+import notion_tree
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 로컬 검색 결과 페이지가 이보다 적으면 Notion 검색도 함께 합니다 (아직 인덱싱되지 않은 페이지)
+SEARCH_REMOTE_BELOW = int(os.getenv("NOTION_SEARCH_REMOTE_BELOW", "5"))
+
 # Notion API 키와 페이지 ID 설정
 def get_notion_credentials():
     return os.getenv("NOTION_API_KEY"), os.getenv("NOTION_PAGE_ID")
 
+def get_notion_target(target: str = ""):
+    """
+    API 키와 대상 ID. target(ID 또는 URL)이 비어 있으면 NOTION_PAGE_ID 를 씁니다.
+    ID 는 어느 쪽이든 notion_tree.parse_id 로 같은 형식(하이픈 있는 소문자 UUID)으로 바꿉니다.
+    """
+    api_key, page_id = get_notion_credentials()
+    return api_key, notion_tree.parse_id(target or page_id or "")
+
 mcp = FastMCP(
     name="mcp-notion",
     instructions="Notion API를 사용하여 페이지를 생성하고 관리합니다."
 )
 
 @mcp.tool()
-def add_to_notion_page(title: str, content: str) -> str:
+def add_to_notion_page(title: str, content: str, skip_blocks: int = 0, page_id: str = "") -> str:
     """
     지정된 Notion 페이지에 내용을 추가합니다.
+    마크다운(제목, 목록, 코드, 인용, 표, <details> 토글)은 같은 구조의 Notion 블록으로 바꾸고,
+    긴 문단은 문장 경계에서 나눠 100개 단위로 순서대로 추가합니다.
+    같은 제목으로 같은 내용을 다시 저장하면 건너뛰고, 내용이 바뀌었으면 달라진 블록만 고칩니다.
+    쓰기 대기열이 켜져 있으면(NOTION_WRITE_BEHIND) 로컬 저널에 기록하고 바로 반환하며,
+    백그라운드에서 Notion 에 씁니다. 진행 상황은 get_notion_write_queue_status 로 확인합니다.
     
     Args:
         title: 제목
-        content: 추가할 내용
+        content: 추가할 내용 (마크다운)
+        skip_blocks: 이전 호출이 중간에 실패했을 때 이미 추가된 블록 수 (실패 메시지에 표시됨)
+        page_id: 내용을 추가할 페이지 ID 또는 URL (비우면 설정된 페이지)
     
     Returns:
         추가 결과
     """
     try:
-        if not NOTION_API_KEY:
+        api_key, page_id = get_notion_target(page_id)
+        if not api_key:
             return "Notion API 키가 설정되지 않았습니다."
             
-        if not NOTION_PAGE_ID:
+        if not page_id:
             return "Notion 페이지 ID가 설정되지 않았습니다."
             
-        notion = Client(auth=NOTION_API_KEY)
-        
-        # 제목 블록 추가
-        title_block = {
-            "object": "block",
-            "type": "heading_2",
-            "heading_2": {
-                "rich_text": [{
-                    "type": "text",
-                    "text": {"content": title}
-                }]
-            }
-        }
-        
-        # 내용을 2000자씩 나누어 블록 생성
-        content_blocks = []
-        max_length = 2000
-        
-        for i in range(0, len(content), max_length):
-            chunk = content[i:i + max_length]
-            content_blocks.append({
-                "object": "block",
-                "type": "paragraph",
-                "paragraph": {
-                    "rich_text": [{
-                        "type": "text",
-                        "text": {"content": chunk}
-                    }]
-                }
-            })
-        
-        # 모든 블록을 페이지에 추가
-        all_blocks = [title_block] + content_blocks
-        
-        response = notion.blocks.children.append(
-            block_id=NOTION_PAGE_ID,
-            children=all_blocks
-        )
+        notion = notion_api.get_client(api_key)
         
-        logger.info(f"블록 추가 성공: {len(all_blocks)}개 블록")
+        if notion_queue.QUEUE_ENABLED:
+            # 아직 Notion 에 쓰지 않았으므로 저장된 내용이 아니라 작업 번호를 돌려줌
+            seq = notion_queue.enqueue(notion, page_id, title, content, skip_blocks=skip_blocks)
+            return (
+                f"📥 쓰기 대기열에 기록됨 (작업 번호 {seq}): {title}\n"
+                f"아직 Notion 에 저장되지 않았습니다. 백그라운드에서 저장하며, "
+                f"get_notion_write_queue_status(seq={seq}) 로 결과를 확인할 수 있습니다."
+            )
         
         # 저장된 전체 내용을 반환
         full_saved_content = f"📋 Notion에 저장된 전체 내용:\n\n# {title}\n\n{content}"
-        return full_saved_content
+        
+        result = notion_report.write_report(notion, page_id, title, content, skip_blocks=skip_blocks)
+        if result["appended"] or result["updated"] or result["deleted"]:
+            notion_tree.mark_page_written(page_id)
+        
+        if result["error"]:
+            return (
+                f"내용 추가 실패: {result['error']}\n"
+                f"블록 {result['appended']}개 추가, {result['updated']}개 수정, {result['deleted']}개 삭제 후 중단되었습니다. "
+                f"같은 내용으로 다시 호출하면 남은 블록만 이어서 씁니다.\n"
+                f"추가된 블록 ID: {', '.join(result['block_ids'])}"
+            )
+        
+        if result["status"] == "skipped":
+            summary = "같은 내용이 이미 저장되어 있어 다시 쓰지 않았습니다."
+        elif result["status"] == "patched":
+            summary = f"바뀐 부분만 반영: 블록 {result['appended']}개 추가, {result['updated']}개 수정, {result['deleted']}개 삭제"
+        elif result["status"] == "rewritten":
+            summary = f"페이지에서 지워진 블록이 있어 새로 씀: 블록 {result['appended']}개 추가, {result['deleted']}개 삭제"
+        else:
+            summary = f"추가된 블록 {result['appended']}개: {', '.join(result['block_ids'])}"
+        
+        return f"{full_saved_content}\n\n({summary})"
         
     except Exception as e:
         logger.error(f"Notion 페이지 내용 추가 실패: {str(e)}")
         return f"내용 추가 실패: {str(e)}"
 
 @mcp.tool()
-def get_notion_page() -> str:
+def get_notion_page(page_id: str = "") -> str:
     """
-    현재 설정된 Notion 페이지 정보를 가져옵니다.
+    Notion 페이지 정보를 가져옵니다.
+    
+    Args:
+        page_id: 페이지 ID 또는 URL (비우면 설정된 페이지)
     
     Returns:
         페이지 정보 JSON
     """
     try:
-        api_key, page_id = get_notion_credentials()
+        api_key, page_id = get_notion_target(page_id)
         if not api_key or not page_id:
             return "Notion API 키 또는 페이지 ID가 설정되지 않았습니다."
         
-        notion = Client(auth=api_key)
+        notion = notion_api.get_client(api_key)
         page = notion.pages.retrieve(page_id=page_id)
-        return json.dumps(page, ensure_ascii=False, indent=2)
+        return notion_model.dumps(page)
     except Exception as e:
         logger.error(f"페이지 정보 가져오기 실패: {str(e)}")
         return f"페이지 정보 가져오기 실패: {str(e)}"
 
 @mcp.tool()
-def get_notion_blocks() -> str:
+def get_notion_blocks(block_id: str = "", max_depth: int = 0, page_size: int = 0, cursor: str = "") -> str:
     """
     현재 설정된 Notion 페이지의 모든 블록을 재귀적으로 가져옵니다.
+    하위 블록 목록은 끝까지 페이지네이션하며, 형제 서브트리는 동시에 가져옵니다.
+    디스크 블록 캐시를 거치므로 last_edited_time 이 바뀐 서브트리만 다시 가져옵니다.
+    
+    큰 페이지는 max_depth/page_size 로 일부만 가져오고, "collapsed": true 인 블록은
+    그 블록 ID 를 block_id 로 다시 호출해 펼칩니다.
+    
+    Args:
+        block_id: 가져올 블록/페이지 ID 또는 URL (비우면 설정된 페이지)
+        max_depth: 가져올 깊이 (0이면 전체, 1이면 바로 아래 블록만)
+        page_size: 한 번에 가져올 최상위 블록 수 (0이면 전체, 최대 100)
+        cursor: 이전 응답의 next_cursor
     
     Returns:
-        블록 정보 JSON
+        블록 정보 JSON (blocks, next_cursor, has_more)
     """
     try:
-        api_key, page_id = get_notion_credentials()
+        api_key, page_id = get_notion_target(block_id)
         if not api_key or not page_id:
-            return json.dumps({"blocks": [], "error": "Notion API 키 또는 페이지 ID가 설정되지 않았습니다."}, ensure_ascii=False)
+            return notion_model.dumps({"blocks": [], "error": "Notion API 키 또는 페이지 ID가 설정되지 않았습니다."})
         
-        notion = Client(auth=api_key)
+        notion = notion_api.get_client(api_key)
         
-        def get_blocks_recursive(block_id):
-            blocks = notion.blocks.children.list(block_id=block_id)
-            result = []
-            
-            for block in blocks["results"]:
-                block_data = {
-                    "id": block["id"],
-                    "type": block["type"],
-                    "text": "",
-                    "url": "",
-                    "caption": "",
-                    "children": []
-                }
-                
-                # 텍스트 추출
-                if block["type"] in ["paragraph", "heading_1", "heading_2", "heading_3", "bulleted_list_item", "numbered_list_item", "toggle", "quote"]:
-                    rich_text = block[block["type"]].get("rich_text", [])
-                    block_data["text"] = "".join([t.get("plain_text", "") for t in rich_text])
-                
-                # 이미지 처리
-                elif block["type"] == "image":
-                    image_data = block["image"]
-                    if image_data["type"] == "file":
-                        block_data["url"] = image_data["file"]["url"]
-                    elif image_data["type"] == "external":
-                        block_data["url"] = image_data["external"]["url"]
-                    
-                    caption = image_data.get("caption", [])
-                    block_data["caption"] = "".join([t.get("plain_text", "") for t in caption])
-                
-                # 코드 처리
-                elif block["type"] == "code":
-                    rich_text = block["code"].get("rich_text", [])
-                    block_data["text"] = "".join([t.get("plain_text", "") for t in rich_text])
-                    block_data["language"] = block["code"].get("language", "")
-                
-                # 하위 블록 처리
-                if block.get("has_children", False):
-                    block_data["children"] = get_blocks_recursive(block["id"])
-                
-                result.append(block_data)
-            
-            return result
-        
-        blocks = get_blocks_recursive(page_id)
-        return json.dumps({"blocks": blocks}, ensure_ascii=False, indent=2)
+        result = notion_tree.get_block_page(notion, page_id, max_depth=max_depth, page_size=page_size, cursor=cursor)
+        return notion_model.dumps(result)
         
     except Exception as e:
         logger.error(f"블록 가져오기 실패: {str(e)}")
         return f"블록 가져오기 실패: {str(e)}"
 
 @mcp.tool()
-def get_notion_images() -> str:
+def get_notion_markdown(page_id: str = "", heading: str = "", max_tokens: int = 0, include_urls: bool = False) -> str:
     """
-    현재 설정된 Notion 페이지의 모든 이미지를 가져옵니다.
+    Notion 페이지를 짧은 마크다운으로 가져옵니다. get_notion_blocks 의 JSON 트리보다 토큰이 훨씬 적습니다.
+    
+    큰 페이지는 max_tokens 로 잘라 읽고, 잘렸을 때 끝에 붙는 남은 제목을 heading 으로 다시 요청해 이어 읽습니다.
+    
+    Args:
+        page_id: 페이지/블록 ID 또는 URL (비우면 설정된 페이지)
+        heading: 이 제목 아래 구역만 가져옴 (같은 제목이 없으면 포함하는 제목)
+        max_tokens: 최대 토큰 수 (0이면 제한 없음, 대략적인 추정값)
+        include_urls: 이미지 URL 포함 여부 (Notion 이미지 URL 은 길고 1시간 뒤 만료됨)
     
     Returns:
-        이미지 정보 JSON
+        마크다운 텍스트
     """
     try:
-        api_key, page_id = get_notion_credentials()
+        api_key, page_id = get_notion_target(page_id)
         if not api_key or not page_id:
-            return json.dumps({"images": [], "error": "Notion API 키 또는 페이지 ID가 설정되지 않았습니다."}, ensure_ascii=False)
+            return "Notion API 키 또는 페이지 ID가 설정되지 않았습니다."
         
-        notion = Client(auth=api_key)
+        notion = notion_api.get_client(api_key)
         
-        def extract_images_recursive(block_id, current_title=""):
-            blocks = notion.blocks.children.list(block_id=block_id)
-            images = []
-            title = current_title
-            
-            for block in blocks["results"]:
-                # 제목 업데이트
-                if block["type"] in ["heading_1", "heading_2", "heading_3"]:
-                    rich_text = block[block["type"]].get("rich_text", [])
-                    title = "".join([t.get("plain_text", "") for t in rich_text])
-                
-                # 이미지 처리
-                elif block["type"] == "image":
-                    image_data = block["image"]
-                    image_url = ""
-                    
-                    if image_data["type"] == "file":
-                        image_url = image_data["file"]["url"]
-                    elif image_data["type"] == "external":
-                        image_url = image_data["external"]["url"]
-                    
-                    if image_url:
-                        caption = image_data.get("caption", [])
-                        caption_text = "".join([t.get("plain_text", "") for t in caption])
-                        
-                        images.append({
-                            "url": image_url,
-                            "caption": caption_text,
-                            "title": title
-                        })
-                
-                # 하위 블록에서도 이미지 찾기
-                if block.get("has_children", False):
-                    child_images = extract_images_recursive(block["id"], title)
-                    images.extend(child_images)
-            
-            return images
+        tree = notion_tree.get_tree(notion, page_id)
+        result = notion_render.render_markdown(tree, heading=heading, max_tokens=max_tokens, include_urls=include_urls)
+        if not result["found"]:
+            headings = [text for _, text in notion_render.outline(tree)]
+            return f"'{heading}' 제목을 찾지 못했습니다. 있는 제목: {' / '.join(headings[:50])}"
+        
+        markdown = result["markdown"]
+        if result["truncated"]:
+            markdown += f"\n\n… (max_tokens={max_tokens} 에서 잘림"
+            if result["remaining_headings"]:
+                markdown += f". 남은 제목: {' / '.join(result['remaining_headings'][:50])}"
+            markdown += ")"
+        return markdown
+        
+    except Exception as e:
+        logger.error(f"마크다운 가져오기 실패: {str(e)}")
+        return f"마크다운 가져오기 실패: {str(e)}"
+
+@mcp.tool()
+def get_notion_changes(page_id: str = "", since: str = "", refresh: bool = False) -> str:
+    """
+    Notion 페이지에서 since 버전 이후 바뀐 블록만 가져옵니다.
+    처음에는 since 없이 호출해 현재 버전(version)을 받아 두고, 다음부터 그 값을 since 로 넘깁니다.
+    
+    Args:
+        page_id: 페이지/블록 ID 또는 URL (비우면 설정된 페이지)
+        since: 이전 호출에서 받은 version
+        refresh: 보관 중인 트리/미러를 건너뛰고 Notion 에서 다시 확인
+    
+    Returns:
+        version, inserted/removed/moved/edited 블록 목록, unchanged 개수, changed_headings(바뀐 구역 제목) JSON
+    """
+    try:
+        api_key, page_id = get_notion_target(page_id)
+        if not api_key or not page_id:
+            return notion_model.dumps({"error": "Notion API 키 또는 페이지 ID가 설정되지 않았습니다."})
+        
+        notion = notion_api.get_client(api_key)
+        
+        tree = notion_tree.get_tree(notion, page_id, refresh=refresh)
+        return notion_model.dumps(notion_diff.changes_since(page_id, tree, since))
+        
+    except Exception as e:
+        logger.error(f"변경 내용 가져오기 실패: {str(e)}")
+        return f"변경 내용 가져오기 실패: {str(e)}"
+
+@mcp.tool()
+def get_notion_trees(page_ids: str, max_depth: int = 0) -> str:
+    """
+    여러 Notion 페이지의 블록 트리를 동시에 가져옵니다.
+    모든 루트가 같은 속도 제한을 나눠 쓰며, 결과는 루트 ID 별로 끝난 순서대로 담깁니다.
+    
+    Args:
+        page_ids: 페이지/블록 ID 또는 URL 목록 (쉼표나 줄바꿈으로 구분)
+        max_depth: 루트마다 가져올 깊이 (0이면 전체)
+    
+    Returns:
+        {"trees": {root_id: {"blocks": [...], "took_ms": ..} 또는 {"error": ..}}, "order": [끝난 순서]} JSON
+    """
+    try:
+        api_key, _ = get_notion_credentials()
+        root_ids = notion_tree.parse_ids(page_ids)
+        if not api_key or not root_ids:
+            return notion_model.dumps({"trees": {}, "error": "Notion API 키 또는 페이지 ID가 설정되지 않았습니다."})
+        
+        notion = notion_api.get_client(api_key)
+        
+        started = time.perf_counter()
+        trees = {}
+        for root_id, tree, error in notion_tree.iter_trees(notion, root_ids):
+            took_ms = round((time.perf_counter() - started) * 1000, 1)
+            if error:
+                trees[root_id] = {"error": error, "took_ms": took_ms}
+            else:
+                trees[root_id] = {"blocks": notion_tree.limit_depth(tree, max_depth), "took_ms": took_ms}
+            logger.info(f"트리 가져옴 ({len(trees)}/{len(root_ids)}): {root_id}, {took_ms}ms")
         
-        images = extract_images_recursive(page_id)
-        return json.dumps({"images": images}, ensure_ascii=False, indent=2)
+        return notion_model.dumps({"trees": trees, "order": list(trees)})
+        
+    except Exception as e:
+        logger.error(f"여러 페이지 트리 가져오기 실패: {str(e)}")
+        return f"여러 페이지 트리 가져오기 실패: {str(e)}"
+
+@mcp.tool()
+def get_notion_images(page_id: str = "", local: bool = False, thumbnail_width: int = 0) -> str:
+    """
+    Notion 페이지의 모든 이미지를 가져옵니다.
+    get_notion_blocks 와 같은 블록 트리를 공유하므로 다시 크롤링하지 않습니다.
+    
+    Notion 에 올린 이미지 URL 은 약 1시간 뒤 만료됩니다. local 이면 이미지를 로컬 저장소에
+    동시에 받아 두고(만료된 URL 은 그 블록만 다시 가져와 새로 받음) 파일 경로를 함께 반환합니다.
+    
+    Args:
+        page_id: 페이지/블록 ID 또는 URL (비우면 설정된 페이지)
+        local: 이미지를 로컬에 받아 path/thumbnail 경로를 붙일지 여부
+        thumbnail_width: 썸네일 너비 (0이면 NOTION_THUMBNAIL_WIDTH, local 일 때만)
+    
+    Returns:
+        이미지 정보 JSON
+    """
+    try:
+        api_key, page_id = get_notion_target(page_id)
+        if not api_key or not page_id:
+            return notion_model.dumps({"images": [], "error": "Notion API 키 또는 페이지 ID가 설정되지 않았습니다."})
+        
+        notion = notion_api.get_client(api_key)
+        
+        images = notion_tree.project_images(notion_tree.get_tree(notion, page_id))
+        if local:
+            stored = notion_images.get_store().fetch_many(notion, images, thumbnail_width or notion_images.THUMBNAIL_WIDTH)
+            for image, local_image in zip(images, stored):
+                image.update(
+                    path=local_image["path"],
+                    thumbnail=local_image["thumbnail"],
+                    content_hash=local_image["content_hash"],
+                )
+                if local_image["error"]:
+                    image["error"] = local_image["error"]
+        return notion_model.dumps({"images": images})
         
     except Exception as e:
         logger.error(f"이미지 가져오기 실패: {str(e)}")
         return f"이미지 가져오기 실패: {str(e)}"
 
 @mcp.tool()
-def get_child_pages() -> str:
+def get_child_pages(page_id: str = "") -> str:
     """
-    현재 설정된 Notion 페이지의 하위 페이지들을 가져옵니다.
+    Notion 페이지의 하위 페이지들을 가져옵니다.
+    get_notion_blocks 와 같은 블록 트리를 공유하므로 다시 크롤링하지 않으며,
+    제목과 URL은 child_page 블록에서 바로 읽습니다.
+    
+    Args:
+        page_id: 페이지/블록 ID 또는 URL (비우면 설정된 페이지)
     
     Returns:
         하위 페이지 정보 JSON
     """
     try:
-        api_key, page_id = get_notion_credentials()
+        api_key, page_id = get_notion_target(page_id)
         if not api_key or not page_id:
-            return json.dumps({"child_pages": [], "error": "Notion API 키 또는 페이지 ID가 설정되지 않았습니다."}, ensure_ascii=False)
-        
-        notion = Client(auth=api_key)
+            return notion_model.dumps({"child_pages": [], "error": "Notion API 키 또는 페이지 ID가 설정되지 않았습니다."})
         
-        def find_child_pages_recursive(block_id):
-            blocks = notion.blocks.children.list(block_id=block_id)
-            child_pages = []
-            
-            for block in blocks["results"]:
-                if block["type"] == "child_page":
-                    try:
-                        page = notion.pages.retrieve(page_id=block["id"])
-                        page_title = "제목 없음"
-                        
-                        if "properties" in page:
-                            for prop_name, prop_data in page["properties"].items():
-                                if prop_data["type"] == "title":
-                                    title_array = prop_data["title"]
-                                    page_title = "".join([t.get("plain_text", "") for t in title_array])
-                                    break
-                        
-                        child_pages.append({
-                            "id": block["id"],
-                            "title": page_title,
-                            "url": page.get("url", "")
-                        })
-                    except Exception as e:
-                        logger.error(f"하위 페이지 정보 가져오기 실패: {e}")
-                
-                # 하위 블록에서도 child_page 찾기
-                if block.get("has_children", False):
-                    nested_pages = find_child_pages_recursive(block["id"])
-                    child_pages.extend(nested_pages)
-            
-            return child_pages
+        notion = notion_api.get_client(api_key)
         
-        child_pages = find_child_pages_recursive(page_id)
-        return json.dumps({"child_pages": child_pages}, ensure_ascii=False, indent=2)
+        child_pages = notion_tree.project_child_pages(notion, notion_tree.get_tree(notion, page_id))
+        return notion_model.dumps({"child_pages": child_pages})
         
     except Exception as e:
         logger.error(f"하위 페이지 가져오기 실패: {str(e)}")
@@ -289,6 +342,8 @@ def get_child_pages() -> str:
 def search_notion_pages(query: str) -> str:
     """
     Notion에서 페이지를 검색합니다.
+    로컬 검색 인덱스에서 먼저 찾고, 찾은 페이지가 NOTION_SEARCH_REMOTE_BELOW 개보다 적으면
+    Notion 검색 결과 중 아직 목록에 없는 페이지를 뒤에 붙입니다.
     
     Args:
         query: 검색할 키워드
@@ -297,7 +352,24 @@ def search_notion_pages(query: str) -> str:
         검색 결과
     """
     try:
-        notion = Client(auth=NOTION_API_KEY)
+        index = notion_search.get_index()
+        pages = []
+        for hit in index.search(query, limit=50):
+            if hit["page_id"] not in [page["id"] for page in pages]:
+                pages.append({
+                    "title": hit["page_title"] or "제목 없음",
+                    "url": notion_tree.page_url(hit["page_id"]),
+                    "id": hit["page_id"],
+                    "source": "local"
+                })
+        if len(pages) >= SEARCH_REMOTE_BELOW:
+            return notion_model.dumps(pages)
+        
+        api_key, _ = get_notion_credentials()
+        if not api_key:
+            return "Notion API 키가 설정되지 않았습니다."
+        
+        notion = notion_api.get_client(api_key)
         
         results = notion.search(
             query=query,
@@ -307,25 +379,151 @@ def search_notion_pages(query: str) -> str:
             }
         )
         
-        pages = []
+        found = {page["id"] for page in pages}
         for page in results["results"]:
-            title = "제목 없음"
-            if "properties" in page and "title" in page["properties"]:
-                title_prop = page["properties"]["title"]
-                if "title" in title_prop and title_prop["title"]:
-                    title = title_prop["title"][0]["text"]["content"]
+            page_id = notion_tree.parse_id(page["id"])
+            if page_id in found:
+                continue
+            found.add(page_id)
             
             pages.append({
-                "title": title,
+                "title": notion_tree.page_title(page) or "제목 없음",
                 "url": page["url"],
-                "id": page["id"]
+                "id": page_id,
+                "source": "remote"
             })
         
-        return json.dumps(pages, ensure_ascii=False, indent=2)
+        return notion_model.dumps(pages)
         
     except Exception as e:
         logger.error(f"Notion 검색 실패: {str(e)}")
         return f"검색 실패: {str(e)}"
 
+@mcp.tool()
+def search_notion_blocks(query: str, limit: int = 10) -> str:
+    """
+    로컬 검색 인덱스에서 블록 단위로 검색합니다. (한글은 2글자 단위로 찾습니다)
+    
+    Args:
+        query: 검색할 키워드
+        limit: 최대 결과 수
+    
+    Returns:
+        점수 순 블록 검색 결과 (페이지, 제목, 스니펫) JSON
+    """
+    try:
+        started = time.perf_counter()
+        hits = notion_search.get_index().search(query, limit=limit)
+        return notion_model.dumps({
+            "hits": hits,
+            "took_ms": round((time.perf_counter() - started) * 1000, 2)
+        })
+    except Exception as e:
+        logger.error(f"블록 검색 실패: {str(e)}")
+        return f"블록 검색 실패: {str(e)}"
+
+@mcp.tool()
+def query_notion_database(database_id: str = "", filter: str = "", sorts: str = "", properties: str = "", limit: int = 100, cursor: str = "") -> str:
+    """
+    Notion 데이터베이스를 조회합니다. 필터와 정렬은 Notion 서버에서 처리하고,
+    요청한 속성 값만 담은 짧은 행으로 반환합니다.
+    
+    Args:
+        database_id: 데이터베이스 ID 또는 URL (비우면 NOTION_DATABASE_ID)
+        filter: 데이터베이스 쿼리(data_sources.query) 필터 JSON (예: {"property": "도시", "select": {"equals": "서울"}})
+        sorts: 정렬 JSON 목록 (예: [{"property": "날짜", "direction": "ascending"}])
+        properties: 가져올 속성 이름, 쉼표로 구분 (비우면 전체)
+        limit: 가져올 최대 행 수 (0이면 끝까지)
+        cursor: 이전 응답의 next_cursor
+    
+    Returns:
+        columns, rows(같은 순서의 값 목록), next_cursor, has_more JSON
+    """
+    try:
+        api_key, _ = get_notion_credentials()
+        database_id = notion_tree.parse_id(database_id or os.getenv("NOTION_DATABASE_ID", ""))
+        if not api_key or not database_id:
+            return notion_model.dumps({"rows": [], "error": "Notion API 키 또는 데이터베이스 ID가 설정되지 않았습니다."})
+        
+        notion = notion_api.get_client(api_key)
+        
+        result = notion_database.query_database(
+            notion,
+            database_id,
+            filter=json.loads(filter) if filter else None,
+            sorts=json.loads(sorts) if sorts else None,
+            properties=[name.strip() for name in properties.split(",") if name.strip()],
+            limit=limit,
+            cursor=cursor,
+        )
+        # 행이 많을 수 있으므로 들여쓰기 없이 반환
+        return notion_model.dumps(result, pretty=False)
+        
+    except Exception as e:
+        logger.error(f"데이터베이스 조회 실패: {str(e)}")
+        return f"데이터베이스 조회 실패: {str(e)}"
+
+@mcp.tool()
+def get_notion_api_stats() -> str:
+    """
+    Notion API 스케줄러 상태를 가져옵니다.
+    
+    Returns:
+        호출 수, 재시도/429 횟수, 대기열 깊이, 동시 읽기 합치기로 아낀 호출 수(inflight_shared) JSON
+    """
+    return notion_model.dumps(notion_api.get_stats())
+
+@mcp.tool()
+def get_notion_cache_stats() -> str:
+    """
+    Notion 블록 캐시와 이미지 저장소 상태를 가져옵니다.
+    
+    Returns:
+        적중/미스 횟수, 항목 수, 크기 JSON (이미지 저장소는 "images")
+    """
+    cache = notion_cache.get_cache()
+    stats = cache.stats() if cache else {"enabled": False}
+    stats["images"] = notion_images.get_store().stats()
+    return notion_model.dumps(stats)
+
+@mcp.tool()
+def get_notion_mirror_status() -> str:
+    """
+    로컬 미러 동기화 상태를 가져옵니다.
+    
+    Returns:
+        루트/페이지별 마지막 동기화 이후 경과 시간 JSON
+    """
+    return notion_model.dumps(notion_mirror.get_status())
+
+@mcp.tool()
+def get_notion_write_queue_status(seq: int = 0) -> str:
+    """
+    쓰기 대기열 상태를 가져옵니다.
+    
+    Args:
+        seq: add_to_notion_page 가 돌려준 작업 번호 (주면 그 작업의 상태와 결과만)
+    
+    Returns:
+        대기 중인 쓰기 수, 가장 오래된 대기 항목의 경과 시간(lag_seconds), 실패 목록 JSON
+    """
+    try:
+        if seq:
+            entry = notion_queue.get_entry(seq)
+            if entry is None:
+                return f"쓰기 대기열에 작업 번호 {seq} 가 없습니다."
+            return notion_model.dumps(entry)
+        return notion_model.dumps(notion_queue.get_status())
+    except Exception as e:
+        logger.error(f"쓰기 대기열 상태 조회 실패: {str(e)}")
+        return f"쓰기 대기열 상태 조회 실패: {str(e)}"
+
 if __name__ == "__main__":
+    api_key, page_id = get_notion_credentials()
+    if api_key and page_id:
+        notion = notion_api.get_client(api_key)
+        notion_mirror.start_background_sync(notion, page_id)
+        if notion_queue.QUEUE_ENABLED:
+            # 이전 실행에서 남은 쓰기부터 이어서 처리
+            notion_queue.start_worker(notion)
     mcp.run(transport="stdio")
\ No newline at end of file
@@ -0,0 +1,328 @@
+"""
+프로세스 전역 Notion 클라이언트와 요청 스케줄러
+
+서버 프로세스 안에서는 keep-alive 연결 풀을 가진 Notion 클라이언트 하나를 공유하고,
+모든 Notion API 호출은 토큰 버킷 스케줄러를 거칩니다.
+429 응답은 Retry-After 만큼 전체 호출을 멈추고, 일시적인 오류는 지터가 섞인
+지수 백오프로 재시도합니다. 쓰기(append, update, delete, create 등)는 타임아웃이나 5xx 뒤에도
+서버에 반영됐을 수 있으므로 429 와 연결 단계 오류(요청이 서버에 닿지 않음)만 재시도합니다.
+
+읽기 호출은 single-flight 로 묶습니다. 같은 인자의 읽기가 진행 중이면 새로 보내지 않고
+그 호출이 끝나기를 기다려 결과를 나눠 받습니다.
+"""
+import copy
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import types
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+from notion_client import Client
+from notion_client.client import ClientOptions
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[logging.StreamHandler(sys.stderr)]
+)
+logger = logging.getLogger("notion-api")
+
+# Notion 공식 제한은 평균 초당 3회
+RATE_LIMIT = float(os.getenv("NOTION_RATE_LIMIT", "3"))
+RATE_BURST = int(os.getenv("NOTION_RATE_BURST", "3"))
+MAX_RETRIES = int(os.getenv("NOTION_MAX_RETRIES", "5"))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+POOL_SIZE = int(os.getenv("NOTION_POOL_SIZE", "10"))
+TIMEOUT = float(os.getenv("NOTION_TIMEOUT", "60"))
+# 로컬 가짜 서버(benchmarks/fake_notion_server.py) 등으로 보낼 때만 바꿈
+BASE_URL = os.getenv("NOTION_BASE_URL", "")
+
+RETRYABLE_STATUS = [409, 429, 500, 502, 503, 504]
+
+# notion-client 3 부터 SDK 자체 재시도(retry 옵션)가 있음. 2.x 의 ClientOptions 에 넘기면 TypeError
+CLIENT_HAS_RETRY = "retry" in {field.name for field in dataclasses.fields(ClientOptions)}
+
+SINGLE_FLIGHT_ENABLED = os.getenv("NOTION_SINGLE_FLIGHT", "true").lower() == "true"
+# 같은 인자로 동시에 호출되면 한 번만 보내는 읽기 메서드
+SINGLE_FLIGHT_METHODS = [
+    "blocks.children.list",
+    "blocks.retrieve",
+    "pages.retrieve",
+    "pages.properties.retrieve",
+    "databases.retrieve",
+    "databases.query",
+    "data_sources.retrieve",
+    "data_sources.query",
+    "search",
+]
+
+class TokenBucket:
+    """
+    초당 rate 개의 토큰을 채우는 토큰 버킷. 토큰이 없으면 호출 스레드가 기다립니다.
+    """
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waiting = 0
+        self.condition = threading.Condition()
+
+    def acquire(self) -> float:
+        """토큰 하나를 가져옵니다. 기다린 시간(초)을 반환합니다."""
+        started = time.monotonic()
+        with self.condition:
+            self.waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+
+                    if now < self.paused_until:
+                        self.condition.wait(self.paused_until - now)
+                    elif self.tokens >= 1:
+                        self.tokens -= 1
+                        return time.monotonic() - started
+                    else:
+                        self.condition.wait((1 - self.tokens) / self.rate)
+            finally:
+                self.waiting -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Retry-After 동안 모든 호출을 멈춥니다."""
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+            self.condition.notify_all()
+
+class NotionScheduler:
+    """
+    모든 Notion API 호출을 토큰 버킷에 통과시키고 재시도와 통계를 관리합니다.
+    """
+    def __init__(self, rate: float = RATE_LIMIT, burst: int = RATE_BURST, max_retries: int = MAX_RETRIES):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.stats_lock = threading.Lock()
+        self.counters = {
+            "calls": 0,
+            "requests": 0,
+            "retries": 0,
+            "throttled": 0,
+            "errors": 0,
+            "wait_seconds": 0.0,
+            "max_queue_depth": 0,
+        }
+
+    def _count(self, name: str, value: float = 1) -> None:
+        with self.stats_lock:
+            self.counters[name] += value
+
+    def stats(self) -> Dict[str, Any]:
+        with self.stats_lock:
+            stats = dict(self.counters)
+        stats["queue_depth"] = self.bucket.waiting
+        stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+        stats["rate_limit"] = self.bucket.rate
+        return stats
+
+    def run(self, name: str, fn: Callable, *args, **kwargs) -> Any:
+        """fn 을 속도 제한 아래에서 호출하고, 일시적인 오류는 재시도합니다."""
+        self._count("calls")
+        attempt = 0
+        while True:
+            with self.stats_lock:
+                self.counters["max_queue_depth"] = max(self.counters["max_queue_depth"], self.bucket.waiting + 1)
+            self._count("wait_seconds", self.bucket.acquire())
+            self._count("requests")
+            try:
+                return fn(*args, **kwargs)
+            except (HTTPResponseError, RequestTimeoutError, httpx.TransportError) as e:
+                status = getattr(e, "status", None)
+                if not is_retryable(name, e) or attempt >= self.max_retries:
+                    self._count("errors")
+                    raise
+
+                delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)) * random.uniform(0.5, 1.0)
+                if status == 429:
+                    self._count("throttled")
+                    retry_after = _retry_after(e)
+                    if retry_after is not None:
+                        delay = retry_after + random.uniform(0, BACKOFF_BASE)
+                    self.bucket.pause(delay)
+
+                attempt += 1
+                self._count("retries")
+                logger.info(f"{name} 재시도 {attempt}/{self.max_retries} ({status or type(e).__name__}), {delay:.2f}초 대기")
+                time.sleep(delay)
+
+def _is_connect_error(error: Exception) -> bool:
+    """요청을 보내기 전(연결 단계)에 실패했는지. notion_client 는 httpx 타임아웃을 RequestTimeoutError 로 바꿔 던짐"""
+    return any(
+        isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+        for e in (error, error.__cause__, error.__context__)
+    )
+
+def is_retryable(name: str, error: Exception) -> bool:
+    """
+    재시도해도 되는 오류인지. 읽기(SINGLE_FLIGHT_METHODS)는 일시적인 오류 전부,
+    나머지(쓰기일 수 있음)는 429 와 연결 단계 오류만 재시도합니다. (같은 블록이 두 번 추가되지 않게)
+    """
+    status = getattr(error, "status", None)
+    if status == 429 or _is_connect_error(error):
+        return True
+    if name in SINGLE_FLIGHT_METHODS:
+        return status is None or status in RETRYABLE_STATUS
+    return False
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(error, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 호출을 하나로 합칩니다.
+    먼저 온 호출(leader)만 fn 을 실행하고, 나머지(follower)는 끝나기를 기다려 같은 결과를 받습니다.
+    호출이 끝나면 키를 지우므로 결과를 캐시하지는 않습니다.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flights: Dict[Any, _Flight] = {}
+        self.counters = {"inflight_leaders": 0, "inflight_shared": 0}
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Any:
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is None:
+                flight = self.flights[key] = _Flight()
+                self.counters["inflight_leaders"] += 1
+                leader = True
+            else:
+                flight.followers += 1
+                self.counters["inflight_shared"] += 1
+                leader = False
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            # 응답을 고쳐 쓰는 호출자가 있어도 서로 영향이 없도록 사본을 줌
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+        # 키를 지운 뒤에는 follower 가 늘지 않으므로 이 값으로 사본이 필요한지 판단
+        return copy.deepcopy(flight.result) if flight.followers else flight.result
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            stats = dict(self.counters)
+            stats["inflight"] = len(self.flights)
+        return stats
+
+class ScheduledClient:
+    """
+    notion_client.Client 와 같은 모양으로 쓰되 모든 API 메서드 호출을
+    스케줄러에 통과시키는 프록시. (예: notion.blocks.children.list(...))
+    SINGLE_FLIGHT_METHODS 는 같은 클라이언트(scope) 안에서 같은 인자의 동시 호출을 하나로 합칩니다.
+    """
+    def __init__(self, target: Any, scheduler: NotionScheduler, path: str = "", scope: str = ""):
+        self._target = target
+        self._scheduler = scheduler
+        self._path = path
+        self._scope = scope
+
+    def _schedule(self, path: str, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        if SINGLE_FLIGHT_ENABLED and path in SINGLE_FLIGHT_METHODS:
+            key = (self._scope, path, json.dumps([args, kwargs], sort_keys=True, default=str))
+            return single_flight.do(key, lambda: self._scheduler.run(path, fn, *args, **kwargs))
+        return self._scheduler.run(path, fn, *args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        path = f"{self._path}.{name}" if self._path else name
+        if isinstance(attr, types.MethodType):
+            def call(*args, **kwargs):
+                return self._schedule(path, attr, args, kwargs)
+            return call
+        if name.startswith("_") or isinstance(attr, (str, int, float, dict, list)):
+            return attr
+        return ScheduledClient(attr, self._scheduler, path, self._scope)
+
+    def __call__(self, *args, **kwargs) -> Any:
+        """호출할 수 있는 엔드포인트 객체 (예: Client.search 의 SearchEndpoint)"""
+        if not callable(self._target):
+            raise TypeError(f"'{self._path or type(self._target).__name__}' 는 호출할 수 없습니다.")
+        return self._schedule(self._path, self._target, args, kwargs)
+
+scheduler = NotionScheduler()
+single_flight = SingleFlight()
+
+_clients: Dict[str, ScheduledClient] = {}
+_clients_lock = threading.Lock()
+
+def get_client(api_key: Optional[str] = None) -> ScheduledClient:
+    """
+    API 키별로 하나씩 만든 공유 클라이언트를 반환합니다.
+    """
+    api_key = api_key or os.getenv("NOTION_API_KEY", "")
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            http_client = httpx.Client(
+                timeout=TIMEOUT,
+                limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+            )
+            options = {"auth": api_key, "client": http_client, "timeout_ms": int(TIMEOUT * 1000)}
+            if CLIENT_HAS_RETRY:
+                # 재시도는 스케줄러가 맡음. SDK 자체 재시도를 켜 두면 429 를 스케줄러 모르게 삼켜
+                # 전체 일시 정지(Retry-After)와 통계가 동작하지 않음
+                options["retry"] = False
+            if BASE_URL:
+                options["base_url"] = BASE_URL.rstrip("/")
+            client = ScheduledClient(
+                Client(**options),
+                scheduler,
+                scope=hashlib.sha1(api_key.encode("utf-8")).hexdigest()[:12],
+            )
+            _clients[api_key] = client
+            logger.info(f"Notion 공유 클라이언트 생성{' (' + BASE_URL + ')' if BASE_URL else ''}")
+        return client
+
+def get_stats() -> Dict[str, Any]:
+    """
+    스케줄러 통계 (호출 수, 대기열 깊이, 429 횟수 등)와 single-flight 통계.
+    inflight_shared 는 진행 중인 같은 읽기에 합쳐져 보내지 않은 호출 수입니다.
+    """
+    stats = scheduler.stats()
+    stats.update(single_flight.stats())
+    return stats
@@ -0,0 +1,221 @@
+"""
+Notion 블록 캐시 (SQLite)
+
+블록 하나당 한 행을 두고, 정규화된 블록 정보와 자식 블록 ID 목록을
+block_id / last_edited_time 과 함께 저장합니다.
+크롤러는 부모의 자식 목록을 새로 받은 뒤, last_edited_time 이 그대로인 자식의
+서브트리는 여기서 꺼내 쓰고 바뀐 서브트리만 다시 가져옵니다.
+
+Notion 은 하위 블록이 바뀌어도 상위 블록의 last_edited_time 을 올리지 않는 경우가 있어,
+CACHE_MAX_AGE 가 지난 서브트리는 시간이 같아도 다시 가져옵니다.
+"""
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import notion_model
+from notion_model import Block
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[logging.StreamHandler(sys.stderr)]
+)
+logger = logging.getLogger("notion-cache")
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.getenv("NOTION_DATA_DIR", os.path.join(script_dir, "data"))
+
+CACHE_ENABLED = os.getenv("NOTION_CACHE_ENABLED", "true").lower() == "true"
+CACHE_MAX_BYTES = int(float(os.getenv("NOTION_CACHE_MAX_MB", "64")) * 1024 * 1024)
+CACHE_MAX_AGE = float(os.getenv("NOTION_CACHE_MAX_AGE", "3600"))
+
+def data_path(name: str) -> str:
+    """DATA_DIR 아래 파일 경로 (디렉토리가 없으면 만듭니다)"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, name)
+
+class BlockCache:
+    """
+    block_id 별 블록 정보와 자식 목록을 저장하는 LRU 캐시
+    """
+    def __init__(self, path: str, max_bytes: int = CACHE_MAX_BYTES, max_age: float = CACHE_MAX_AGE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS blocks (
+                block_id TEXT PRIMARY KEY,
+                last_edited_time TEXT,
+                node TEXT,
+                child_ids TEXT,
+                fetched_at REAL,
+                size INTEGER NOT NULL DEFAULT 0,
+                accessed REAL NOT NULL DEFAULT 0
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS blocks_accessed ON blocks(accessed)")
+        self.conn.commit()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get_children(self, block_id: str, last_edited_time: Optional[str] = None) -> Optional[List[Block]]:
+        """
+        block_id 아래 서브트리(자식 블록 목록)를 반환합니다.
+
+        last_edited_time 이 다르거나, 오래됐거나, 하위 행 중 하나라도 없으면 None 입니다.
+        """
+        with self.lock:
+            touched: List[str] = []
+            children = self._build(block_id, last_edited_time, touched, time.time())
+            if children is None:
+                self.counters["misses"] += 1
+                return None
+
+            now = time.time()
+            self.conn.executemany("UPDATE blocks SET accessed = ? WHERE block_id = ?", [(now, b) for b in touched])
+            self.conn.commit()
+            self.counters["hits"] += 1
+            return children
+
+    def _build(self, block_id: str, last_edited_time: Optional[str], touched: List[str], now: float) -> Optional[List[Block]]:
+        row = self.conn.execute(
+            "SELECT last_edited_time, child_ids, fetched_at FROM blocks WHERE block_id = ?", (block_id,)
+        ).fetchone()
+        if row is None or row[1] is None:
+            return None
+        if last_edited_time is not None and row[0] != last_edited_time:
+            return None
+        if now - (row[2] or 0) > self.max_age:
+            return None
+        touched.append(block_id)
+
+        child_ids = json.loads(row[1])
+        if not child_ids:
+            return []
+
+        placeholders = ",".join("?" * len(child_ids))
+        nodes = {
+            block_id: node for block_id, node in self.conn.execute(
+                f"SELECT block_id, node FROM blocks WHERE block_id IN ({placeholders})", child_ids
+            )
+        }
+
+        children = []
+        for child_id in child_ids:
+            if not nodes.get(child_id):
+                return None
+            node = Block.from_dict(notion_model.loads(nodes[child_id]))
+            touched.append(child_id)
+            if node.has_children:
+                node.children = self._build(child_id, None, touched, now)
+                if node.children is None:
+                    return None
+            children.append(node)
+        return children
+
+    def put_children(self, block_id: str, last_edited_time: Optional[str], children: List[Block]) -> None:
+        """
+        block_id 의 자식 목록을 저장합니다. 자식 블록의 자식 목록은 건드리지 않지만,
+        자식 블록의 last_edited_time 이 바뀌었으면 그 자식 목록은 버립니다.
+        (깊이 제한 조회나 중간 실패로 자식 목록을 새로 저장하지 못해도 옛 서브트리를 새 시간으로 믿지 않게 함)
+        """
+        now = time.time()
+        child_rows = []
+        for child in children:
+            node = notion_model.dumps(child.to_dict(children=False), pretty=False)
+            child_rows.append((child["id"], child.get("last_edited_time"), node, len(node), now))
+
+        child_ids = json.dumps([child["id"] for child in children])
+        with self.lock:
+            self.conn.executemany("""
+                INSERT INTO blocks (block_id, last_edited_time, node, size, accessed) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(block_id) DO UPDATE SET
+                    last_edited_time = excluded.last_edited_time,
+                    node = excluded.node,
+                    child_ids = CASE WHEN blocks.last_edited_time IS excluded.last_edited_time THEN blocks.child_ids END,
+                    size = excluded.size + CASE WHEN blocks.last_edited_time IS excluded.last_edited_time
+                                                THEN length(coalesce(blocks.child_ids, '')) ELSE 0 END,
+                    accessed = excluded.accessed
+            """, child_rows)
+            self.conn.execute("""
+                INSERT INTO blocks (block_id, last_edited_time, child_ids, fetched_at, size, accessed) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(block_id) DO UPDATE SET
+                    last_edited_time = coalesce(excluded.last_edited_time, blocks.last_edited_time),
+                    child_ids = excluded.child_ids,
+                    fetched_at = excluded.fetched_at,
+                    size = length(coalesce(blocks.node, '')) + length(excluded.child_ids),
+                    accessed = excluded.accessed
+            """, (block_id, last_edited_time, child_ids, now, len(child_ids), now))
+            self.conn.commit()
+
+    def evict(self) -> int:
+        """
+        전체 크기가 max_bytes 를 넘으면 가장 오래 쓰지 않은 행부터 지웁니다.
+        """
+        with self.lock:
+            total = self.conn.execute("SELECT coalesce(sum(size), 0) FROM blocks").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+
+            target = total - int(self.max_bytes * 0.9)
+            removed = 0
+            freed = 0
+            for block_id, size in self.conn.execute("SELECT block_id, size FROM blocks ORDER BY accessed").fetchall():
+                if freed >= target:
+                    break
+                self.conn.execute("DELETE FROM blocks WHERE block_id = ?", (block_id,))
+                freed += size
+                removed += 1
+            self.conn.commit()
+            self.counters["evictions"] += removed
+            logger.info(f"블록 캐시 정리: {removed}개 행, {freed} bytes")
+            return removed
+
+    def invalidate(self, block_ids: List[str]) -> None:
+        """
+        블록들의 자식 목록을 버려 다음 크롤링에서 다시 가져오게 합니다.
+        """
+        with self.lock:
+            self.conn.executemany("UPDATE blocks SET child_ids = NULL WHERE block_id = ?", [(b,) for b in block_ids])
+            self.conn.commit()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM blocks")
+            self.conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            entries, size = self.conn.execute("SELECT count(*), coalesce(sum(size), 0) FROM blocks").fetchone()
+            stats = dict(self.counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["entries"] = entries
+        stats["size_bytes"] = size
+        stats["max_bytes"] = self.max_bytes
+        stats["path"] = self.path
+        return stats
+
+_cache: Optional[BlockCache] = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> Optional[BlockCache]:
+    """
+    프로세스 공용 블록 캐시를 반환합니다. NOTION_CACHE_ENABLED=false 이면 None.
+    """
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = BlockCache(data_path("notion_blocks.sqlite"))
+        return _cache
@@ -0,0 +1,183 @@
+"""
+Notion 데이터베이스 조회
+
+필터와 정렬은 데이터베이스의 첫 데이터 소스에 data_sources.query 로 그대로 보내 Notion 서버에서 거르고,
+next_cursor 를 따라 결과를 한 페이지씩 흘려보냅니다(generator).
+데이터 소스가 없는 예전 API 버전이면 POST databases/{id}/query 를 직접 요청합니다.
+(notion-client 3 은 databases.query 메서드가 없음)
+요청한 속성만 filter_properties 로 받아 값만 남긴 짧은 행으로 바꾸므로
+행이 수천 개여도 페이지 객체 전체가 서버나 LLM 컨텍스트에 쌓이지 않습니다.
+"""
+import logging
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from notion_tree import PAGE_SIZE, page_url, plain_text
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[logging.StreamHandler(sys.stderr)]
+)
+logger = logging.getLogger("notion-database")
+
+# 스키마(속성 이름 -> ID) 캐시 유지 시간(초)
+SCHEMA_TTL = 300
+
+_schemas: Dict[str, Any] = {}
+_schema_lock = threading.Lock()
+
+def _describe(notion, database_id: str) -> Tuple[Dict[str, Dict[str, str]], str]:
+    """
+    (속성 이름 -> {id, type}, 데이터 소스 ID). 예전 API 면 데이터 소스 ID 는 빈 문자열입니다.
+    속성 목록은 자주 바뀌지 않으므로 잠시 캐시합니다.
+    """
+    with _schema_lock:
+        cached = _schemas.get(database_id)
+        if cached and time.time() - cached[0] < SCHEMA_TTL:
+            return cached[1], cached[2]
+
+    database = notion.databases.retrieve(database_id=database_id)
+    data_source_id = ""
+    properties = database.get("properties")
+    if properties is None and database.get("data_sources"):
+        # 새 API: 속성은 데이터 소스에 있음
+        data_source_id = database["data_sources"][0]["id"]
+        properties = notion.data_sources.retrieve(data_source_id=data_source_id).get("properties", {})
+    schema = {
+        name: {"id": prop["id"], "type": prop["type"]}
+        for name, prop in (properties or {}).items()
+    }
+    with _schema_lock:
+        _schemas[database_id] = (time.time(), schema, data_source_id)
+    return schema, data_source_id
+
+def get_schema(notion, database_id: str) -> Dict[str, Dict[str, str]]:
+    """
+    데이터베이스 속성 이름 -> {id, type}
+    """
+    return _describe(notion, database_id)[0]
+
+def property_value(prop: Dict[str, Any]) -> Any:
+    """
+    속성 객체에서 값만 꺼냅니다. (텍스트는 문자열, 선택은 이름, 날짜는 시작일 또는 [시작, 끝])
+    """
+    kind = prop.get("type")
+    value = prop.get(kind)
+    if value is None:
+        return None
+
+    if kind in ("title", "rich_text"):
+        return plain_text(value)
+    if kind in ("select", "status"):
+        return value.get("name")
+    if kind == "multi_select":
+        return [option.get("name") for option in value]
+    if kind == "date":
+        return [value["start"], value["end"]] if value.get("end") else value.get("start")
+    if kind == "people":
+        return [person.get("name") or person.get("id") for person in value]
+    if kind == "relation":
+        return [relation["id"] for relation in value]
+    if kind == "files":
+        return [(f.get("file") or f.get("external") or {}).get("url") or f.get("name") for f in value]
+    if kind in ("created_by", "last_edited_by"):
+        return value.get("name") or value.get("id")
+    if kind == "unique_id":
+        return f"{value['prefix']}-{value['number']}" if value.get("prefix") else value.get("number")
+    if kind == "formula":
+        return value.get(value.get("type"))
+    if kind == "rollup":
+        inner = value.get(value.get("type"))
+        if value.get("type") == "array":
+            return [property_value(item) for item in inner]
+        return inner
+    if kind == "verification":
+        return value.get("state")
+    # number, checkbox, url, email, phone_number, created_time, last_edited_time
+    return value
+
+def iter_query(notion, database_id: str, filter: Optional[Dict[str, Any]] = None,
+               sorts: Optional[List[Dict[str, Any]]] = None, filter_properties: Optional[List[str]] = None,
+               cursor: str = "", limit: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    data_sources.query (예전 API 는 POST databases/{id}/query) 응답을 next_cursor 를 따라가며 하나씩 돌려줍니다.
+    마지막 요청의 page_size 를 남은 개수로 줄이므로 응답의 next_cursor 가 곧 이어 읽을 위치입니다.
+
+    Args:
+        limit: 가져올 최대 행 수 (0이면 끝까지)
+    """
+    _, data_source_id = _describe(notion, database_id)
+    returned = 0
+    while True:
+        body: Dict[str, Any] = {}
+        if filter:
+            body["filter"] = filter
+        if sorts:
+            body["sorts"] = sorts
+        if cursor:
+            body["start_cursor"] = cursor
+        body["page_size"] = min(PAGE_SIZE, limit - returned) if limit else PAGE_SIZE
+        # filter_properties 는 쿼리 문자열로 보냄
+        query = {"filter_properties": filter_properties} if filter_properties else None
+
+        if data_source_id:
+            response = notion.data_sources.query(data_source_id=data_source_id, **body, **(query or {}))
+        else:
+            response = notion.request(path=f"databases/{database_id}/query", method="POST", query=query, body=body)
+        returned += len(response.get("results", []))
+        yield response
+
+        cursor = response.get("next_cursor") or ""
+        if not response.get("has_more") or not cursor or (limit and returned >= limit):
+            return
+
+def query_database(notion, database_id: str, filter: Optional[Dict[str, Any]] = None,
+                   sorts: Optional[List[Dict[str, Any]]] = None, properties: Optional[List[str]] = None,
+                   limit: int = 100, cursor: str = "") -> Dict[str, Any]:
+    """
+    데이터베이스를 조회해 짧은 행 목록을 만듭니다.
+
+    속성 이름은 한 번만 columns 에 두고 rows 는 같은 순서의 값 목록으로 돌려줍니다.
+    (첫 두 열은 항상 id, url)
+
+    Args:
+        properties: 가져올 속성 이름 (비우면 전체)
+        limit: 가져올 최대 행 수 (0이면 끝까지)
+        cursor: 이전 응답의 next_cursor
+
+    Returns:
+        columns, rows, next_cursor, has_more
+    """
+    schema = get_schema(notion, database_id)
+    if properties:
+        unknown = [name for name in properties if name not in schema]
+        if unknown:
+            raise ValueError(f"없는 속성: {', '.join(unknown)} (사용 가능: {', '.join(schema)})")
+        names = list(properties)
+        filter_properties = [schema[name]["id"] for name in names]
+    else:
+        names = list(schema)
+        filter_properties = None
+
+    rows: List[List[Any]] = []
+    next_cursor = None
+    has_more = False
+    for response in iter_query(notion, database_id, filter, sorts, filter_properties, cursor, limit):
+        for page in response.get("results", []):
+            values = page.get("properties", {})
+            rows.append([page["id"], page.get("url") or page_url(page["id"])] + [
+                property_value(values[name]) if name in values else None for name in names
+            ])
+        next_cursor = response.get("next_cursor")
+        has_more = bool(response.get("has_more"))
+
+    logger.info(f"데이터베이스 조회: {database_id}, {len(rows)}행, has_more={has_more}")
+    return {
+        "columns": ["id", "url"] + names,
+        "rows": rows,
+        "next_cursor": next_cursor if has_more else None,
+        "has_more": has_more,
+    }
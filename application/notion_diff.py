@@ -0,0 +1,221 @@
+"""
+블록 트리 비교 (diff)
+
+트리를 블록 ID 기준으로 펼쳐(부모, 형제 순서, 내용 해시) 두 시점을 비교하고
+inserted / removed / moved / edited 블록을 알려 줍니다.
+
+- 버전 토큰은 펼친 트리의 해시입니다. 내용이 같으면 언제 가져와도 같은 토큰이 나옵니다.
+- 도구가 돌려준 버전은 로컬 SQLite 에 스냅샷으로 남겨 두었다가(루트마다 최근 NOTION_VERSION_KEEP 개)
+  since 로 받은 버전과 현재 트리를 비교합니다.
+- 같은 부모 아래에서 형제 순서가 바뀐 블록은 ID 목록의 최장 공통 부분열(difflib)에 들지 않는 블록만
+  moved 로 봅니다. (앞에 블록이 하나 끼어들었다고 뒤 블록이 모두 moved 가 되지는 않음)
+"""
+import difflib
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import notion_cache
+import notion_model
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[logging.StreamHandler(sys.stderr)]
+)
+logger = logging.getLogger("notion-diff")
+
+VERSION_KEEP = int(os.getenv("NOTION_VERSION_KEEP", "20"))
+HEADING_TYPES = ["heading_1", "heading_2", "heading_3"]
+# 결과에 싣는 텍스트 길이
+TEXT_PREVIEW = 120
+
+def _signature(block) -> str:
+    """블록 자체 내용(하위 블록 제외)의 해시"""
+    content = [block["type"], block.get("text", ""), block.get("url", ""), block.get("caption", "")]
+    # language, checked, cells 같은 추가 필드 (잘린 표시 collapsed 는 내용이 아님)
+    content.append(sorted((key, block[key]) for key in block.keys() if key not in notion_model.FIELDS and key != "collapsed"))
+    return hashlib.sha1(json.dumps(content, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()[:16]
+
+def flatten(tree: List[Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    block_id -> {parent, index, type, sig, text, heading}
+    heading 은 그 블록이 속한 구역의 제목(가장 가까운 앞선 제목)입니다.
+    """
+    flat: Dict[str, Dict[str, Any]] = {}
+
+    def walk(blocks: List[Any], parent: str, heading: str) -> None:
+        for index, block in enumerate(blocks):
+            if block["type"] in HEADING_TYPES:
+                heading = block.get("text", "")
+            flat[block["id"]] = {
+                "parent": parent,
+                "index": index,
+                "type": block["type"],
+                "sig": _signature(block),
+                "text": block.get("text", "")[:TEXT_PREVIEW],
+                "heading": heading,
+            }
+            if block.get("children"):
+                walk(block["children"], block["id"], heading)
+
+    walk(tree, "", "")
+    return flat
+
+def flat_version(flat: Dict[str, Dict[str, Any]]) -> str:
+    digest = hashlib.sha1()
+    for block_id, entry in flat.items():
+        digest.update(f"{block_id}|{entry['parent']}|{entry['sig']}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def tree_version(tree: List[Any]) -> str:
+    """트리 버전 토큰 (내용이 같으면 같음)"""
+    return flat_version(flatten(tree))
+
+def _entry(block_id: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": block_id, "type": entry["type"], "text": entry["text"], "parent_id": entry["parent"], "heading": entry["heading"]}
+
+def diff_flat(old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    펼친 두 트리를 비교합니다.
+
+    Returns:
+        inserted, removed, moved, edited 목록과 unchanged 개수, changed_headings(바뀐 구역 제목)
+    """
+    inserted = [_entry(block_id, entry) for block_id, entry in new.items() if block_id not in old]
+    removed = [_entry(block_id, entry) for block_id, entry in old.items() if block_id not in new]
+
+    edited = []
+    moved = []
+    moved_ids = set()
+    # 부모가 바뀐 블록
+    for block_id, entry in new.items():
+        before = old.get(block_id)
+        if before is None:
+            continue
+        if before["parent"] != entry["parent"]:
+            moved.append(dict(_entry(block_id, entry), from_parent_id=before["parent"]))
+            moved_ids.add(block_id)
+        if before["sig"] != entry["sig"]:
+            edited.append(dict(_entry(block_id, entry), before=before["text"], before_type=before["type"]))
+
+    # 같은 부모 안에서 순서가 바뀐 블록
+    def siblings(flat: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+        groups: Dict[str, List[str]] = {}
+        for block_id, entry in sorted(flat.items(), key=lambda item: item[1]["index"]):
+            groups.setdefault(entry["parent"], []).append(block_id)
+        return groups
+
+    old_siblings = siblings(old)
+    for parent, new_ids in siblings(new).items():
+        common_new = [block_id for block_id in new_ids if block_id in old and block_id not in moved_ids]
+        common_old = [block_id for block_id in old_siblings.get(parent, []) if block_id in new and block_id not in moved_ids]
+        kept = set()
+        for match in difflib.SequenceMatcher(a=common_old, b=common_new, autojunk=False).get_matching_blocks():
+            kept.update(common_new[match.b:match.b + match.size])
+        for block_id in common_new:
+            if block_id not in kept:
+                moved.append(dict(_entry(block_id, new[block_id]), from_parent_id=parent))
+                moved_ids.add(block_id)
+
+    changed = {"inserted": inserted, "removed": removed, "moved": moved, "edited": edited}
+    touched = {entry["id"] for entries in changed.values() for entry in entries}
+    headings = []
+    for entries in changed.values():
+        for entry in entries:
+            if entry["heading"] not in headings:
+                headings.append(entry["heading"])
+    changed["unchanged"] = len([block_id for block_id in new if block_id not in touched])
+    changed["changed_headings"] = headings
+    return changed
+
+def diff_trees(old_tree: List[Any], new_tree: List[Any]) -> Dict[str, Any]:
+    return diff_flat(flatten(old_tree), flatten(new_tree))
+
+class VersionStore:
+    """
+    루트별 트리 스냅샷(펼친 형태)을 버전 토큰으로 저장합니다.
+    """
+    def __init__(self, path: str, keep: int = VERSION_KEEP):
+        self.path = path
+        self.keep = keep
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                root_id TEXT NOT NULL,
+                version TEXT NOT NULL,
+                flat TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (root_id, version)
+            )
+        """)
+        self.conn.commit()
+
+    def record(self, root_id: str, flat: Dict[str, Dict[str, Any]]) -> str:
+        """스냅샷을 저장하고 버전 토큰을 반환합니다. 오래된 스냅샷은 keep 개만 남깁니다."""
+        version = flat_version(flat)
+        with self.lock:
+            self.conn.execute("""
+                INSERT INTO snapshots (root_id, version, flat, created_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(root_id, version) DO UPDATE SET created_at = excluded.created_at
+            """, (root_id, version, notion_model.dumps(flat, pretty=False), time.time()))
+            self.conn.execute("""
+                DELETE FROM snapshots WHERE root_id = ? AND version NOT IN (
+                    SELECT version FROM snapshots WHERE root_id = ? ORDER BY created_at DESC LIMIT ?
+                )
+            """, (root_id, root_id, self.keep))
+            self.conn.commit()
+        return version
+
+    def load(self, root_id: str, version: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT flat FROM snapshots WHERE root_id = ? AND version = ?", (root_id, version)
+            ).fetchone()
+        return notion_model.loads(row[0]) if row else None
+
+_store: Optional[VersionStore] = None
+_store_lock = threading.Lock()
+
+def get_store() -> VersionStore:
+    """프로세스 공용 스냅샷 저장소"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = VersionStore(notion_cache.data_path("notion_versions.sqlite"))
+        return _store
+
+def changes_since(root_id: str, tree: List[Any], since: str = "") -> Dict[str, Any]:
+    """
+    현재 트리를 스냅샷으로 남기고, since 버전과 비교한 변경 목록을 반환합니다.
+    since 가 비었거나 저장소에 없으면 변경 목록 없이 현재 버전만 돌려줍니다.
+    """
+    store = get_store()
+    flat = flatten(tree)
+    version = store.record(root_id, flat)
+    result: Dict[str, Any] = {"version": version, "since": since}
+    if not since:
+        result["blocks"] = len(flat)
+        return result
+    if since == version:
+        result.update(inserted=[], removed=[], moved=[], edited=[], unchanged=len(flat), changed_headings=[])
+        return result
+
+    old = store.load(root_id, since)
+    if old is None:
+        result["error"] = "알 수 없거나 오래된 버전입니다. since 없이 다시 호출해 새 기준 버전을 받으세요."
+        return result
+    result.update(diff_flat(old, flat))
+    logger.info(
+        f"트리 비교: root={root_id}, {since} -> {version}, "
+        f"추가 {len(result['inserted'])}, 삭제 {len(result['removed'])}, 이동 {len(result['moved'])}, 수정 {len(result['edited'])}"
+    )
+    return result
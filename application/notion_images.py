@@ -0,0 +1,329 @@
+"""
+Notion 이미지 로컬 저장소와 썸네일
+
+Notion 에 올린 이미지의 file.url 은 약 1시간 뒤 만료되는 서명 URL 이라,
+뷰어가 렌더링할 때마다 원본을 다시 받거나 만료된 URL 로 실패합니다.
+
+- 원본은 내용 해시(sha256) 이름으로 한 번만 저장하고, block_id -> 해시 를 기록합니다.
+  서명 쿼리를 뺀 URL 이 같으면 같은 이미지로 보고 다시 받지 않습니다.
+- URL 이 만료됐거나(X-Amz-Date + X-Amz-Expires) 다운로드가 403 이면
+  그 이미지 블록 하나만 blocks.retrieve 로 다시 가져와 새 URL 을 받습니다.
+- Pillow 가 있으면 너비별 WebP(없으면 JPEG) 썸네일을 만들고, 없으면 원본 경로를 그대로 씁니다.
+- 원본과 썸네일의 전체 크기가 NOTION_IMAGE_CACHE_MAX_MB 를 넘으면 오래 안 쓴 파일부터 지웁니다.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+
+import notion_cache
+import notion_tree
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow 가 없으면 썸네일 없이 원본을 씀
+    Image = None
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[logging.StreamHandler(sys.stderr)]
+)
+logger = logging.getLogger("notion-images")
+
+IMAGE_CACHE_MAX_BYTES = int(float(os.getenv("NOTION_IMAGE_CACHE_MAX_MB", "256")) * 1024 * 1024)
+IMAGE_WORKERS = int(os.getenv("NOTION_IMAGE_WORKERS", "6"))
+THUMBNAIL_WIDTH = int(os.getenv("NOTION_THUMBNAIL_WIDTH", "480"))
+DOWNLOAD_TIMEOUT = 30.0
+# 만료 직전 URL 로 받기 시작하지 않도록 두는 여유(초)
+EXPIRY_MARGIN = 60
+
+CONTENT_TYPES = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "image/svg+xml": ".svg",
+}
+
+def url_key(url: str) -> str:
+    """서명 쿼리를 뺀 URL (같은 파일이면 다시 서명해도 같음)"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}" if "X-Amz-Signature" in url else url
+
+def url_expires_at(url: str) -> Optional[float]:
+    """S3 서명 URL 의 만료 시각(epoch 초). 서명 URL 이 아니면 None"""
+    query = parse_qs(urlsplit(url).query)
+    try:
+        signed = datetime.strptime(query["X-Amz-Date"][0], "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+        return signed.timestamp() + int(query["X-Amz-Expires"][0])
+    except (KeyError, ValueError):
+        return None
+
+def is_expired(url: str, margin: float = EXPIRY_MARGIN) -> bool:
+    expires_at = url_expires_at(url)
+    return expires_at is not None and expires_at - margin <= time.time()
+
+def resign_url(notion, block_id: str) -> str:
+    """이미지 블록 하나만 다시 가져와 새 서명 URL 을 받습니다."""
+    return notion_tree.normalize_block(notion.blocks.retrieve(block_id=block_id))["url"]
+
+class ImageStore:
+    """
+    block_id / 내용 해시로 찾는 이미지 파일 저장소 (파일은 디렉토리, 색인은 SQLite)
+    """
+    def __init__(self, directory: str, max_bytes: int = IMAGE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.block_locks: Dict[str, threading.Lock] = {}
+        self.http = httpx.Client(timeout=DOWNLOAD_TIMEOUT, follow_redirects=True)
+        self.conn = sqlite3.connect(os.path.join(directory, "images.sqlite"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                block_id TEXT PRIMARY KEY,
+                url_key TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                mime TEXT,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                name TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                width INTEGER NOT NULL DEFAULT 0,
+                size INTEGER NOT NULL,
+                accessed REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS files_accessed ON files(accessed)")
+        self.conn.commit()
+        self.counters = {"hits": 0, "downloads": 0, "resigned": 0, "thumbnails": 0, "evictions": 0, "errors": 0}
+
+    def _count(self, name: str) -> None:
+        with self.lock:
+            self.counters[name] += 1
+
+    def _file(self, content_hash: str, width: int = 0) -> Optional[str]:
+        """저장된 원본(width=0) 또는 썸네일 경로. 파일이 없으면 None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT name FROM files WHERE content_hash = ? AND width = ?", (content_hash, width)
+            ).fetchone()
+            if row is None:
+                return None
+            path = os.path.join(self.directory, row[0])
+            if not os.path.exists(path):
+                self.conn.execute("DELETE FROM files WHERE name = ?", (row[0],))
+                self.conn.commit()
+                return None
+            self.conn.execute("UPDATE files SET accessed = ? WHERE name = ?", (time.time(), row[0]))
+            self.conn.commit()
+        return path
+
+    def _save(self, name: str, content_hash: str, width: int, data: bytes) -> str:
+        path = os.path.join(self.directory, name)
+        # 다른 스레드가 같은 파일을 읽는 중일 수 있으므로 임시 파일에 쓰고 바꿔 끼움
+        temp = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, path)
+        with self.lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO files (name, content_hash, width, size, accessed)
+                VALUES (?, ?, ?, ?, ?)
+            """, (name, content_hash, width, len(data), time.time()))
+            self.conn.commit()
+        return path
+
+    def _download(self, notion, block_id: str, url: str) -> Dict[str, Any]:
+        """원본을 받습니다. 만료됐거나 403 이면 블록을 다시 가져와 한 번 더 시도합니다."""
+        if notion is not None and is_expired(url):
+            url = resign_url(notion, block_id)
+            self._count("resigned")
+
+        response = self.http.get(url)
+        if response.status_code in (400, 403) and notion is not None and url_expires_at(url) is not None:
+            url = resign_url(notion, block_id)
+            self._count("resigned")
+            response = self.http.get(url)
+        response.raise_for_status()
+        self._count("downloads")
+        mime = response.headers.get("content-type", "").split(";")[0].strip()
+        return {"url": url, "data": response.content, "mime": mime}
+
+    def get(self, notion, block_id: str, url: str, width: int = 0) -> Dict[str, Any]:
+        """
+        이미지를 로컬 파일로 준비합니다.
+
+        Args:
+            notion: 만료된 URL 을 다시 받을 때 쓰는 클라이언트 (None 이면 다시 받지 않음)
+            width: 썸네일 너비 (0이면 썸네일을 만들지 않음)
+
+        Returns:
+            block_id, content_hash, mime, path(원본), thumbnail(썸네일 또는 원본), error
+        """
+        with self.lock:
+            block_lock = self.block_locks.setdefault(block_id, threading.Lock())
+
+        result = {"block_id": block_id, "content_hash": "", "mime": "", "path": "", "thumbnail": "", "error": ""}
+        # 같은 블록을 동시에 요청하면 한 번만 받음
+        with block_lock:
+            try:
+                with self.lock:
+                    row = self.conn.execute(
+                        "SELECT url_key, content_hash, mime FROM images WHERE block_id = ?", (block_id,)
+                    ).fetchone()
+
+                path = None
+                if row and row[0] == url_key(url):
+                    path = self._file(row[1])
+                if path:
+                    content_hash, mime = row[1], row[2]
+                    self._count("hits")
+                else:
+                    downloaded = self._download(notion, block_id, url)
+                    content_hash = hashlib.sha256(downloaded["data"]).hexdigest()
+                    mime = downloaded["mime"]
+                    path = self._file(content_hash) or self._save(
+                        content_hash + CONTENT_TYPES.get(mime, ""), content_hash, 0, downloaded["data"]
+                    )
+                    with self.lock:
+                        self.conn.execute("""
+                            INSERT OR REPLACE INTO images (block_id, url_key, content_hash, mime, fetched_at)
+                            VALUES (?, ?, ?, ?, ?)
+                        """, (block_id, url_key(url), content_hash, mime, time.time()))
+                        self.conn.commit()
+
+                result.update(content_hash=content_hash, mime=mime, path=path, thumbnail=path)
+                if width:
+                    result["thumbnail"] = self.thumbnail(content_hash, path, width)
+            except Exception as e:
+                self._count("errors")
+                result["error"] = str(e)
+                logger.error(f"이미지 가져오기 실패: block={block_id}, {e}")
+
+        self.evict()
+        return result
+
+    def thumbnail(self, content_hash: str, path: str, width: int) -> str:
+        """
+        너비 width 썸네일 경로. Pillow 가 없거나 원본이 이미 작거나 변환할 수 없으면 원본 경로
+        """
+        if Image is None or path.endswith(".svg"):
+            return path
+        # 내용이 같은 이미지 블록이 여럿이면 썸네일은 한 번만 만듦
+        with self.lock:
+            thumbnail_lock = self.block_locks.setdefault(f"{content_hash}_{width}", threading.Lock())
+        with thumbnail_lock:
+            return self._thumbnail(content_hash, path, width)
+
+    def _thumbnail(self, content_hash: str, path: str, width: int) -> str:
+        cached = self._file(content_hash, width)
+        if cached:
+            return cached
+
+        try:
+            with Image.open(path) as image:
+                if image.width <= width:
+                    return path
+                image.thumbnail((width, width * 4))
+                if features.check("webp"):
+                    ext, options = ".webp", {"format": "WEBP", "quality": 80, "method": 4}
+                else:
+                    ext, options = ".jpg", {"format": "JPEG", "quality": 85, "optimize": True}
+                    if image.mode not in ("RGB", "L"):
+                        image = image.convert("RGB")
+                buffer = BytesIO()
+                image.save(buffer, **options)
+        except Exception as e:
+            logger.info(f"썸네일 생성 실패, 원본 사용: {path} ({e})")
+            return path
+
+        self._count("thumbnails")
+        return self._save(f"{content_hash}_{width}{ext}", content_hash, width, buffer.getvalue())
+
+    def fetch_many(self, notion, images: List[Dict[str, Any]], width: int = THUMBNAIL_WIDTH,
+                   max_workers: int = IMAGE_WORKERS) -> List[Dict[str, Any]]:
+        """
+        이미지 목록(block_id, url)을 동시에 준비합니다. 결과는 입력 순서와 같습니다.
+        """
+        results: List[Dict[str, Any]] = [{} for _ in images]
+        for index, result in self.iter_fetch(notion, images, width, max_workers):
+            results[index] = result
+        return results
+
+    def iter_fetch(self, notion, images: List[Dict[str, Any]], width: int = THUMBNAIL_WIDTH,
+                   max_workers: int = IMAGE_WORKERS) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        이미지 목록을 동시에 준비하며 끝나는 순서대로 (입력 순번, 결과) 를 돌려줍니다.
+        중간에 그만 읽으면 아직 시작하지 않은 다운로드는 취소합니다.
+        """
+        if not images:
+            return
+        pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(images))))
+        try:
+            futures = {
+                pool.submit(self.get, notion, image["block_id"], image["url"], width): index
+                for index, image in enumerate(images)
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def evict(self) -> None:
+        """전체 크기가 한도를 넘으면 오래 안 쓴 파일부터 90% 까지 지웁니다."""
+        with self.lock:
+            total = self.conn.execute("SELECT coalesce(sum(size), 0) FROM files").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            target = int(self.max_bytes * 0.9)
+            removed = []
+            for name, size in self.conn.execute("SELECT name, size FROM files ORDER BY accessed"):
+                if total <= target:
+                    break
+                removed.append(name)
+                total -= size
+            for name in removed:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+            self.conn.executemany("DELETE FROM files WHERE name = ?", [(name,) for name in removed])
+            self.conn.commit()
+            self.counters["evictions"] += len(removed)
+        logger.info(f"이미지 캐시 정리: {len(removed)}개 파일 삭제")
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.counters)
+            files, size = self.conn.execute("SELECT count(*), coalesce(sum(size), 0) FROM files").fetchone()
+            stats["images"] = self.conn.execute("SELECT count(*) FROM images").fetchone()[0]
+        stats.update(files=files, bytes=size, max_bytes=self.max_bytes, thumbnails_enabled=Image is not None, path=self.directory)
+        return stats
+
+_store: Optional[ImageStore] = None
+_store_lock = threading.Lock()
+
+def get_store() -> ImageStore:
+    """프로세스 공용 이미지 저장소"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ImageStore(notion_cache.data_path("images"))
+        return _store
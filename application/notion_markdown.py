@@ -0,0 +1,381 @@
+"""
+마크다운 -> Notion 블록 변환
+
+에이전트가 만드는 리포트(마크다운)를 한 줄씩 한 번만 읽으면서 Notion 블록으로 바꿉니다.
+제목, 글머리/번호 목록(들여쓰기 중첩), 코드, 인용, 표, 토글(<details>), 구분선을 지원하고
+이어지는 문단/인용 줄은 블록 하나로 합쳐 블록 수를 줄입니다.
+완성된 최상위 블록은 바로 내보내므로(generator) 큰 문서도 notion_writer 의 묶음 추가로 흘려보낼 수 있습니다.
+"""
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import notion_writer
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)(?:\s+#+)?\s*$")
+BULLET = re.compile(r"^(\s*)[-*+]\s+(.*)$")
+NUMBERED = re.compile(r"^(\s*)\d+[.)]\s+(.*)$")
+TODO = re.compile(r"^\[( |x|X)\]\s+(.*)$")
+FENCE = re.compile(r"^\s*(```|~~~)\s*([\w+#.-]*)\s*$")
+QUOTE = re.compile(r"^\s*>\s?(.*)$")
+DIVIDER = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+TABLE_ROW = re.compile(r"^\s*\|.*\|\s*$")
+TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+DETAILS_OPEN = re.compile(r"^\s*<details>\s*(?:<summary>(.*?)</summary>)?\s*$", re.IGNORECASE)
+SUMMARY = re.compile(r"^\s*<summary>(.*?)</summary>\s*$", re.IGNORECASE)
+DETAILS_CLOSE = re.compile(r"^\s*</details>\s*$", re.IGNORECASE)
+
+INLINE = re.compile(
+    r"\*\*(?P<bold>.+?)\*\*"
+    r"|__(?P<bold2>.+?)__"
+    r"|~~(?P<strike>.+?)~~"
+    r"|`(?P<code>[^`]+)`"
+    r"|\[(?P<link_text>[^\]]+)\]\((?P<link_url>[^)\s]+)\)"
+    r"|(?<![\w*])\*(?P<italic>[^*\s](?:[^*]*[^*\s])?)\*(?!\*)"
+    r"|(?<!\w)_(?P<italic2>[^_\s](?:[^_]*[^_\s])?)_(?!\w)"
+)
+
+# Notion 이 받는 code.language 값 (자주 쓰는 것만) 과 흔한 별칭
+CODE_LANGUAGES = {
+    "bash", "c", "c#", "c++", "css", "diff", "docker", "go", "graphql", "html", "java", "javascript",
+    "json", "kotlin", "makefile", "markdown", "php", "plain text", "powershell", "python", "r", "ruby",
+    "rust", "scala", "shell", "sql", "swift", "typescript", "xml", "yaml",
+}
+CODE_ALIASES = {
+    "py": "python", "js": "javascript", "ts": "typescript", "sh": "shell", "zsh": "shell",
+    "yml": "yaml", "md": "markdown", "cpp": "c++", "cs": "c#", "csharp": "c#", "dockerfile": "docker",
+    "text": "plain text", "txt": "plain text", "": "plain text",
+}
+
+# append 한 번에 허용되는 중첩 깊이 (최상위 블록의 자식, 손자까지)
+MAX_NESTING = 2
+
+def inline_rich_text(text: str) -> List[Dict[str, Any]]:
+    """
+    굵게/기울임/취소선/코드/링크 인라인 문법을 rich_text 항목으로 바꿉니다.
+    """
+    items: List[Dict[str, Any]] = []
+    position = 0
+    for match in INLINE.finditer(text):
+        if match.start() > position:
+            items.extend(_text_items(text[position:match.start()]))
+
+        annotations: Dict[str, bool] = {}
+        link = None
+        if match.group("bold") is not None or match.group("bold2") is not None:
+            content = match.group("bold") or match.group("bold2")
+            annotations["bold"] = True
+        elif match.group("strike") is not None:
+            content = match.group("strike")
+            annotations["strikethrough"] = True
+        elif match.group("code") is not None:
+            content = match.group("code")
+            annotations["code"] = True
+        elif match.group("link_text") is not None:
+            content = match.group("link_text")
+            url = match.group("link_url")
+            if url.startswith(("http://", "https://")):
+                link = url
+        else:
+            content = match.group("italic") or match.group("italic2")
+            annotations["italic"] = True
+
+        items.extend(_text_items(content, annotations, link))
+        position = match.end()
+
+    if position < len(text):
+        items.extend(_text_items(text[position:]))
+    return items
+
+def _text_items(text: str, annotations: Optional[Dict[str, bool]] = None, link: Optional[str] = None) -> List[Dict[str, Any]]:
+    items = []
+    for chunk in notion_writer.split_text(text):
+        item: Dict[str, Any] = {"type": "text", "text": {"content": chunk}}
+        if link:
+            item["text"]["link"] = {"url": link}
+        if annotations:
+            item["annotations"] = annotations
+        items.append(item)
+    return items
+
+def _block(block_type: str, text: str = "", **fields) -> Dict[str, Any]:
+    """블록 하나. rich_text 가 100개를 넘을 수 있으므로 내보내기 전에 split_long 을 거쳐야 합니다."""
+    body: Dict[str, Any] = {"rich_text": inline_rich_text(text)}
+    body.update(fields)
+    return {"object": "block", "type": block_type, block_type: body}
+
+def _text_blocks(block_type: str, text: str) -> List[Dict[str, Any]]:
+    """rich_text 항목이 100개를 넘는 긴 문단은 같은 종류의 블록 여러 개로 나눕니다."""
+    items = inline_rich_text(text)
+    limit = notion_writer.MAX_RICH_TEXT_ITEMS
+    return [
+        {"object": "block", "type": block_type, block_type: {"rich_text": items[i:i + limit]}}
+        for i in range(0, max(len(items), 1), limit)
+    ]
+
+def _children(block: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return block[block["type"]].setdefault("children", [])
+
+def _code_language(language: str) -> str:
+    language = language.lower()
+    language = CODE_ALIASES.get(language, language)
+    return language if language in CODE_LANGUAGES else "plain text"
+
+def _split_row(line: str) -> List[str]:
+    cells = line.strip()
+    if cells.startswith("|"):
+        cells = cells[1:]
+    if cells.endswith("|"):
+        cells = cells[:-1]
+    return [cell.strip() for cell in re.split(r"(?<!\\)\|", cells)]
+
+def _table(rows: List[List[str]], has_header: bool) -> Dict[str, Any]:
+    width = max(len(row) for row in rows)
+    return {
+        "object": "block",
+        "type": "table",
+        "table": {
+            "table_width": width,
+            "has_column_header": has_header,
+            "has_row_header": False,
+            "children": [
+                {
+                    "object": "block",
+                    "type": "table_row",
+                    "table_row": {"cells": [inline_rich_text(cell) for cell in row + [""] * (width - len(row))]}
+                }
+                for row in rows
+            ],
+        },
+    }
+
+def split_long(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    rich_text 항목이 100개를 넘는 블록(목록 항목에 이어 붙인 줄 포함)은 같은 종류의 블록 여러 개로 나눕니다.
+    checked 같은 필드는 조각마다 복사하고, 하위 블록은 마지막 조각 아래에 둡니다.
+    """
+    limit = notion_writer.MAX_RICH_TEXT_ITEMS
+    result = []
+    for block in blocks:
+        body = block[block["type"]]
+        if body.get("children"):
+            body["children"] = split_long(body["children"])
+        items = body.get("rich_text")
+        if items is None or len(items) <= limit:
+            result.append(block)
+            continue
+        fields = {key: value for key, value in body.items() if key not in ("rich_text", "children")}
+        for i in range(0, len(items), limit):
+            result.append({"object": "block", "type": block["type"], block["type"]: dict(fields, rich_text=items[i:i + limit])})
+        if body.get("children"):
+            result[-1][block["type"]]["children"] = body["children"]
+    return result
+
+def limit_nesting(blocks: List[Dict[str, Any]], depth: int = 0) -> List[Dict[str, Any]]:
+    """
+    append 한 번의 중첩 한도(MAX_NESTING)를 넘는 하위 블록은 한도 깊이의 형제로 끌어올립니다.
+    표는 행(table_row)을 떼어 낼 수 없으므로, 행이 한도보다 깊어지는 표는 표와 그 뒤 형제들을
+    부모 다음으로 끌어올립니다.
+    """
+    result = []
+    for block in blocks:
+        children = block[block["type"]].get("children")
+        if children and block["type"] != "table":
+            if depth >= MAX_NESTING:
+                del block[block["type"]]["children"]
+                result.append(block)
+                result.extend(limit_nesting(children, depth))
+                continue
+            children = limit_nesting(children, depth + 1)
+            lifted: List[Dict[str, Any]] = []
+            if depth + 1 >= MAX_NESTING:
+                # 이 깊이의 표는 행이 한도를 넘음
+                first_table = next((i for i, child in enumerate(children) if child["type"] == "table"), None)
+                if first_table is not None:
+                    children, lifted = children[:first_table], children[first_table:]
+            if children:
+                block[block["type"]]["children"] = children
+            else:
+                del block[block["type"]]["children"]
+            result.append(block)
+            result.extend(limit_nesting(lifted, depth))
+            continue
+        result.append(block)
+    return result
+
+def finish(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """내보내기 직전: 긴 블록을 나눈 뒤 중첩 한도를 맞춤"""
+    return limit_nesting(split_long(blocks))
+
+def markdown_to_blocks(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    마크다운 줄을 읽어 완성된 최상위 Notion 블록을 차례로 내보냅니다.
+
+    Args:
+        lines: 마크다운 줄 (문자열이면 splitlines() 결과를 넘김)
+    """
+    paragraph: List[str] = []
+    quote: List[str] = []
+    list_stack: List[Any] = []   # (들여쓰기, 블록)
+    list_root: Optional[Dict[str, Any]] = None
+
+    def flush_text() -> Iterator[Dict[str, Any]]:
+        if paragraph:
+            yield from _text_blocks("paragraph", "\n".join(paragraph))
+            paragraph.clear()
+        if quote:
+            yield from _text_blocks("quote", "\n".join(quote))
+            quote.clear()
+
+    def flush_list() -> Iterator[Dict[str, Any]]:
+        nonlocal list_root
+        if list_root is not None:
+            yield from finish([list_root])
+            list_root = None
+        list_stack.clear()
+
+    iterator = iter(lines)
+    pending: Optional[str] = None
+    while True:
+        if pending is not None:
+            line, pending = pending, None
+        else:
+            line = next(iterator, None)
+            if line is None:
+                break
+        line = line.rstrip("\n").rstrip("\r")
+
+        # 코드 블록: 닫는 펜스까지 그대로
+        fence = FENCE.match(line)
+        if fence:
+            yield from flush_text()
+            yield from flush_list()
+            code_lines = []
+            for code_line in iterator:
+                code_line = code_line.rstrip("\n").rstrip("\r")
+                if code_line.strip().startswith(fence.group(1)):
+                    break
+                code_lines.append(code_line)
+            yield from _code_blocks("\n".join(code_lines), fence.group(2))
+            continue
+
+        # 토글: <details> ... </details> 안쪽은 재귀로 변환
+        details = DETAILS_OPEN.match(line)
+        if details:
+            yield from flush_text()
+            yield from flush_list()
+            summary = details.group(1)
+            inner: List[str] = []
+            depth = 1
+            for inner_line in iterator:
+                if DETAILS_OPEN.match(inner_line):
+                    depth += 1
+                elif DETAILS_CLOSE.match(inner_line):
+                    depth -= 1
+                    if depth == 0:
+                        break
+                if summary is None and not inner and SUMMARY.match(inner_line):
+                    summary = SUMMARY.match(inner_line).group(1)
+                    continue
+                inner.append(inner_line)
+            toggle = _block("toggle", summary or "")
+            children = list(markdown_to_blocks(inner))
+            if children:
+                toggle["toggle"]["children"] = children
+            yield from finish([toggle])
+            continue
+
+        if not line.strip():
+            yield from flush_text()
+            yield from flush_list()
+            continue
+
+        heading = HEADING.match(line)
+        if heading:
+            yield from flush_text()
+            yield from flush_list()
+            level = min(len(heading.group(1)), 3)
+            yield from split_long([_block(f"heading_{level}", heading.group(2))])
+            continue
+
+        if DIVIDER.match(line):
+            yield from flush_text()
+            yield from flush_list()
+            yield {"object": "block", "type": "divider", "divider": {}}
+            continue
+
+        # 표: 연속된 | 줄, 두 번째 줄이 구분선이면 머리글 행
+        if TABLE_ROW.match(line):
+            yield from flush_text()
+            yield from flush_list()
+            rows = [_split_row(line)]
+            has_header = False
+            for table_line in iterator:
+                if TABLE_SEPARATOR.match(table_line) and len(rows) == 1:
+                    has_header = True
+                elif TABLE_ROW.match(table_line):
+                    rows.append(_split_row(table_line))
+                else:
+                    pending = table_line
+                    break
+            yield _table(rows, has_header)
+            continue
+
+        item = BULLET.match(line) or NUMBERED.match(line)
+        if item:
+            yield from flush_text()
+            indent = len(item.group(1).expandtabs(4))
+            text = item.group(2)
+            block_type = "bulleted_list_item" if item.re is BULLET else "numbered_list_item"
+            todo = TODO.match(text) if block_type == "bulleted_list_item" else None
+            if todo:
+                block = _block("to_do", todo.group(2), checked=todo.group(1) != " ")
+            else:
+                block = _block(block_type, text)
+
+            while list_stack and list_stack[-1][0] >= indent:
+                list_stack.pop()
+            if list_stack:
+                _children(list_stack[-1][1]).append(block)
+            else:
+                yield from flush_list()
+                list_root = block
+            list_stack.append((indent, block))
+            continue
+
+        # 목록 항목 아래 들여쓴 줄은 그 항목의 줄바꿈으로 이어 붙임
+        if list_stack and line.startswith((" ", "\t")):
+            last = list_stack[-1][1]
+            last[last["type"]]["rich_text"].extend(inline_rich_text("\n" + line.strip()))
+            continue
+
+        quoted = QUOTE.match(line)
+        if quoted:
+            yield from flush_list()
+            if paragraph:
+                yield from flush_text()
+            quote.append(quoted.group(1))
+            continue
+
+        yield from flush_list()
+        if quote:
+            yield from flush_text()
+        paragraph.append(line.strip())
+
+    yield from flush_text()
+    yield from flush_list()
+
+def _code_blocks(code: str, language: str) -> List[Dict[str, Any]]:
+    items = _text_items(code)
+    limit = notion_writer.MAX_RICH_TEXT_ITEMS
+    return [
+        {
+            "object": "block",
+            "type": "code",
+            "code": {"rich_text": items[i:i + limit], "language": _code_language(language)},
+        }
+        for i in range(0, max(len(items), 1), limit)
+    ]
+
+def convert(markdown: str) -> List[Dict[str, Any]]:
+    """마크다운 문자열 전체를 블록 목록으로 바꿉니다."""
+    return list(markdown_to_blocks(markdown.splitlines()))
@@ -0,0 +1,398 @@
+"""
+Notion 페이지 트리 로컬 미러
+
+NOTION_PAGE_ID 아래의 페이지 트리를 주기적으로 로컬 SQLite 에 복제합니다.
+매 동기화는 notion.search 를 last_edited_time 내림차순으로 읽어 지난 동기화 이후
+바뀐 페이지만 찾아내고, 그 페이지의 블록만 블록 캐시에서 무효화한 뒤 다시 가져옵니다.
+동기화가 실패하면 미러를 쓰지 않다가 다음 동기화에서 전체 트리를 다시 가져옵니다.
+
+MCP 도구와 뷰어는 미러에 트리가 있으면 Notion 을 호출하지 않고 바로 응답합니다.
+
+    python application/notion_mirror.py --interval 60
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import notion_cache
+import notion_model
+import notion_tree
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[logging.StreamHandler(sys.stderr)]
+)
+logger = logging.getLogger("notion-mirror")
+
+MIRROR_ENABLED = os.getenv("NOTION_MIRROR_ENABLED", "true").lower() == "true"
+MIRROR_INTERVAL = float(os.getenv("NOTION_MIRROR_INTERVAL", "0"))
+# 이보다 오래된 미러는 요청 경로에서 쓰지 않습니다
+MIRROR_MAX_STALENESS = float(os.getenv("NOTION_MIRROR_MAX_STALENESS", "3600"))
+# 검색 인덱스 반영 지연을 감안해 지난 동기화 시각보다 조금 앞에서부터 읽습니다
+SEARCH_OVERLAP = timedelta(seconds=120)
+# 이 횟수마다 한 번은 변경 여부와 관계없이 전체 트리를 재검증합니다
+FULL_SYNC_EVERY = int(os.getenv("NOTION_MIRROR_FULL_SYNC_EVERY", "30"))
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+class MirrorStore:
+    """
+    루트별 정규화 트리와 페이지별 동기화 시각을 저장합니다.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS roots (
+                root_id TEXT PRIMARY KEY,
+                tree TEXT NOT NULL,
+                synced_at REAL NOT NULL,
+                sync_started TEXT NOT NULL,
+                passes INTEGER NOT NULL DEFAULT 0,
+                dirty INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                page_id TEXT PRIMARY KEY,
+                root_id TEXT NOT NULL,
+                title TEXT,
+                last_edited_time TEXT,
+                remote_edited_time TEXT,
+                synced_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+        self._parsed: Dict[str, Any] = {}
+
+    def load_root(self, root_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT synced_at, sync_started, passes, dirty FROM roots WHERE root_id = ?", (root_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"synced_at": row[0], "sync_started": row[1], "passes": row[2], "dirty": bool(row[3])}
+
+    def get_tree(self, root_id: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        미러된 트리를 반환합니다. root_id 가 미러된 하위 페이지면 그 페이지의 서브트리를 반환합니다.
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT root_id FROM pages WHERE page_id = ?", (root_id,)).fetchone()
+            mirror_root = row[0] if row else root_id
+            meta = self.conn.execute(
+                "SELECT synced_at, dirty FROM roots WHERE root_id = ?", (mirror_root,)
+            ).fetchone()
+            if meta is None or meta[1]:
+                return None
+            if time.time() - meta[0] > MIRROR_MAX_STALENESS:
+                return None
+
+            parsed = self._parsed.get(mirror_root)
+            if parsed is None or parsed[0] != meta[0]:
+                tree_json = self.conn.execute("SELECT tree FROM roots WHERE root_id = ?", (mirror_root,)).fetchone()[0]
+                parsed = (meta[0], notion_model.tree_from_json(notion_model.loads(tree_json)))
+                self._parsed[mirror_root] = parsed
+
+        tree = parsed[1]
+        if mirror_root == root_id:
+            return tree
+        return _find_subtree(tree, root_id)
+
+    def save_root(self, root_id: str, tree: List[Dict[str, Any]], sync_started: str, synced_pages: List[Dict[str, Any]]) -> None:
+        now = time.time()
+        with self.lock:
+            self.conn.execute("""
+                INSERT INTO roots (root_id, tree, synced_at, sync_started, passes, dirty) VALUES (?, ?, ?, ?, 1, 0)
+                ON CONFLICT(root_id) DO UPDATE SET
+                    tree = excluded.tree,
+                    synced_at = excluded.synced_at,
+                    sync_started = excluded.sync_started,
+                    passes = roots.passes + 1,
+                    dirty = 0
+            """, (root_id, notion_model.dumps(tree, pretty=False), now, sync_started))
+            self.conn.execute("DELETE FROM pages WHERE root_id = ?", (root_id,))
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO pages (page_id, root_id, title, last_edited_time, remote_edited_time, synced_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(page["id"], root_id, page["title"], page["last_edited_time"], page["last_edited_time"], now) for page in synced_pages])
+            self.conn.commit()
+
+    def touch_root(self, root_id: str, sync_started: str) -> None:
+        """바뀐 페이지가 없을 때 동기화 시각만 갱신합니다."""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE roots SET synced_at = ?, sync_started = ?, passes = passes + 1 WHERE root_id = ?",
+                (now, sync_started, root_id)
+            )
+            self.conn.execute("UPDATE pages SET synced_at = ? WHERE root_id = ?", (now, root_id))
+            self.conn.commit()
+            parsed = self._parsed.get(root_id)
+            if parsed:
+                self._parsed[root_id] = (now, parsed[1])
+
+    def mark_remote_edit(self, page_id: str, remote_edited_time: str) -> None:
+        with self.lock:
+            self.conn.execute("UPDATE pages SET remote_edited_time = ? WHERE page_id = ?", (remote_edited_time, page_id))
+            self.conn.commit()
+
+    def mark_dirty(self, page_id: str) -> None:
+        """페이지에 쓴 직후처럼 미러가 낡은 것이 확실할 때 다음 동기화 전까지 미러를 쓰지 않습니다."""
+        with self.lock:
+            row = self.conn.execute("SELECT root_id FROM pages WHERE page_id = ?", (page_id,)).fetchone()
+            self.conn.execute("UPDATE roots SET dirty = 1 WHERE root_id = ?", (row[0] if row else page_id,))
+            self.conn.commit()
+
+    def known_pages(self, root_id: str) -> Dict[str, str]:
+        with self.lock:
+            return dict(self.conn.execute(
+                "SELECT page_id, last_edited_time FROM pages WHERE root_id = ?", (root_id,)
+            ).fetchall())
+
+    def status(self) -> Dict[str, Any]:
+        """루트/페이지별 마지막 동기화 이후 경과 시간(초)"""
+        now = time.time()
+        with self.lock:
+            roots = self.conn.execute("SELECT root_id, synced_at, passes, dirty FROM roots").fetchall()
+            pages = self.conn.execute(
+                "SELECT page_id, root_id, title, last_edited_time, remote_edited_time, synced_at FROM pages"
+            ).fetchall()
+        return {
+            "roots": [
+                {"root_id": r[0], "staleness_seconds": round(now - r[1], 1), "passes": r[2], "dirty": bool(r[3])}
+                for r in roots
+            ],
+            "pages": [
+                {
+                    "page_id": p[0],
+                    "root_id": p[1],
+                    "title": p[2],
+                    "last_edited_time": p[3],
+                    "staleness_seconds": round(now - p[5], 1),
+                    "changed_since_sync": bool(p[4] and p[3] and p[4] > p[3]),
+                }
+                for p in pages
+            ],
+        }
+
+def _find_subtree(tree: List[Dict[str, Any]], block_id: str) -> Optional[List[Dict[str, Any]]]:
+    for block in tree:
+        if block["id"] == block_id:
+            return block["children"]
+        found = _find_subtree(block["children"], block_id)
+        if found is not None:
+            return found
+    return None
+
+def _collect_pages(tree: List[Dict[str, Any]], root_id: str, root_edited_time: str) -> List[Dict[str, Any]]:
+    pages = [{"id": root_id, "title": "", "last_edited_time": root_edited_time}]
+    for block in notion_tree.project_child_page_blocks(tree):
+        pages.append({"id": block["id"], "title": block["text"], "last_edited_time": block["last_edited_time"]})
+    return pages
+
+def _page_block_ids(children: List[Dict[str, Any]]) -> List[str]:
+    """페이지 안의 하위 블록이 있는 블록 ID (다른 하위 페이지 안쪽은 제외)"""
+    ids = []
+    for block in children:
+        if block["has_children"] and block["type"] != "child_page":
+            ids.append(block["id"])
+            ids.extend(_page_block_ids(block["children"]))
+    return ids
+
+def changed_pages_since(notion, since: str) -> List[Dict[str, Any]]:
+    """
+    notion.search 를 last_edited_time 내림차순으로 읽어 since 이후 바뀐 페이지를 반환합니다.
+    """
+    since_time = _parse_time(since) - SEARCH_OVERLAP
+    changed = []
+    cursor = None
+    while True:
+        kwargs = {
+            "filter": {"value": "page", "property": "object"},
+            "sort": {"direction": "descending", "timestamp": "last_edited_time"},
+            "page_size": 100,
+        }
+        if cursor:
+            kwargs["start_cursor"] = cursor
+        response = notion.search(**kwargs)
+
+        for page in response.get("results", []):
+            if _parse_time(page["last_edited_time"]) < since_time:
+                return changed
+            changed.append(page)
+
+        cursor = response.get("next_cursor")
+        if not response.get("has_more") or not cursor:
+            return changed
+
+def sync_once(notion, root_id: str, store: "MirrorStore", full: bool = False) -> Dict[str, Any]:
+    """
+    미러를 한 번 동기화합니다. 실패하면 미러를 dirty 로 표시해 다음 동기화가 성공할 때까지
+    요청 경로에서 쓰지 않고, 다음 동기화는 전체 재검증으로 합니다.
+
+    Returns:
+        동기화 결과 (바뀐 페이지 수, 소요 시간 등)
+    """
+    # 검색 결과의 ID(하이픈 있는 소문자)와 비교하므로 루트 ID 도 같은 형식으로
+    root_id = notion_tree.parse_id(root_id)
+    try:
+        return _sync(notion, root_id, store, full)
+    except Exception:
+        store.mark_dirty(root_id)
+        raise
+
+def _sync(notion, root_id: str, store: "MirrorStore", full: bool) -> Dict[str, Any]:
+    started = time.monotonic()
+    sync_started = _now_iso()
+    meta = store.load_root(root_id)
+    cache = notion_cache.get_cache()
+
+    full = full or meta is None or meta["dirty"] or meta["passes"] % FULL_SYNC_EVERY == 0
+    changed_ids: List[str] = []
+    if not full:
+        known = store.known_pages(root_id)
+        for page in changed_pages_since(notion, meta["sync_started"]):
+            parent_id = page.get("parent", {}).get("page_id")
+            if page["id"] in known:
+                if page["last_edited_time"] != known[page["id"]]:
+                    changed_ids.append(page["id"])
+                    store.mark_remote_edit(page["id"], page["last_edited_time"])
+            elif parent_id in known:
+                # 새로 생긴 하위 페이지는 부모 페이지를 다시 읽어야 목록에 나타납니다
+                changed_ids.append(parent_id)
+
+        if not changed_ids:
+            store.touch_root(root_id, sync_started)
+            return {"root_id": root_id, "full": False, "changed_pages": 0, "seconds": round(time.monotonic() - started, 3)}
+
+        # 바뀐 페이지 안쪽 블록은 last_edited_time 이 그대로일 수 있으므로 캐시에서 지웁니다
+        tree = store.get_tree(root_id) or []
+        if cache:
+            for page_id in set(changed_ids):
+                children = tree if page_id == root_id else (_find_subtree(tree, page_id) or [])
+                cache.invalidate([page_id] + _page_block_ids(children))
+
+    page = notion.pages.retrieve(page_id=root_id)
+    tree = notion_tree.fetch_block_tree(notion, root_id, cache=None if full else cache)
+    if full and cache:
+        # 전체 재검증 결과로 캐시도 새로 채웁니다
+        notion_tree.fill_cache(cache, root_id, tree)
+
+    store.save_root(root_id, tree, sync_started, _collect_pages(tree, root_id, page.get("last_edited_time", "")))
+    notion_tree.invalidate_tree(root_id)
+    notion_tree.index_tree(notion, root_id, tree, title=notion_tree.page_title(page))
+
+    result = {
+        "root_id": root_id,
+        "full": full,
+        "changed_pages": len(set(changed_ids)),
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    logger.info(f"미러 동기화 완료: {result}")
+    return result
+
+_store: Optional[MirrorStore] = None
+_store_lock = threading.Lock()
+
+def get_store() -> Optional[MirrorStore]:
+    """
+    프로세스 공용 미러 저장소를 반환합니다. NOTION_MIRROR_ENABLED=false 이면 None.
+    """
+    global _store
+    if not MIRROR_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = MirrorStore(notion_cache.data_path("notion_mirror.sqlite"))
+        return _store
+
+class MirrorDaemon(threading.Thread):
+    """
+    interval 초마다 sync_once 를 실행하는 백그라운드 스레드
+    """
+    def __init__(self, notion, root_id: str, interval: float):
+        super().__init__(name="notion-mirror", daemon=True)
+        self.notion = notion
+        self.root_id = root_id
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.last_result: Dict[str, Any] = {}
+        self.last_error = ""
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            try:
+                self.last_result = sync_once(self.notion, self.root_id, get_store())
+                self.last_error = ""
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"미러 동기화 실패: {e}")
+            self.stopped.wait(self.interval)
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+_daemons: Dict[str, MirrorDaemon] = {}
+
+def start_background_sync(notion, root_id: str, interval: float = MIRROR_INTERVAL) -> Optional[MirrorDaemon]:
+    """
+    root_id 미러 동기화 스레드를 (한 번만) 시작합니다. interval 이 0 이하면 시작하지 않습니다.
+    """
+    if interval <= 0 or get_store() is None:
+        return None
+    root_id = notion_tree.parse_id(root_id)
+    with _store_lock:
+        daemon = _daemons.get(root_id)
+        if daemon is None or not daemon.is_alive():
+            daemon = MirrorDaemon(notion, root_id, interval)
+            daemon.start()
+            _daemons[root_id] = daemon
+            logger.info(f"미러 동기화 시작: root={root_id}, {interval}초 간격")
+        return daemon
+
+def get_status() -> Dict[str, Any]:
+    store = get_store()
+    if store is None:
+        return {"enabled": False}
+    status = store.status()
+    status["daemons"] = [
+        {"root_id": root_id, "alive": d.is_alive(), "interval": d.interval, "last_result": d.last_result, "last_error": d.last_error}
+        for root_id, d in _daemons.items()
+    ]
+    return status
+
+if __name__ == "__main__":
+    import notion_api
+
+    parser = argparse.ArgumentParser(description="Notion 페이지 트리 로컬 미러 동기화")
+    parser.add_argument("--interval", type=float, default=MIRROR_INTERVAL or 60, help="동기화 간격(초)")
+    parser.add_argument("--once", action="store_true", help="한 번만 동기화하고 종료")
+    parser.add_argument("--full", action="store_true", help="변경 여부와 관계없이 전체 트리를 다시 가져옴")
+    args = parser.parse_args()
+
+    page_id = os.getenv("NOTION_PAGE_ID")
+    if not os.getenv("NOTION_API_KEY") or not page_id:
+        sys.exit("NOTION_API_KEY 와 NOTION_PAGE_ID 를 설정해야 합니다.")
+
+    notion = notion_api.get_client()
+    while True:
+        print(json.dumps(sync_once(notion, page_id, get_store(), full=args.full), ensure_ascii=False))
+        if args.once:
+            break
+        time.sleep(args.interval)
@@ -0,0 +1,154 @@
+"""
+블록 트리 내부 표현과 JSON 직렬화
+
+정규화된 블록은 __slots__ 레코드(Block)로 보관합니다. 블록마다 dict 를 두면 같은 키 9개와
+빈 url/caption 을 블록 수만큼 들고 있게 되므로, 큰 트리에서 메모리를 크게 줄입니다.
+type 문자열은 intern 해 같은 객체를 공유하고, 드물게 쓰는 필드(language, checked, cells, collapsed)는
+extra 에만 둡니다.
+
+기존 코드가 block["type"], block.get("url"), block["children"] = ... 로 쓰던 그대로 동작하도록
+dict 와 같은 접근을 지원합니다.
+
+JSON 은 orjson 이 있으면 orjson 으로, 없으면 표준 json 으로 만들며, 기본은 공백 없는 compact 형식입니다.
+(NOTION_JSON_PRETTY=true 면 들여쓰기)
+"""
+import json
+import os
+import sys
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import orjson
+except ImportError:  # orjson 이 없으면 표준 json 사용
+    orjson = None
+
+PRETTY = os.getenv("NOTION_JSON_PRETTY", "false").lower() == "true"
+
+FIELDS = ("id", "type", "text", "url", "caption", "last_edited_time", "has_children", "children")
+
+class Block:
+    """
+    정규화된 블록 하나. children 에는 하위 Block 목록이 들어갑니다.
+    """
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, id: str, type: str, text: str = "", url: str = "", caption: str = "",
+                 last_edited_time: str = "", has_children: bool = False,
+                 children: Optional[List["Block"]] = None, extra: Optional[Dict[str, Any]] = None):
+        self.id = id
+        self.type = sys.intern(type)
+        self.text = text
+        self.url = url
+        self.caption = caption
+        self.last_edited_time = last_edited_time
+        self.has_children = has_children
+        self.children = children if children is not None else []
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Block":
+        """JSON 에서 읽은 dict(하위 블록 포함)를 Block 으로 바꿉니다. 빠진 필드는 기본값"""
+        extra = {key: value for key, value in data.items() if key not in FIELDS}
+        return cls(
+            data["id"],
+            data["type"],
+            data.get("text", ""),
+            data.get("url", ""),
+            data.get("caption", ""),
+            data.get("last_edited_time", ""),
+            data.get("has_children", False),
+            [cls.from_dict(child) for child in data.get("children", [])],
+            extra,
+        )
+
+    # dict 와 같은 접근
+
+    def __getitem__(self, key: str) -> Any:
+        if key in FIELDS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return key in FIELDS or bool(self.extra and key in self.extra)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> List[str]:
+        return list(FIELDS) + list(self.extra or ())
+
+    def items(self) -> Iterator:
+        return ((key, self[key]) for key in self.keys())
+
+    def copy(self, **changes: Any) -> "Block":
+        """얕은 사본. changes 로 필드(또는 extra)를 바꿉니다."""
+        block = Block(self.id, self.type, self.text, self.url, self.caption, self.last_edited_time,
+                      self.has_children, self.children, dict(self.extra) if self.extra else None)
+        for key, value in changes.items():
+            block[key] = value
+        return block
+
+    def to_dict(self, children: bool = True) -> Dict[str, Any]:
+        """
+        출력용 dict. 예전 블록 dict 와 같은 키를 비어 있어도 모두 넣습니다. (children=False 면 children 만 뺌)
+        """
+        data: Dict[str, Any] = {
+            "id": self.id,
+            "type": self.type,
+            "text": self.text,
+            "url": self.url,
+            "caption": self.caption,
+            "last_edited_time": self.last_edited_time,
+            "has_children": self.has_children,
+        }
+        if children:
+            data["children"] = self.children
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __repr__(self) -> str:
+        return f"Block({self.type}, {self.id}, {self.text[:20]!r}, children={len(self.children)})"
+
+def tree_from_json(data: List[Dict[str, Any]]) -> List[Block]:
+    return [Block.from_dict(block) for block in data]
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Block):
+        return value.to_dict()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"JSON 으로 바꿀 수 없는 값: {type(value).__name__}")
+
+def dumps(value: Any, pretty: Optional[bool] = None) -> str:
+    """
+    JSON 문자열. Block 은 to_dict 로 바뀝니다.
+
+    Args:
+        pretty: 들여쓰기 여부 (None 이면 NOTION_JSON_PRETTY)
+    """
+    if pretty is None:
+        pretty = PRETTY
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_INDENT_2 if pretty else 0).decode("utf-8")
+    if pretty:
+        return json.dumps(value, ensure_ascii=False, indent=2, default=_default)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_default)
+
+def loads(text: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
@@ -0,0 +1,324 @@
+"""
+Notion 쓰기 대기열 (write-behind)
+
+add_to_notion_page 의 쓰기를 로컬 SQLite 저널에 먼저 기록하고 바로 반환합니다.
+백그라운드 작업 스레드가 저널을 순서대로 묶어 꺼내 Notion 에 씁니다.
+
+- 저널은 추가만 하는 기록입니다. 항목은 지우지 않고 상태(pending/running/done/superseded/failed)만 바꾸므로
+  프로세스가 재시작되어도 pending 항목부터 이어서 씁니다.
+- 항목은 한 트랜잭션 안에서 running 으로 바꿔 꺼내므로, 같은 저널을 여러 프로세스가 함께 써도
+  한 항목을 한 작업자만 씁니다. 작업자가 죽어 running 으로 남은 항목은 NOTION_QUEUE_LEASE 초 뒤에 다시 꺼냅니다.
+- 같은 페이지의 같은 리포트(제목)가 여러 번 쌓였으면 마지막 내용만 쓰고 나머지는 superseded 로 표시합니다.
+  (리포트 쓰기는 notion_report 기록으로 바뀐 블록만 고치므로 마지막 내용만 써도 결과가 같음)
+- 실패한 항목은 지수 백오프로 다시 시도하고, NOTION_QUEUE_MAX_ATTEMPTS 번 실패하면 failed 로 남깁니다.
+- API 호출 간격은 공유 클라이언트의 속도 제한이 맞춥니다.
+"""
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import notion_cache
+import notion_report
+import notion_tree
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[logging.StreamHandler(sys.stderr)]
+)
+logger = logging.getLogger("notion-queue")
+
+# false 면 add_to_notion_page 가 예전처럼 바로 씀
+QUEUE_ENABLED = os.getenv("NOTION_WRITE_BEHIND", "true").lower() == "true"
+# 대기열이 비어 있을 때 저널을 다시 확인하는 간격(초)
+QUEUE_INTERVAL = float(os.getenv("NOTION_QUEUE_INTERVAL", "2"))
+# 한 번에 꺼내는 저널 항목 수
+QUEUE_BATCH = int(os.getenv("NOTION_QUEUE_BATCH", "20"))
+QUEUE_MAX_ATTEMPTS = int(os.getenv("NOTION_QUEUE_MAX_ATTEMPTS", "8"))
+QUEUE_MAX_BACKOFF = 300.0
+# 꺼낸(running) 항목을 다른 작업자가 다시 꺼낼 수 있게 되기까지의 시간(초)
+QUEUE_LEASE = float(os.getenv("NOTION_QUEUE_LEASE", "600"))
+
+class WriteJournal:
+    """
+    추가 전용 쓰기 저널
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS journal (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                page_id TEXT NOT NULL,
+                report_key TEXT NOT NULL,
+                title TEXT NOT NULL,
+                content TEXT NOT NULL,
+                skip_blocks INTEGER NOT NULL DEFAULT 0,
+                enqueued_at REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                result TEXT,
+                done_at REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS journal_status ON journal (status, seq)")
+        self.conn.commit()
+
+    def append(self, page_id: str, title: str, content: str, skip_blocks: int = 0) -> int:
+        with self.lock:
+            cursor = self.conn.execute("""
+                INSERT INTO journal (page_id, report_key, title, content, skip_blocks, enqueued_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (page_id, title.strip(), title, content, skip_blocks, time.time()))
+            self.conn.commit()
+            return cursor.lastrowid
+
+    def take_batch(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        지금 쓸 수 있는 pending 항목(또는 임대 시간이 지난 running 항목)을 오래된 순서로 limit 개까지
+        running 으로 바꿔 꺼냅니다. BEGIN IMMEDIATE 로 쓰기 잠금을 먼저 잡으므로 다른 프로세스와 겹치지 않습니다.
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.conn.execute("""
+                    SELECT seq, page_id, report_key, title, content, skip_blocks, attempts
+                    FROM journal
+                    WHERE status IN ('pending', 'running') AND next_attempt_at <= ?
+                    ORDER BY seq
+                    LIMIT ?
+                """, (now, limit)).fetchall()
+                # running 동안 next_attempt_at 은 임대 만료 시각
+                self.conn.executemany(
+                    "UPDATE journal SET status = 'running', next_attempt_at = ? WHERE seq = ?",
+                    [(now + QUEUE_LEASE, row[0]) for row in rows]
+                )
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        keys = ["seq", "page_id", "report_key", "title", "content", "skip_blocks", "attempts"]
+        return [dict(zip(keys, row)) for row in rows]
+
+    def supersede(self, seqs: List[int], by_seq: int) -> None:
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE journal SET status = 'superseded', result = ?, done_at = ? WHERE seq = ?",
+                [(json.dumps({"superseded_by": by_seq}), time.time(), seq) for seq in seqs]
+            )
+            self.conn.commit()
+
+    def complete(self, seq: int, result: Dict[str, Any]) -> None:
+        """
+        seq 를 완료로 표시하고, 백오프 중이라 같은 묶음에 없던 같은 리포트의 이전 항목도 대체 처리합니다.
+        (그대로 두면 나중에 재시도되면서 새 내용을 옛 내용으로 덮어씀)
+        """
+        with self.lock:
+            self.conn.execute(
+                "UPDATE journal SET status = 'done', result = ?, last_error = NULL, done_at = ? WHERE seq = ?",
+                (json.dumps(result, ensure_ascii=False), time.time(), seq)
+            )
+            self.conn.execute("""
+                UPDATE journal SET status = 'superseded', result = ?, done_at = ?
+                WHERE status IN ('pending', 'running', 'failed') AND seq < ?
+                  AND (page_id, report_key) = (SELECT page_id, report_key FROM journal WHERE seq = ?)
+            """, (json.dumps({"superseded_by": seq}), time.time(), seq, seq))
+            self.conn.commit()
+
+    def fail(self, seq: int, attempts: int, error: str) -> str:
+        """
+        실패를 기록합니다. 재시도 횟수가 남았으면 백오프 뒤에 다시 pending 으로 꺼낼 수 있게 합니다.
+        """
+        status = "failed" if attempts >= QUEUE_MAX_ATTEMPTS else "pending"
+        delay = min(QUEUE_MAX_BACKOFF, 2.0 ** attempts)
+        with self.lock:
+            self.conn.execute(
+                "UPDATE journal SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE seq = ?",
+                (status, attempts, time.time() + delay, error, seq)
+            )
+            self.conn.commit()
+        return status
+
+    def get(self, seq: int) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT seq, page_id, title, status, attempts, last_error, result, enqueued_at, done_at FROM journal WHERE seq = ?",
+                (seq,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ["seq", "page_id", "title", "status", "attempts", "last_error", "result", "enqueued_at", "done_at"]
+        entry = dict(zip(keys, row))
+        entry["result"] = json.loads(entry["result"]) if entry["result"] else None
+        return entry
+
+    def status(self) -> Dict[str, Any]:
+        now = time.time()
+        with self.lock:
+            counts = dict(self.conn.execute("SELECT status, count(*) FROM journal GROUP BY status").fetchall())
+            oldest = self.conn.execute(
+                "SELECT min(enqueued_at), count(DISTINCT page_id) FROM journal WHERE status = 'pending'"
+            ).fetchone()
+            failed = self.conn.execute("""
+                SELECT seq, page_id, title, attempts, last_error FROM journal
+                WHERE status = 'failed' OR (status = 'pending' AND attempts > 0)
+                ORDER BY seq DESC LIMIT 10
+            """).fetchall()
+            last_done = self.conn.execute("SELECT max(done_at) FROM journal WHERE status = 'done'").fetchone()[0]
+        return {
+            "pending": counts.get("pending", 0),
+            "running": counts.get("running", 0),
+            "pending_pages": oldest[1],
+            "lag_seconds": round(now - oldest[0], 1) if oldest[0] else 0.0,
+            "done": counts.get("done", 0),
+            "superseded": counts.get("superseded", 0),
+            "failed": counts.get("failed", 0),
+            "last_write_ago_seconds": round(now - last_done, 1) if last_done else None,
+            "errors": [
+                {"seq": seq, "page_id": page_id, "title": title, "attempts": attempts, "error": error}
+                for seq, page_id, title, attempts, error in failed
+            ],
+            "path": self.path,
+        }
+
+def coalesce(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    같은 (page_id, 제목) 항목은 마지막 것만 남깁니다. 각 항목에 대체된 seq 목록을 superseded 로 붙입니다.
+    남은 항목은 원래 순서(마지막 항목의 seq 순)를 유지합니다.
+    """
+    latest: Dict[Any, Dict[str, Any]] = {}
+    for entry in entries:
+        key = (entry["page_id"], entry["report_key"])
+        previous = latest.pop(key, None)
+        entry["superseded"] = []
+        if previous is not None:
+            entry["superseded"] = previous["superseded"] + [previous["seq"]]
+            # 앞 항목의 실패 횟수를 이어받아 계속 실패하는 리포트가 끝없이 재시도되지 않게 함
+            entry["attempts"] = max(entry["attempts"], previous["attempts"])
+        latest[key] = entry
+    return sorted(latest.values(), key=lambda entry: entry["seq"])
+
+def drain_once(notion, journal: "WriteJournal", limit: int = QUEUE_BATCH) -> Dict[str, int]:
+    """
+    pending 항목을 한 묶음 꺼내 합친 뒤 순서대로 씁니다.
+    """
+    entries = journal.take_batch(limit)
+    stats = {"taken": len(entries), "written": 0, "superseded": 0, "failed": 0}
+    written_pages = set()
+    for entry in coalesce(entries):
+        journal.supersede(entry["superseded"], entry["seq"])
+        stats["superseded"] += len(entry["superseded"])
+        try:
+            result = notion_report.write_report(
+                notion, entry["page_id"], entry["title"], entry["content"], skip_blocks=entry["skip_blocks"]
+            )
+        except Exception as e:
+            result = {"appended": 0, "updated": 0, "deleted": 0, "error": str(e)}
+
+        if result["appended"] or result["updated"] or result["deleted"]:
+            written_pages.add(entry["page_id"])
+
+        if result["error"]:
+            # 리포트 기록이 부분 성공을 남기므로 다시 시도하면 남은 블록만 씀
+            status = journal.fail(entry["seq"], entry["attempts"] + 1, result["error"])
+            stats["failed"] += 1
+            logger.error(f"쓰기 대기열 #{entry['seq']} 실패 ({status}): {result['error']}")
+        else:
+            journal.complete(entry["seq"], result)
+            stats["written"] += 1
+
+    for page_id in written_pages:
+        notion_tree.mark_page_written(page_id)
+    if entries:
+        logger.info(f"쓰기 대기열 처리: {stats}")
+    return stats
+
+class WriteWorker(threading.Thread):
+    """
+    저널을 비울 때까지 묶음 단위로 쓰고, 비면 QUEUE_INTERVAL 초 또는 새 항목이 들어올 때까지 기다립니다.
+    """
+    def __init__(self, notion, journal: "WriteJournal", interval: float = QUEUE_INTERVAL):
+        super().__init__(name="notion-write-queue", daemon=True)
+        self.notion = notion
+        self.journal = journal
+        self.interval = interval
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.last_result: Dict[str, int] = {}
+        self.last_error = ""
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            self.wakeup.clear()
+            try:
+                self.last_result = drain_once(self.notion, self.journal)
+                self.last_error = ""
+                # 가득 찬 묶음을 꺼냈으면 기다리지 않고 바로 다음 묶음을 꺼냄
+                if self.last_result["taken"] >= QUEUE_BATCH:
+                    continue
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"쓰기 대기열 처리 실패: {e}")
+            self.wakeup.wait(self.interval)
+
+    def notify(self) -> None:
+        self.wakeup.set()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.wakeup.set()
+
+_journal: Optional[WriteJournal] = None
+_worker: Optional[WriteWorker] = None
+_queue_lock = threading.Lock()
+
+def get_journal() -> WriteJournal:
+    """프로세스 공용 쓰기 저널"""
+    global _journal
+    with _queue_lock:
+        if _journal is None:
+            _journal = WriteJournal(notion_cache.data_path("notion_write_queue.sqlite"))
+        return _journal
+
+def start_worker(notion) -> WriteWorker:
+    """
+    쓰기 작업 스레드를 (한 번만) 시작합니다. 이전 실행에서 남은 pending 항목부터 씁니다.
+    """
+    global _worker
+    journal = get_journal()
+    with _queue_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = WriteWorker(notion, journal)
+            _worker.start()
+            logger.info(f"쓰기 대기열 시작: pending {journal.status()['pending']}개")
+        return _worker
+
+def enqueue(notion, page_id: str, title: str, content: str, skip_blocks: int = 0) -> int:
+    """
+    쓰기를 저널에 기록하고 작업 스레드를 깨웁니다. 저널 번호(seq)를 반환합니다.
+    """
+    seq = get_journal().append(notion_tree.parse_id(page_id), title, content, skip_blocks)
+    start_worker(notion).notify()
+    return seq
+
+def get_entry(seq: int) -> Optional[Dict[str, Any]]:
+    """작업 번호(seq) 하나의 상태"""
+    return get_journal().get(seq)
+
+def get_status() -> Dict[str, Any]:
+    status = get_journal().status()
+    status["enabled"] = QUEUE_ENABLED
+    status["worker"] = None
+    if _worker is not None:
+        status["worker"] = {"alive": _worker.is_alive(), "last_result": _worker.last_result, "last_error": _worker.last_error}
+    return status
@@ -0,0 +1,356 @@
+"""
+Notion 블록 트리 -> 마크다운
+
+get_notion_blocks 의 JSON 트리는 id, 빈 url/caption, 중첩된 children 배열 같은 구조가
+토큰 대부분을 차지합니다. 같은 트리를 짧은 마크다운으로 바꾸고,
+
+- heading 을 주면 그 제목 아래 구역(다음 같은/상위 수준 제목 전까지)만 잘라내고,
+- max_tokens 를 주면 넘기 전에 최상위 블록 단위로 멈춘 뒤 남은 제목 목록을 알려 줍니다.
+  (에이전트는 남은 제목을 heading 으로 다시 요청해 이어 읽음)
+
+뷰어용으로는 같은 트리를 한 번 훑어 HTML 문서 몇 개로 만듭니다(render_html).
+블록마다 Streamlit 요소를 만들지 않고 문서 조각 단위로 st.markdown 을 부르며, 토글은 <details> 로 접힙니다.
+"""
+import html
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+HEADING_LEVELS = {"heading_1": 1, "heading_2": 2, "heading_3": 3}
+# 바로 이어지는 블록끼리 빈 줄 없이 붙이는 목록형 블록
+LIST_TYPES = ["bulleted_list_item", "numbered_list_item", "to_do", "toggle"]
+LINK_TYPES = ["bookmark", "embed", "link_preview", "video", "file", "pdf", "audio"]
+
+CJK_CHAR = re.compile(r"[ᄀ-ᇿ぀-ヿ㄰-㆏㐀-䶿一-鿿가-힣]")
+
+def estimate_tokens(text: str) -> int:
+    """
+    대략적인 토큰 수. 한글/한자/가나는 글자당 1, 그 밖은 4글자당 1 로 셉니다.
+    (토크나이저 없이 예산을 맞추기 위한 값이라 실제보다 조금 넉넉함)
+    """
+    cjk = len(CJK_CHAR.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+def _prefixed(prefix: str, text: str, indent: str) -> List[str]:
+    """첫 줄에 prefix, 여러 줄이면 나머지 줄은 prefix 폭만큼 들여씁니다."""
+    lines = text.split("\n")
+    rest = indent + " " * (len(prefix) - len(indent))
+    return [prefix + lines[0]] + [rest + line for line in lines[1:]]
+
+def _table(block: Dict[str, Any], indent: str) -> List[str]:
+    rows = [child.get("cells") or [child.get("text", "")] for child in block["children"] if child["type"] == "table_row"]
+    if not rows:
+        return []
+    width = max(len(row) for row in rows)
+    lines = []
+    for i, row in enumerate(rows):
+        cells = [cell.replace("|", "\\|").replace("\n", " ") for cell in row] + [""] * (width - len(row))
+        lines.append(indent + "| " + " | ".join(cells) + " |")
+        if i == 0:
+            lines.append(indent + "|" + "---|" * width)
+    return lines
+
+def render_block(block: Dict[str, Any], depth: int = 0, include_urls: bool = False) -> List[str]:
+    """블록 하나와 하위 블록을 마크다운 줄 목록으로 바꿉니다."""
+    block_type = block["type"]
+    text = block.get("text", "")
+    indent = "  " * depth
+    lines: List[str] = []
+
+    if block_type in HEADING_LEVELS:
+        lines.append("#" * HEADING_LEVELS[block_type] + " " + text)
+    elif block_type == "bulleted_list_item":
+        lines.extend(_prefixed(f"{indent}- ", text, indent))
+    elif block_type == "numbered_list_item":
+        lines.extend(_prefixed(f"{indent}1. ", text, indent))
+    elif block_type == "to_do":
+        lines.extend(_prefixed(f"{indent}- [{'x' if block.get('checked') else ' '}] ", text, indent))
+    elif block_type == "toggle":
+        lines.extend(_prefixed(f"{indent}- ▸ ", text, indent))
+    elif block_type in ("quote", "callout"):
+        lines.extend(f"{indent}> {line}" for line in text.split("\n"))
+    elif block_type == "code":
+        lines.append(f"{indent}```{block.get('language', '')}")
+        lines.extend(indent + line for line in text.split("\n"))
+        lines.append(f"{indent}```")
+    elif block_type == "image":
+        if include_urls and block.get("url"):
+            lines.append(f"{indent}![{block.get('caption', '')}]({block['url']})")
+        else:
+            lines.append(f"{indent}[이미지{': ' + block['caption'] if block.get('caption') else ''}]")
+    elif block_type == "child_page":
+        lines.append(f"{indent}[하위 페이지: {text}]({block['id']})")
+    elif block_type == "child_database":
+        lines.append(f"{indent}[데이터베이스]({block['id']})")
+    elif block_type == "divider":
+        lines.append(f"{indent}---")
+    elif block_type == "table":
+        return _table(block, indent)
+    elif block_type in LINK_TYPES and block.get("url"):
+        caption = block.get("caption", "")
+        lines.append(f"{indent}[{caption}]({block['url']})" if caption else f"{indent}<{block['url']}>")
+    elif text:
+        lines.extend(indent + line for line in text.split("\n"))
+
+    if block.get("collapsed"):
+        lines.append(f"{indent}  …")
+
+    # 제목 아래(토글 제목)는 같은 깊이, 나머지 블록의 하위 블록은 한 단계 들여씀
+    child_depth = depth if block_type in HEADING_LEVELS else depth + 1
+    for child in block.get("children", []):
+        lines.extend(render_block(child, child_depth, include_urls))
+    return lines
+
+def outline(tree: List[Dict[str, Any]]) -> List[Tuple[int, str]]:
+    """트리 안의 모든 제목 (수준, 텍스트), 문서 순서"""
+    headings = []
+    for block in tree:
+        if block["type"] in HEADING_LEVELS and block.get("text"):
+            headings.append((HEADING_LEVELS[block["type"]], block["text"]))
+        if block.get("children"):
+            headings.extend(outline(block["children"]))
+    return headings
+
+def select_section(tree: List[Dict[str, Any]], heading: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    heading 과 텍스트가 같은(없으면 포함하는) 첫 제목과, 그 뒤 같은 수준 이상의 제목이 나오기 전까지의 형제 블록
+    """
+    query = heading.strip().casefold()
+
+    def find(blocks: List[Dict[str, Any]], exact: bool) -> Optional[List[Dict[str, Any]]]:
+        for i, block in enumerate(blocks):
+            if block["type"] in HEADING_LEVELS:
+                title = block.get("text", "").strip().casefold()
+                if title == query if exact else query in title:
+                    level = HEADING_LEVELS[block["type"]]
+                    section = [block]
+                    for sibling in blocks[i + 1:]:
+                        if HEADING_LEVELS.get(sibling["type"], 99) <= level:
+                            break
+                        section.append(sibling)
+                    return section
+            if block.get("children"):
+                found = find(block["children"], exact)
+                if found is not None:
+                    return found
+        return None
+
+    return find(tree, True) or find(tree, False)
+
+def render_markdown(tree: List[Dict[str, Any]], heading: str = "", max_tokens: int = 0,
+                    include_urls: bool = False) -> Dict[str, Any]:
+    """
+    트리를 마크다운으로 바꿉니다.
+
+    Returns:
+        markdown, tokens(추정), truncated, remaining_headings(잘린 뒤 남은 제목), found(heading 을 찾았는지)
+    """
+    blocks = tree
+    if heading:
+        section = select_section(tree, heading)
+        if section is None:
+            return {"markdown": "", "tokens": 0, "truncated": False, "remaining_headings": [], "found": False}
+        blocks = section
+
+    parts: List[str] = []
+    tokens = 0
+    truncated_at = None
+    previous_type = ""
+    for index, block in enumerate(blocks):
+        lines = render_block(block, 0, include_urls)
+        if not lines:
+            continue
+        separator = "\n" if block["type"] in LIST_TYPES and previous_type in LIST_TYPES else "\n\n"
+        unit = "\n".join(lines)
+        cost = estimate_tokens(unit) + 1
+        if max_tokens and tokens + cost > max_tokens:
+            if not parts:
+                # 첫 블록 하나가 예산보다 크면 줄 단위로 자름
+                kept = []
+                for line in lines:
+                    line_cost = estimate_tokens(line) + 1
+                    if tokens + line_cost > max_tokens:
+                        break
+                    kept.append(line)
+                    tokens += line_cost
+                parts.append("\n".join(kept))
+            truncated_at = index
+            break
+        if parts:
+            parts.append(separator)
+        parts.append(unit)
+        tokens += cost
+        previous_type = block["type"]
+
+    remaining = []
+    if truncated_at is not None:
+        remaining = [text for _, text in outline(blocks[truncated_at:])]
+    return {
+        "markdown": "".join(parts),
+        "tokens": tokens,
+        "truncated": truncated_at is not None,
+        "remaining_headings": remaining,
+        "found": True,
+    }
+
+# 제목이 없는 긴 구간을 나누는 크기 (split_sections)
+SECTION_MAX_BLOCKS = 50
+
+def split_sections(blocks: List[Dict[str, Any]], max_blocks: int = SECTION_MAX_BLOCKS) -> List[Dict[str, Any]]:
+    """
+    최상위 블록을 제목 기준 구역으로 나눕니다. 제목 없이 max_blocks 를 넘는 구간은 "(계속)" 구역으로 자릅니다.
+
+    Returns:
+        [{"title", "level", "blocks"}] (첫 제목 앞의 블록은 제목이 빈 구역)
+    """
+    sections: List[Dict[str, Any]] = []
+    for block in blocks:
+        level = HEADING_LEVELS.get(block["type"])
+        if level and block.get("text") or not sections:
+            sections.append({"title": block.get("text", "") if level else "", "level": level or 0, "blocks": []})
+        elif len(sections[-1]["blocks"]) >= max_blocks:
+            previous = sections[-1]
+            title = previous["title"] or "처음"
+            if not title.endswith(" (계속)"):
+                title += " (계속)"
+            sections.append({"title": title, "level": previous["level"], "blocks": []})
+        sections[-1]["blocks"].append(block)
+    return sections
+
+# HTML 문서 한 조각의 최대 길이 (최상위 블록 경계에서 자름)
+HTML_CHUNK_CHARS = 60000
+HTML_HEADING_TAGS = {"heading_1": "h2", "heading_2": "h3", "heading_3": "h4"}
+HTML_LIST_TAGS = {"bulleted_list_item": "ul", "numbered_list_item": "ol", "to_do": "ul"}
+
+def _html_text(text: str) -> str:
+    # 문서 안에 빈 줄이 생기면 마크다운이 HTML 블록을 끝내 버리므로 줄바꿈은 태그/엔티티로 바꿈
+    return html.escape(text).replace("\n", "<br>")
+
+def _html_units(blocks: List[Dict[str, Any]]) -> Iterator[str]:
+    """형제 블록을 HTML 조각으로 하나씩. 이어지는 같은 종류의 목록 항목은 하나의 <ul>/<ol> 로 묶습니다."""
+    i = 0
+    while i < len(blocks):
+        block_type = blocks[i]["type"]
+        if block_type not in HTML_LIST_TAGS:
+            out: List[str] = []
+            _html_block(blocks[i], out)
+            yield "".join(out)
+            i += 1
+            continue
+        j = i
+        while j < len(blocks) and blocks[j]["type"] == block_type:
+            j += 1
+        items: List[str] = []
+        for item in blocks[i:j]:
+            _html_block(item, items)
+        tag = HTML_LIST_TAGS[block_type]
+        style = ' style="list-style:none;padding-left:1em"' if block_type == "to_do" else ""
+        yield f"<{tag}{style}>" + "".join(items) + f"</{tag}>"
+        i = j
+
+def _html_blocks(blocks: List[Dict[str, Any]], out: List[str]) -> None:
+    out.extend(_html_units(blocks))
+
+def _html_block(block: Dict[str, Any], out: List[str]) -> None:
+    block_type = block["type"]
+    text = _html_text(block.get("text", ""))
+    children = block.get("children", [])
+    nested = True
+
+    if block_type in HTML_HEADING_TAGS:
+        tag = HTML_HEADING_TAGS[block_type]
+        out.append(f"<{tag}>{text}</{tag}>")
+    elif block_type in HTML_LIST_TAGS:
+        mark = ("☑ " if block.get("checked") else "☐ ") if block_type == "to_do" else ""
+        out.append(f"<li>{mark}{text}")
+        _html_blocks(children, out)
+        if block.get("collapsed"):
+            out.append("<p>…</p>")
+        out.append("</li>")
+        return
+    elif block_type == "toggle":
+        out.append(f"<details><summary>{text}</summary>")
+        _html_blocks(children, out)
+        if block.get("collapsed"):
+            out.append("<p>…</p>")
+        out.append("</details>")
+        return
+    elif block_type in ("quote", "callout"):
+        out.append(f"<blockquote>{text}")
+        _html_blocks(children, out)
+        if block.get("collapsed"):
+            out.append("<p>…</p>")
+        out.append("</blockquote>")
+        return
+    elif block_type == "code":
+        language = html.escape(block.get("language", ""))
+        code = html.escape(block.get("text", "")).replace("\n", "&#10;")
+        out.append(f'<pre><code class="language-{language}">{code}</code></pre>')
+    elif block_type == "image":
+        caption = _html_text(block.get("caption", ""))
+        if block.get("url"):
+            out.append(f'<figure><img src="{html.escape(block["url"])}" loading="lazy" style="max-width:100%">'
+                       f"{'<figcaption>' + caption + '</figcaption>' if caption else ''}</figure>")
+    elif block_type == "child_page":
+        href = html.escape(block.get("url") or "")
+        out.append(f'<p>📄 <a href="{href}">{text or "제목 없음"}</a></p>' if href else f"<p>📄 {text}</p>")
+    elif block_type == "divider":
+        out.append("<hr>")
+    elif block_type == "table":
+        rows = [child.get("cells") or [child.get("text", "")] for child in children if child["type"] == "table_row"]
+        out.append("<table>")
+        for i, row in enumerate(rows):
+            cell = "th" if i == 0 else "td"
+            out.append("<tr>" + "".join(f"<{cell}>{_html_text(value)}</{cell}>" for value in row) + "</tr>")
+        out.append("</table>")
+        nested = False
+    elif block_type in LINK_TYPES and block.get("url"):
+        url = html.escape(block["url"])
+        out.append(f'<p><a href="{url}">{_html_text(block.get("caption", "")) or url}</a></p>')
+    elif text:
+        out.append(f"<p>{text}</p>")
+
+    if nested and children:
+        out.append('<div style="margin-left:1.5em">')
+        _html_blocks(children, out)
+        out.append("</div>")
+    if block.get("collapsed"):
+        out.append("<p>…</p>")
+
+def render_html(tree: List[Dict[str, Any]], chunk_chars: int = HTML_CHUNK_CHARS) -> List[Tuple[str, Any]]:
+    """
+    트리 전체를 한 번에 HTML 로 바꿉니다.
+
+    최상위 이미지 블록은 뷰어가 로컬 썸네일로 보여 줄 수 있도록 따로 떼고,
+    나머지는 chunk_chars 를 넘지 않게 최상위 블록 경계에서 나눈 문서로 만듭니다.
+    (토글 안의 이미지는 문서 안에 <img> 로 들어감)
+
+    Returns:
+        ("html", 문서) 또는 ("image", {"id", "url", "caption"}) 목록, 문서 순서
+    """
+    segments: List[Tuple[str, Any]] = []
+    parts: List[str] = []
+    size = 0
+
+    def flush() -> None:
+        nonlocal parts, size
+        if parts:
+            segments.append(("html", '<div class="notion-page">' + "".join(parts) + "</div>"))
+        parts, size = [], 0
+
+    run: List[Dict[str, Any]] = []
+    for block in tree + [None]:
+        if block is not None and block["type"] != "image":
+            run.append(block)
+            continue
+        # 최상위 이미지 사이의 블록들
+        for unit in _html_units(run):
+            if size and size + len(unit) > chunk_chars:
+                flush()
+            parts.append(unit)
+            size += len(unit)
+        run = []
+        if block is not None:
+            flush()
+            segments.append(("image", {"id": block["id"], "url": block.get("url", ""), "caption": block.get("caption", "")}))
+    flush()
+    return segments
@@ -0,0 +1,291 @@
+"""
+리포트 쓰기 (내용 해시 + 로컬 기록)
+
+같은 페이지에 같은 제목의 리포트를 쓸 때마다 내용 해시와 블록별 해시, 블록 ID 를
+로컬 SQLite 기록(ledger)에 남깁니다.
+
+- 내용이 같으면 Notion 을 호출하지 않고 건너뜁니다.
+- 내용이 바뀌었으면 블록 해시 목록을 비교해 달라진 블록만 update / delete 하고,
+  새 블록은 앞 블록 뒤에 append(after=...) 합니다.
+- 쓰기가 중간에 실패하면 그때까지 추가된 블록만 기록하므로, 다시 호출하면 남은 블록만 추가됩니다.
+- 기록된 블록을 사용자가 직접 지웠으면(404, archived) 남은 이전 블록을 지우고 리포트를 새로 붙입니다.
+"""
+import difflib
+import hashlib
+import json
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import notion_cache
+import notion_markdown
+import notion_tree
+import notion_writer
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[logging.StreamHandler(sys.stderr)]
+)
+logger = logging.getLogger("notion-report")
+
+# 블록 내용만 바꿀 수 있는 종류 (나머지는 지우고 다시 추가)
+UPDATABLE_TYPES = [
+    "paragraph", "heading_1", "heading_2", "heading_3", "bulleted_list_item", "numbered_list_item",
+    "to_do", "toggle", "quote", "code",
+]
+
+def content_hash(title: str, content: str) -> str:
+    return hashlib.sha256(json.dumps([title, content], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def block_hash(block: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(block, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+def report_blocks(title: str, content: str) -> List[Dict[str, Any]]:
+    """제목 블록 + 마크다운 내용 블록"""
+    return notion_writer.text_block("heading_2", title) + notion_markdown.convert(content)
+
+class ReportLedger:
+    """
+    (page_id, 제목) 별로 마지막으로 쓴 리포트의 해시와 블록 ID 를 저장합니다.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS reports (
+                page_id TEXT NOT NULL,
+                report_key TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                block_ids TEXT NOT NULL,
+                block_hashes TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (page_id, report_key)
+            )
+        """)
+        # 예전에는 받은 그대로(URL, 하이픈 없는 ID)를 키로 썼으므로 한 형식으로 맞춤
+        for (page_id,) in self.conn.execute("SELECT DISTINCT page_id FROM reports").fetchall():
+            if notion_tree.parse_id(page_id) != page_id:
+                self.conn.execute("UPDATE OR REPLACE reports SET page_id = ? WHERE page_id = ?", (notion_tree.parse_id(page_id), page_id))
+        self.conn.commit()
+
+    def get(self, page_id: str, report_key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT content_hash, block_ids, block_hashes FROM reports WHERE page_id = ? AND report_key = ?",
+                (page_id, report_key)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"content_hash": row[0], "block_ids": json.loads(row[1]), "block_hashes": json.loads(row[2])}
+
+    def put(self, page_id: str, report_key: str, content_hash: str, block_ids: List[str], block_hashes: List[str]) -> None:
+        with self.lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO reports (page_id, report_key, content_hash, block_ids, block_hashes, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (page_id, report_key, content_hash, json.dumps(block_ids), json.dumps(block_hashes), time.time()))
+            self.conn.commit()
+
+_ledger: Optional[ReportLedger] = None
+_ledger_lock = threading.Lock()
+
+def get_ledger() -> ReportLedger:
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = ReportLedger(notion_cache.data_path("notion_reports.sqlite"))
+        return _ledger
+
+class ReportWriteError(RuntimeError):
+    """블록 추가 실패 (HTTP 상태를 함께 보관)"""
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+def _can_update(block: Dict[str, Any]) -> bool:
+    return block["type"] in UPDATABLE_TYPES and not block[block["type"]].get("children")
+
+def _is_missing(e: Exception) -> bool:
+    """블록이 없거나 휴지통에 있어 거절된 오류인지"""
+    status = getattr(e, "status", None)
+    return status == 404 or (status == 400 and "archived" in str(e).lower())
+
+def _skipped_block_ids(notion, page_id: str, count: int, first_new_id: Optional[str]) -> Optional[List[str]]:
+    """
+    기록 없이 이어 쓸 때 이전 시도에서 이미 추가된 블록 count 개의 ID.
+    이번에 추가한 첫 블록(없으면 페이지 끝) 바로 앞의 형제 블록들입니다. 찾지 못하면 None.
+    """
+    try:
+        ids = [block["id"] for block in notion_tree.list_children(notion, page_id)]
+    except Exception as e:
+        logger.warning(f"이미 추가된 블록 ID 조회 실패: {e}")
+        return None
+    end = ids.index(first_new_id) if first_new_id in ids else len(ids)
+    if end < count:
+        return None
+    return ids[end - count:end]
+
+def write_report(notion, page_id: str, title: str, content: str, skip_blocks: int = 0) -> Dict[str, Any]:
+    """
+    리포트를 페이지에 씁니다. 같은 내용이면 건너뛰고, 바뀐 내용이면 달라진 블록만 고칩니다.
+
+    Args:
+        skip_blocks: 기록이 없을 때 이미 추가된 블록 수 (기록이 있으면 무시)
+
+    Returns:
+        status(skipped/created/patched/rewritten), appended/updated/deleted 개수, block_ids, error
+    """
+    ledger = get_ledger()
+    page_id = notion_tree.parse_id(page_id)
+    report_key = title.strip()
+    new_hash = content_hash(title, content)
+    entry = ledger.get(page_id, report_key)
+
+    if entry and entry["content_hash"] == new_hash:
+        logger.info(f"같은 리포트가 이미 저장되어 있어 건너뜀: {report_key}")
+        return {"status": "skipped", "appended": 0, "updated": 0, "deleted": 0, "block_ids": entry["block_ids"], "error": ""}
+
+    blocks = report_blocks(title, content)
+    hashes = [block_hash(block) for block in blocks]
+
+    if entry is None:
+        result = notion_writer.append_blocks(notion, page_id, blocks, skip_blocks=skip_blocks)
+        block_ids = result["appended_block_ids"]
+        # 기록에는 이전 시도에서 추가된 앞 블록까지 넣어야 다음 수정이 그 블록들을 맨 끝에 다시 붙이지 않음
+        skipped_ids = _skipped_block_ids(notion, page_id, skip_blocks, block_ids[0] if block_ids else None) if skip_blocks else []
+        if skipped_ids is None:
+            logger.warning(f"이미 추가된 블록 {skip_blocks}개를 찾지 못해 리포트 기록을 남기지 않음: {report_key}")
+        else:
+            written = hashes[:skip_blocks + len(block_ids)]
+            # 실패하면 해시를 비워 두어 다음 호출이 나머지를 이어서 쓰게 함
+            ledger.put(page_id, report_key, "" if result["error"] else new_hash, skipped_ids + block_ids, written)
+        return {
+            "status": "created",
+            "appended": len(block_ids),
+            "updated": 0,
+            "deleted": 0,
+            "block_ids": block_ids,
+            "error": result["error"],
+        }
+
+    return _patch_report(notion, ledger, page_id, report_key, new_hash, entry, blocks, hashes)
+
+def _patch_report(notion, ledger: ReportLedger, page_id: str, report_key: str, new_hash: str,
+                  entry: Dict[str, Any], blocks: List[Dict[str, Any]], hashes: List[str]) -> Dict[str, Any]:
+    """
+    이전 블록 해시 목록과 새 목록을 비교해 바뀐 블록만 update / delete / append(after) 합니다.
+    """
+    old_ids = entry["block_ids"]
+    old_hashes = entry["block_hashes"]
+    new_ids: List[str] = []
+    new_hashes: List[str] = []
+    counts = {"appended": 0, "updated": 0, "deleted": 0}
+    error = ""
+
+    def insert(new_blocks: List[Dict[str, Any]], new_block_hashes: List[str]) -> None:
+        after = new_ids[-1] if new_ids else None
+        if after is None:
+            # 첫 블록 앞에는 끼워 넣을 수 없으므로 맨 끝에 붙임 (제목 블록이 같으면 생기지 않음)
+            result = notion_writer.append_blocks(notion, page_id, new_blocks)
+        else:
+            result = notion_writer.append_blocks(notion, page_id, new_blocks, after=after)
+        new_ids.extend(result["appended_block_ids"])
+        new_hashes.extend(new_block_hashes[:len(result["appended_block_ids"])])
+        counts["appended"] += len(result["appended_block_ids"])
+        if result["error"]:
+            raise ReportWriteError(result["error"], result["error_status"])
+
+    # 현재 처리 중인 구간에서 아직 지우거나 고치지 않은 이전 블록 위치 (실패 시 기록에 남김)
+    unprocessed: List[int] = []
+
+    def delete(positions: List[int]) -> None:
+        for position in positions:
+            try:
+                notion.blocks.delete(block_id=old_ids[position])
+                counts["deleted"] += 1
+            except Exception as e:
+                # 사용자가 이미 지운 블록이면 지운 것으로 봄
+                if not _is_missing(e):
+                    raise
+                logger.info(f"이미 지워진 블록: {old_ids[position]}")
+            unprocessed.remove(position)
+
+    matcher = difflib.SequenceMatcher(a=old_hashes, b=hashes, autojunk=False)
+    opcodes = matcher.get_opcodes()
+    index = 0
+    try:
+        for index, (tag, i1, i2, j1, j2) in enumerate(opcodes):
+            unprocessed[:] = range(i1, i2)
+            if tag == "equal":
+                new_ids.extend(old_ids[i1:i2])
+                new_hashes.extend(old_hashes[i1:i2])
+                unprocessed.clear()
+
+            elif tag == "delete":
+                delete(list(range(i1, i2)))
+
+            elif tag == "insert":
+                insert(blocks[j1:j2], hashes[j1:j2])
+
+            else:  # replace: 짝이 맞는 블록은 제자리에서 고치고 나머지는 지우거나 추가
+                paired = min(i2 - i1, j2 - j1)
+                for k in range(paired):
+                    block = blocks[j1 + k]
+                    if _can_update(block):
+                        try:
+                            notion.blocks.update(block_id=old_ids[i1 + k], **{block["type"]: block[block["type"]]})
+                            new_ids.append(old_ids[i1 + k])
+                            new_hashes.append(hashes[j1 + k])
+                            unprocessed.remove(i1 + k)
+                            counts["updated"] += 1
+                            continue
+                        except Exception as e:
+                            # 종류가 바뀐 블록은 update 가 거절되므로 지우고 다시 추가
+                            logger.info(f"블록 수정 불가, 다시 추가: {old_ids[i1 + k]} ({e})")
+                    delete([i1 + k])
+                    insert([block], [hashes[j1 + k]])
+                delete(list(range(i1 + paired, i2)))
+                if j2 - j1 > paired:
+                    insert(blocks[j1 + paired:j2], hashes[j1 + paired:j2])
+    except Exception as e:
+        if _is_missing(e):
+            # 기준 블록(after)이나 고칠 블록이 페이지에서 지워짐: 남은 블록을 지우고 새로 씀
+            logger.info(f"리포트 블록이 페이지에서 지워져 새로 씀: {report_key} ({e})")
+            stale_ids = list(dict.fromkeys(new_ids + old_ids))
+            return _rewrite_report(notion, ledger, page_id, report_key, new_hash, stale_ids, blocks, hashes, counts)
+        error = str(e)
+        logger.error(f"리포트 수정 중 실패: {e}")
+        # 아직 처리하지 못한 이전 블록은 페이지에 그대로 남아 있으므로 기록에 이어 붙임
+        remaining = unprocessed + [i for _, i1, i2, _, _ in opcodes[index + 1:] for i in range(i1, i2)]
+        new_ids.extend(old_ids[i] for i in remaining)
+        new_hashes.extend(old_hashes[i] for i in remaining)
+
+    ledger.put(page_id, report_key, "" if error else new_hash, new_ids, new_hashes)
+    logger.info(f"리포트 수정: {report_key}, {counts}")
+    return dict(status="patched", block_ids=new_ids, error=error, **counts)
+
+def _rewrite_report(notion, ledger: ReportLedger, page_id: str, report_key: str, new_hash: str, stale_ids: List[str],
+                    blocks: List[Dict[str, Any]], hashes: List[str], counts: Dict[str, int]) -> Dict[str, Any]:
+    """
+    기록과 페이지가 어긋났을 때: 남아 있는 이전 리포트 블록을 지우고 전체 블록을 맨 끝에 새로 붙입니다.
+    """
+    for block_id in stale_ids:
+        try:
+            notion.blocks.delete(block_id=block_id)
+            counts["deleted"] += 1
+        except Exception as e:
+            if not _is_missing(e):
+                logger.warning(f"이전 리포트 블록 삭제 실패: {block_id} ({e})")
+
+    result = notion_writer.append_blocks(notion, page_id, blocks)
+    block_ids = result["appended_block_ids"]
+    counts["appended"] += len(block_ids)
+    ledger.put(page_id, report_key, "" if result["error"] else new_hash, block_ids, hashes[:len(block_ids)])
+    logger.info(f"리포트 새로 씀: {report_key}, {counts}")
+    return dict(status="rewritten", block_ids=block_ids, error=result["error"], **counts)
@@ -0,0 +1,245 @@
+"""
+Notion 블록 로컬 전문 검색 인덱스 (SQLite FTS5)
+
+정규화된 블록 트리의 텍스트를 블록 단위로 인덱싱합니다.
+한글/한자/가나는 띄어쓰기와 조사가 붙어 unicode61 토크나이저로는 잘 찾아지지 않으므로
+연속된 글자를 2글자씩 겹쳐 자른 토큰(bigram)으로 인덱싱하고, 검색어도 같은 방식으로 자릅니다.
+("서울에서" -> "서울 울에 에서" 이므로 "서울" 로 찾을 수 있음)
+
+페이지마다 내용 해시를 저장해 두고, 해시가 바뀐 페이지만 다시 인덱싱합니다.
+"""
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import notion_cache
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[logging.StreamHandler(sys.stderr)]
+)
+logger = logging.getLogger("notion-search")
+
+HEADING_TYPES = ["heading_1", "heading_2", "heading_3"]
+SNIPPET_WIDTH = 40
+
+# 한글 음절/자모, CJK 한자, 일본어 가나
+CJK_RUN = re.compile(r"[ᄀ-ᇿ぀-ヿ㄰-㆏㐀-䶿一-鿿가-힣]+")
+TOKEN = re.compile(r"[ᄀ-ᇿ぀-ヿ㄰-㆏㐀-䶿一-鿿가-힣]+|[^\W_]+")
+
+def tokenize(text: str) -> List[str]:
+    """
+    인덱싱/검색용 토큰 목록. CJK 는 bigram, 그 밖의 단어는 소문자 그대로.
+    """
+    tokens = []
+    for match in TOKEN.finditer(text.lower()):
+        word = match.group()
+        if CJK_RUN.fullmatch(word):
+            if len(word) == 1:
+                tokens.append(word)
+            else:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+def _query_terms(query: str) -> List[str]:
+    return [match.group() for match in TOKEN.finditer(query.lower())]
+
+def make_snippet(text: str, query: str, width: int = SNIPPET_WIDTH) -> str:
+    """
+    원문에서 검색어가 처음 나오는 부분을 앞뒤 width 글자와 함께 잘라 **강조** 합니다.
+    """
+    lowered = text.lower()
+    best = None
+    for term in _query_terms(query):
+        position = lowered.find(term)
+        if position >= 0 and (best is None or position < best[0]):
+            best = (position, len(term))
+    if best is None:
+        return text[:width * 2] + ("…" if len(text) > width * 2 else "")
+
+    start, length = best
+    left = max(0, start - width)
+    right = min(len(text), start + length + width)
+    return (
+        ("…" if left > 0 else "")
+        + text[left:start] + "**" + text[start:start + length] + "**" + text[start + length:right]
+        + ("…" if right < len(text) else "")
+    )
+
+def split_pages(root_id: str, tree: List[Dict[str, Any]], root_title: str = "") -> Dict[str, Dict[str, Any]]:
+    """
+    트리를 페이지 단위로 나눕니다. 각 블록은 가장 가까운 상위 페이지에 속하고,
+    직전 제목 블록의 텍스트를 heading 으로 가집니다.
+    """
+    pages = {root_id: {"title": root_title, "blocks": []}}
+
+    def walk(blocks, page_id, heading):
+        for block in blocks:
+            if block["type"] in HEADING_TYPES:
+                heading = block["text"]
+
+            if block["type"] == "child_page":
+                pages[block["id"]] = {"title": block["text"], "blocks": []}
+                pages[page_id]["blocks"].append((block["id"], heading, block["text"]))
+                walk(block["children"], block["id"], "")
+                continue
+
+            text = block["text"] or block["caption"]
+            if text:
+                pages[page_id]["blocks"].append((block["id"], heading, text))
+            if block["children"]:
+                walk(block["children"], page_id, heading)
+
+    walk(tree, root_id, "")
+    return pages
+
+class SearchIndex:
+    """
+    블록 단위 FTS5 인덱스
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS block_fts USING fts5(
+                tokens,
+                block_id UNINDEXED,
+                page_id UNINDEXED,
+                heading UNINDEXED,
+                text UNINDEXED,
+                tokenize = 'unicode61'
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS indexed_pages (
+                page_id TEXT PRIMARY KEY,
+                root_id TEXT NOT NULL,
+                title TEXT,
+                content_hash TEXT NOT NULL,
+                block_count INTEGER NOT NULL,
+                indexed_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def index_tree(self, root_id: str, tree: List[Dict[str, Any]], root_title: str = "",
+                   root_is_page: bool = True) -> Dict[str, int]:
+        """
+        트리를 인덱싱합니다. 내용 해시가 바뀐 페이지만 다시 쓰고, 트리에서 사라진 페이지는 지웁니다.
+
+        Args:
+            root_is_page: False 면 루트(블록 하나의 하위 트리)는 페이지로 인덱싱하지 않고 안쪽 하위 페이지만 인덱싱
+        """
+        pages = split_pages(root_id, tree, root_title)
+        if not root_is_page:
+            del pages[root_id]
+        updated = 0
+        with self.lock:
+            stored = dict(self.conn.execute(
+                "SELECT page_id, content_hash FROM indexed_pages WHERE root_id = ?", (root_id,)
+            ).fetchall())
+
+            now = time.time()
+            for page_id, page in pages.items():
+                content_hash = hashlib.sha1(
+                    json.dumps([page["title"], page["blocks"]], ensure_ascii=False).encode("utf-8")
+                ).hexdigest()
+                if stored.get(page_id) == content_hash:
+                    continue
+
+                self.conn.execute("DELETE FROM block_fts WHERE page_id = ?", (page_id,))
+                self.conn.executemany(
+                    "INSERT INTO block_fts (tokens, block_id, page_id, heading, text) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (" ".join(tokenize(f"{heading} {text}")), block_id, page_id, heading, text)
+                        for block_id, heading, text in page["blocks"]
+                    ]
+                )
+                self.conn.execute("""
+                    INSERT OR REPLACE INTO indexed_pages (page_id, root_id, title, content_hash, block_count, indexed_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (page_id, root_id, page["title"], content_hash, len(page["blocks"]), now))
+                updated += 1
+
+            removed = [page_id for page_id in stored if page_id not in pages]
+            for page_id in removed:
+                self.conn.execute("DELETE FROM block_fts WHERE page_id = ?", (page_id,))
+                self.conn.execute("DELETE FROM indexed_pages WHERE page_id = ?", (page_id,))
+            self.conn.commit()
+
+        if updated or removed:
+            logger.info(f"검색 인덱스 갱신: root={root_id}, 페이지 {updated}개 갱신, {len(removed)}개 삭제")
+        return {"updated_pages": updated, "removed_pages": len(removed)}
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        블록 단위 검색 결과를 bm25 순으로 반환합니다.
+        한 글자 한글/한자 검색어는 bigram 토큰에 없으므로 원문 부분 문자열로 찾습니다. (점수 0)
+        """
+        terms = _query_terms(query)
+        if not terms:
+            return []
+        if any(len(term) == 1 and CJK_RUN.fullmatch(term) for term in terms):
+            condition = " AND ".join(["instr(lower(f.heading || ' ' || f.text), ?) > 0"] * len(terms))
+            with self.lock:
+                rows = self.conn.execute(f"""
+                    SELECT f.block_id, f.page_id, p.title, f.heading, f.text, 0 AS score
+                    FROM block_fts f LEFT JOIN indexed_pages p ON p.page_id = f.page_id
+                    WHERE {condition}
+                    LIMIT ?
+                """, (*terms, limit)).fetchall()
+        else:
+            match = " ".join('"' + token.replace('"', '""') + '"' for token in dict.fromkeys(tokenize(query)))
+            with self.lock:
+                rows = self.conn.execute("""
+                    SELECT f.block_id, f.page_id, p.title, f.heading, f.text, bm25(block_fts) AS score
+                    FROM block_fts f LEFT JOIN indexed_pages p ON p.page_id = f.page_id
+                    WHERE block_fts MATCH ?
+                    ORDER BY score
+                    LIMIT ?
+                """, (match, limit)).fetchall()
+
+        return [
+            {
+                "block_id": block_id,
+                "page_id": page_id,
+                "page_title": page_title or "",
+                "heading": heading,
+                "snippet": make_snippet(text, query),
+                "score": round(-score, 4),
+            }
+            for block_id, page_id, page_title, heading, text, score in rows
+        ]
+
+    def indexed_page_ids(self) -> List[str]:
+        with self.lock:
+            return [row[0] for row in self.conn.execute("SELECT page_id FROM indexed_pages")]
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            pages, blocks = self.conn.execute(
+                "SELECT count(*), coalesce(sum(block_count), 0) FROM indexed_pages"
+            ).fetchone()
+        return {"pages": pages, "blocks": blocks, "path": self.path}
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+def get_index() -> SearchIndex:
+    """프로세스 공용 검색 인덱스"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex(notion_cache.data_path("notion_search.sqlite"))
+        return _index
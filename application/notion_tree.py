@@ -0,0 +1,479 @@
+"""
+Notion 블록 트리 수집기
+
+blocks.children.list 의 next_cursor 를 끝까지 따라가며 모든 자식 블록을 가져오고,
+형제 서브트리는 제한된 워커 풀에서 동시에 확장합니다.
+따라서 전체 수집 시간은 블록 수가 아니라 트리 깊이에 비례합니다.
+
+수집한 트리는 정규화된 형태로 잠시 보관되며, 블록/이미지/하위 페이지 목록은
+모두 이 트리에서 메모리 안에서 계산합니다.
+"""
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import notion_cache
+import notion_mirror
+import notion_search
+from notion_model import Block
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[logging.StreamHandler(sys.stderr)]
+)
+logger = logging.getLogger("notion-tree")
+
+# blocks.children.list 한 번에 받을 수 있는 최대 블록 수
+PAGE_SIZE = 100
+MAX_WORKERS = int(os.getenv("NOTION_MAX_WORKERS", "8"))
+# 같은 루트의 트리를 다시 크롤링하지 않고 재사용하는 시간(초)
+TREE_TTL = float(os.getenv("NOTION_TREE_TTL", "30"))
+# 여러 루트를 한꺼번에 가져올 때 동시에 크롤링하는 루트 수 (API 호출 간격은 공유 클라이언트가 맞춤)
+MAX_ROOTS = int(os.getenv("NOTION_MAX_ROOTS", "4"))
+
+HEADING_TYPES = ["heading_1", "heading_2", "heading_3"]
+
+TEXT_BLOCK_TYPES = ["paragraph", "heading_1", "heading_2", "heading_3", "bulleted_list_item", "numbered_list_item", "toggle", "quote", "to_do", "callout"]
+
+# url 만 가지는 블록
+LINK_BLOCK_TYPES = ["bookmark", "embed", "link_preview", "video", "file", "pdf", "audio"]
+
+def list_children(notion, block_id: str) -> List[Dict[str, Any]]:
+    """
+    블록의 자식 블록을 next_cursor 를 따라가며 모두 가져옵니다.
+    """
+    results = []
+    cursor = None
+    while True:
+        kwargs = {"block_id": block_id, "page_size": PAGE_SIZE}
+        if cursor:
+            kwargs["start_cursor"] = cursor
+
+        response = notion.blocks.children.list(**kwargs)
+        results.extend(response.get("results", []))
+
+        cursor = response.get("next_cursor")
+        if not response.get("has_more") or not cursor:
+            break
+    return results
+
+def fetch_block_tree(notion, root_id: str, max_workers: int = MAX_WORKERS, cache=None,
+                     max_depth: int = 0, root_children: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    root_id 아래의 전체 블록 트리를 가져옵니다.
+
+    하위 블록이 있는 블록은 자식 목록이 도착하는 즉시 워커 풀에 제출되므로
+    형제 서브트리들이 동시에 확장됩니다.
+    cache 가 주어지면 last_edited_time 이 그대로인 서브트리는 캐시에서 꺼내 쓰고,
+    새로 가져온 자식 목록은 캐시에 저장합니다.
+
+    Args:
+        max_depth: 가져올 깊이 (0이면 끝까지, 1이면 root 의 자식만)
+        root_children: 이미 가져온 root 의 자식 목록 (페이지 단위 조회용, 캐시에 root 로 저장하지 않음)
+
+    Returns:
+        정규화된 블록 목록 (각 블록의 "children" 에 자식 블록 목록이 붙음)
+    """
+    request_count = 0
+    cache_hits = 0
+
+    # depth 는 children 이 놓인 깊이 (root 의 자식이 1). 그 깊이가 max_depth 보다 얕을 때만 아래를 가져옴
+    def expand(children: List[Dict[str, Any]], depth: int) -> None:
+        nonlocal cache_hits
+        if max_depth and depth >= max_depth:
+            return
+        # 캐시 비교는 새 last_edited_time 을 저장하기 전에 해야 합니다
+        for child in children:
+            if not child["has_children"]:
+                continue
+            cached = cache.get_children(child["id"], child["last_edited_time"]) if cache else None
+            if cached is not None:
+                child["children"] = cached
+                cache_hits += 1
+            else:
+                pending[pool.submit(list_children, notion, child["id"])] = (child, depth + 1)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending: Dict[Any, Any] = {}
+        if root_children is None:
+            pending[pool.submit(list_children, notion, root_id)] = (None, 1)
+        else:
+            expand(root_children, 1)
+
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    parent, depth = pending.pop(future)
+                    children = [normalize_block(block) for block in future.result()]
+                    request_count += 1
+
+                    if parent is None:
+                        root_children = children
+                    else:
+                        parent["children"] = children
+
+                    expand(children, depth)
+
+                    if cache:
+                        if parent is None:
+                            cache.put_children(root_id, None, children)
+                        else:
+                            cache.put_children(parent["id"], parent["last_edited_time"], children)
+        except Exception:
+            for future in pending:
+                future.cancel()
+            raise
+
+    if cache:
+        cache.evict()
+    logger.info(f"블록 트리 수집 완료: root={root_id}, 부모 블록 {request_count}개 조회, 캐시 서브트리 {cache_hits}개 재사용")
+    return limit_depth(root_children or [], max_depth)
+
+def limit_depth(tree: List[Block], max_depth: int, depth: int = 1) -> List[Block]:
+    """
+    max_depth 아래를 잘라낸 사본을 반환합니다. 잘린 블록은 children 이 비고 "collapsed": true 가 붙습니다.
+    """
+    if not max_depth:
+        return tree
+
+    limited = []
+    for block in tree:
+        if depth >= max_depth:
+            if block.has_children:
+                block = block.copy(children=[], collapsed=True)
+        elif block.children:
+            block = block.copy(children=limit_depth(block.children, max_depth, depth + 1))
+        limited.append(block)
+    return limited
+
+def _peek_tree(root_id: str) -> Optional[List[Dict[str, Any]]]:
+    """크롤링 없이 쓸 수 있는 트리 (미러 또는 TTL 안의 트리)"""
+    store = notion_mirror.get_store()
+    if store:
+        mirrored = store.get_tree(root_id)
+        if mirrored is not None:
+            return mirrored
+    cached = _tree_cache.get(root_id)
+    if cached and time.monotonic() - cached[0] < TREE_TTL:
+        return cached[1]
+    return None
+
+def get_block_page(notion, root_id: str, max_depth: int = 0, page_size: int = 0, cursor: str = "") -> Dict[str, Any]:
+    """
+    root_id 의 자식 블록을 page_size 개씩, max_depth 깊이까지 가져옵니다.
+
+    Notion 의 next_cursor 는 다음 블록의 ID 이므로 미러/보관 트리에서 잘라낼 때도
+    같은 커서를 씁니다. 보관 트리가 없으면 해당 페이지의 블록과 그 아래 max_depth 까지만 가져옵니다.
+
+    Returns:
+        {"blocks": [...], "next_cursor": str 또는 None, "has_more": bool}
+    """
+    page_size = min(page_size, PAGE_SIZE) if page_size > 0 else 0
+    tree = _peek_tree(root_id)
+
+    if tree is not None:
+        start = 0
+        if cursor:
+            start = next((i for i, block in enumerate(tree) if block["id"] == cursor), len(tree))
+        end = start + page_size if page_size else len(tree)
+        return {
+            "blocks": limit_depth(tree[start:end], max_depth),
+            "next_cursor": tree[end]["id"] if end < len(tree) else None,
+            "has_more": end < len(tree),
+        }
+
+    if not page_size and not cursor:
+        if not max_depth:
+            return {"blocks": get_tree(notion, root_id), "next_cursor": None, "has_more": False}
+        blocks = fetch_block_tree(notion, root_id, cache=notion_cache.get_cache(), max_depth=max_depth)
+        return {"blocks": blocks, "next_cursor": None, "has_more": False}
+
+    kwargs = {"block_id": root_id, "page_size": page_size or PAGE_SIZE}
+    if cursor:
+        kwargs["start_cursor"] = cursor
+    response = notion.blocks.children.list(**kwargs)
+    children = [normalize_block(block) for block in response.get("results", [])]
+    blocks = fetch_block_tree(notion, root_id, cache=notion_cache.get_cache(), max_depth=max_depth, root_children=children)
+    return {
+        "blocks": blocks,
+        "next_cursor": response.get("next_cursor") if response.get("has_more") else None,
+        "has_more": bool(response.get("has_more")),
+    }
+
+NOTION_ID = re.compile(r"([0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12})", re.IGNORECASE)
+
+def parse_id(value: str) -> str:
+    """
+    페이지/블록 ID 또는 Notion URL 에서 ID 를 꺼내 API 와 같은 형식(하이픈 있는 소문자 UUID)으로 바꿉니다.
+    (URL 은 마지막 ID, 블록 앵커 #... 가 있으면 그 블록. ID 가 없으면 그대로)
+    URL, 하이픈 없는 ID, API 응답의 ID 중 무엇으로 받아도 캐시/원장/대기열/미러 키가 같아집니다.
+    """
+    value = (value or "").strip()
+    path, _, anchor = value.partition("#")
+    found = [anchor] if NOTION_ID.fullmatch(anchor) else NOTION_ID.findall(path.split("?", 1)[0])
+    if not found:
+        return value
+    raw = found[-1].replace("-", "").lower()
+    return f"{raw[:8]}-{raw[8:12]}-{raw[12:16]}-{raw[16:20]}-{raw[20:]}"
+
+def parse_ids(values: str) -> List[str]:
+    """쉼표/공백/줄바꿈으로 구분된 ID 또는 URL 목록 (중복 제거, 순서 유지)"""
+    return list(dict.fromkeys(parse_id(value) for value in re.split(r"[\s,]+", values) if value.strip()))
+
+def page_url(page_id: str) -> str:
+    """페이지 ID로 Notion 페이지 URL을 만듭니다."""
+    return f"https://www.notion.so/{page_id.replace('-', '')}"
+
+def plain_text(rich_text: List[Dict[str, Any]]) -> str:
+    return "".join([t.get("plain_text", "") for t in rich_text])
+
+def normalize_block(block: Dict[str, Any]) -> Block:
+    """
+    Notion 원본 블록을 뷰어/에이전트용 블록 정보로 변환합니다.
+    자식 블록은 fetch_block_tree 가 "children" 에 채웁니다.
+    """
+    block_type = block["type"]
+    block_data = Block(
+        block["id"],
+        block_type,
+        last_edited_time=block.get("last_edited_time", ""),
+        has_children=block.get("has_children", False),
+    )
+
+    # 텍스트 추출
+    if block_type in TEXT_BLOCK_TYPES:
+        block_data.text = plain_text(block[block_type].get("rich_text", []))
+        if block_type == "to_do":
+            block_data["checked"] = block["to_do"].get("checked", False)
+
+    # 표의 행: 셀별 텍스트
+    elif block_type == "table_row":
+        block_data["cells"] = [plain_text(cell) for cell in block["table_row"].get("cells", [])]
+        block_data.text = " | ".join(block_data["cells"])
+
+    # 북마크/임베드/파일: url 이 바로 있거나 file/external 아래에 있음
+    elif block_type in LINK_BLOCK_TYPES:
+        link_data = block[block_type]
+        block_data.url = link_data.get("url") or link_data.get(link_data.get("type", ""), {}).get("url", "")
+        block_data.caption = plain_text(link_data.get("caption", []))
+
+    # 이미지 처리
+    elif block_type == "image":
+        image_data = block["image"]
+        if image_data["type"] == "file":
+            block_data.url = image_data["file"]["url"]
+        elif image_data["type"] == "external":
+            block_data.url = image_data["external"]["url"]
+
+        block_data.caption = plain_text(image_data.get("caption", []))
+
+    # 코드 처리
+    elif block_type == "code":
+        block_data.text = plain_text(block["code"].get("rich_text", []))
+        block_data["language"] = block["code"].get("language", "")
+
+    # 하위 페이지: 제목은 블록 자체에 들어 있음
+    elif block_type == "child_page":
+        block_data.text = block["child_page"].get("title", "")
+        block_data.url = page_url(block["id"])
+
+    return block_data
+
+_tree_cache: Dict[str, Any] = {}
+_tree_locks: Dict[str, threading.Lock] = {}
+_tree_cache_lock = threading.Lock()
+
+def fill_cache(cache, root_id: str, tree: List[Dict[str, Any]]) -> None:
+    """캐시 없이 가져온 트리를 블록 캐시에 저장합니다."""
+    cache.put_children(root_id, None, tree)
+    for block in tree:
+        if block["has_children"]:
+            fill_cache_block(cache, block)
+    cache.evict()
+
+def fill_cache_block(cache, block: Dict[str, Any]) -> None:
+    cache.put_children(block["id"], block["last_edited_time"], block["children"])
+    for child in block["children"]:
+        if child["has_children"]:
+            fill_cache_block(cache, child)
+
+def get_tree(notion, root_id: str, refresh: bool = False, max_workers: int = MAX_WORKERS) -> List[Dict[str, Any]]:
+    """
+    root_id 아래의 정규화된 블록 트리를 반환합니다.
+
+    로컬 미러에 최신 트리가 있으면 Notion 을 호출하지 않고 바로 반환합니다.
+    그 밖에는 TREE_TTL 동안 같은 트리를 재사용하고, 동시에 같은 루트를 요청하면
+    한 번만 크롤링합니다. 크롤링할 때는 디스크 블록 캐시를 거칩니다.
+
+    Args:
+        max_workers: 크롤링 동시 호출 수 (백그라운드 미리 가져오기는 작게 줌)
+    """
+    root_id = parse_id(root_id)
+    store = notion_mirror.get_store()
+    if store and not refresh:
+        mirrored = store.get_tree(root_id)
+        if mirrored is not None:
+            return mirrored
+
+    with _tree_cache_lock:
+        lock = _tree_locks.setdefault(root_id, threading.Lock())
+
+    with lock:
+        cached = _tree_cache.get(root_id)
+        if cached and not refresh and time.monotonic() - cached[0] < TREE_TTL:
+            return cached[1]
+
+        tree = fetch_block_tree(notion, root_id, max_workers=max_workers, cache=notion_cache.get_cache())
+        _tree_cache[root_id] = (time.monotonic(), tree)
+        index_tree(notion, root_id, tree)
+        return tree
+
+def iter_trees(notion, root_ids: List[str], max_roots: int = MAX_ROOTS) -> Iterator[Tuple[str, Optional[List[Dict[str, Any]]], str]]:
+    """
+    여러 루트의 트리를 동시에 가져와 끝나는 순서대로 (root_id, tree, error) 를 돌려줍니다.
+    각 루트는 get_tree 를 거치므로 미러/TTL 캐시/블록 캐시를 그대로 씁니다.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(max_roots, len(root_ids)))) as pool:
+        futures = {pool.submit(get_tree, notion, root_id): root_id for root_id in root_ids}
+        for future in as_completed(futures):
+            root_id = futures[future]
+            try:
+                yield root_id, future.result(), ""
+            except Exception as e:
+                logger.error(f"트리 가져오기 실패: root={root_id}, {e}")
+                yield root_id, None, str(e)
+
+# 페이지가 아닌 것으로 확인된 루트 (블록 ID 로 가져온 트리)
+_block_roots = set()
+
+def root_page_title(notion, root_id: str) -> Optional[str]:
+    """
+    root_id 가 페이지면 제목, 블록이면 None. 블록은 pages.retrieve 가 400/404 이므로
+    한 번 확인하면 기억해 두고, 페이지는 제목이 바뀔 수 있어 트리를 새로 가져올 때마다 확인합니다.
+    """
+    if root_id in _block_roots:
+        return None
+    try:
+        return page_title(notion.pages.retrieve(page_id=root_id))
+    except Exception as e:
+        if getattr(e, "status", None) in (400, 404):
+            _block_roots.add(root_id)
+        else:
+            logger.error(f"루트 페이지 확인 실패: root={root_id}, {e}")
+        return None
+
+def index_tree(notion, root_id: str, tree: List[Dict[str, Any]], title: Optional[str] = None) -> None:
+    """
+    새로 가져온 트리를 로컬 검색 인덱스에 반영합니다. (바뀐 페이지만)
+    루트가 페이지일 때만 루트를 제목과 함께 페이지로 인덱싱하고, 블록 루트는 안쪽 하위 페이지만 인덱싱합니다.
+
+    Args:
+        title: 루트 페이지 제목 (이미 알면 넘김, None 이면 pages.retrieve 로 확인)
+    """
+    try:
+        if title is None:
+            title = root_page_title(notion, root_id)
+        notion_search.get_index().index_tree(root_id, tree, root_title=title or "", root_is_page=title is not None)
+    except Exception as e:
+        logger.error(f"검색 인덱스 갱신 실패: {e}")
+
+def invalidate_tree(root_id: str) -> None:
+    """보관 중인 트리를 버립니다. (페이지에 내용을 추가한 뒤 호출)"""
+    _tree_cache.pop(parse_id(root_id), None)
+
+def mark_page_written(page_id: str) -> None:
+    """페이지에 내용을 쓴 뒤 보관 중인 트리와 미러를 무효화합니다."""
+    page_id = parse_id(page_id)
+    invalidate_tree(page_id)
+    store = notion_mirror.get_store()
+    if store:
+        store.mark_dirty(page_id)
+
+def project_images(tree: List[Dict[str, Any]], current_title: str = "") -> List[Dict[str, Any]]:
+    """
+    트리에서 이미지 목록을 뽑습니다. 각 이미지에는 직전 제목 블록의 텍스트가 붙습니다.
+    """
+    images = []
+    title = current_title
+
+    for block in tree:
+        # 제목 업데이트
+        if block["type"] in HEADING_TYPES:
+            title = block["text"]
+
+        # 이미지 처리
+        elif block["type"] == "image" and block["url"]:
+            images.append({
+                "block_id": block["id"],
+                "url": block["url"],
+                "caption": block["caption"],
+                "title": title
+            })
+
+        # 하위 블록에서도 이미지 찾기
+        if block["children"]:
+            images.extend(project_images(block["children"], title))
+
+    return images
+
+def project_child_page_blocks(tree: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    트리에서 child_page 블록들을 문서 순서대로 뽑습니다.
+    """
+    child_pages = []
+    for block in tree:
+        if block["type"] == "child_page":
+            child_pages.append(block)
+
+        # 하위 블록에서도 child_page 찾기
+        if block["children"]:
+            child_pages.extend(project_child_page_blocks(block["children"]))
+
+    return child_pages
+
+def page_title(page: Dict[str, Any]) -> str:
+    """pages.retrieve 결과에서 제목 속성을 읽습니다."""
+    for prop_data in page.get("properties", {}).values():
+        if prop_data.get("type") == "title":
+            return plain_text(prop_data["title"])
+    return ""
+
+def project_child_pages(notion, tree: List[Dict[str, Any]], max_workers: int = MAX_WORKERS) -> List[Dict[str, Any]]:
+    """
+    트리에서 하위 페이지 목록(id, title, url, last_edited_time)을 만듭니다.
+
+    제목과 URL은 child_page 블록에서 바로 읽고, 블록에 제목이 없는 페이지만
+    pages.retrieve 를 동시에 호출해 채웁니다.
+    """
+    child_pages = [
+        {"id": block["id"], "title": block["text"], "url": block["url"], "last_edited_time": block["last_edited_time"]}
+        for block in project_child_page_blocks(tree)
+    ]
+
+    missing = [page for page in child_pages if not page["title"]]
+    if missing:
+        def retrieve(page):
+            try:
+                return page, notion.pages.retrieve(page_id=page["id"])
+            except Exception as e:
+                logger.error(f"하위 페이지 정보 가져오기 실패: {e}")
+                return page, None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for page, retrieved in pool.map(retrieve, missing):
+                if retrieved:
+                    page["title"] = page_title(retrieved)
+                    page["url"] = retrieved.get("url", page["url"])
+                    page["last_edited_time"] = retrieved.get("last_edited_time", page["last_edited_time"])
+
+    for page in child_pages:
+        if not page["title"]:
+            page["title"] = "제목 없음"
+    return child_pages
@@ -0,0 +1,158 @@
+"""
+Notion 페이지 쓰기
+
+긴 텍스트를 문장 경계에서 나눠 한도 안의 텍스트 블록으로 만들고 (마크다운 본문은 notion_markdown 이 변환),
+blocks.children.append 한 번에 보낼 수 있는 한도 안에서 묶어 순서대로 보냅니다.
+각 묶음이 성공할 때마다 추가된 블록 ID 를 기록하므로, 중간에 실패해도
+skip_blocks 로 이미 쓴 블록을 건너뛰고 이어서 쓸 수 있습니다.
+"""
+import logging
+import re
+import sys
+from typing import Any, Dict, List, Optional
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[logging.StreamHandler(sys.stderr)]
+)
+logger = logging.getLogger("notion-writer")
+
+# Notion API 한도
+MAX_TEXT_LENGTH = 2000          # rich_text 항목 하나의 글자 수
+MAX_RICH_TEXT_ITEMS = 100       # 블록 하나의 rich_text 항목 수
+MAX_CHILDREN_PER_REQUEST = 100  # append 한 번의 최상위 블록 수
+MAX_BLOCKS_PER_REQUEST = 1000   # append 한 번의 전체 블록 수 (하위 블록 포함)
+
+SENTENCE_END = re.compile(r"(?<=[.!?。！？…])\s+")
+
+def split_text(text: str, limit: int = MAX_TEXT_LENGTH) -> List[str]:
+    """
+    text 를 limit 글자 이하 조각으로 나눕니다.
+    문장 경계에서 먼저 나누고, 문장이 너무 길면 공백에서, 그래도 길면 글자 단위로 자릅니다.
+    """
+    if len(text) <= limit:
+        return [text]
+
+    chunks: List[str] = []
+    current = ""
+    for sentence in _split_keep(text, SENTENCE_END):
+        if len(sentence) > limit:
+            pieces = _split_words(sentence, limit)
+        else:
+            pieces = [sentence]
+
+        for piece in pieces:
+            if len(current) + len(piece) <= limit:
+                current += piece
+            else:
+                if current:
+                    chunks.append(current)
+                current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _split_keep(text: str, pattern: re.Pattern) -> List[str]:
+    """구분자(공백)를 앞 조각 끝에 붙인 채로 나눕니다."""
+    parts = []
+    start = 0
+    for match in pattern.finditer(text):
+        parts.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text):
+        parts.append(text[start:])
+    return parts
+
+def _split_words(sentence: str, limit: int) -> List[str]:
+    pieces = []
+    for word in _split_keep(sentence, re.compile(r"\s+")):
+        while len(word) > limit:
+            pieces.append(word[:limit])
+            word = word[limit:]
+        pieces.append(word)
+    return pieces
+
+def rich_text(text: str) -> List[Dict[str, Any]]:
+    """긴 텍스트는 2000자 이하 rich_text 항목 여러 개로 나눕니다."""
+    return [{"type": "text", "text": {"content": chunk}} for chunk in split_text(text)]
+
+def text_block(block_type: str, text: str) -> List[Dict[str, Any]]:
+    """
+    텍스트 블록을 만듭니다. rich_text 항목이 100개를 넘으면 같은 종류의 블록 여러 개로 나눕니다.
+    """
+    items = rich_text(text)
+    return [
+        {
+            "object": "block",
+            "type": block_type,
+            block_type: {"rich_text": items[i:i + MAX_RICH_TEXT_ITEMS]}
+        }
+        for i in range(0, len(items), MAX_RICH_TEXT_ITEMS)
+    ]
+
+def count_blocks(block: Dict[str, Any]) -> int:
+    """블록과 그 아래 하위 블록 수"""
+    body = block.get(block["type"], {})
+    return 1 + sum(count_blocks(child) for child in body.get("children", []))
+
+def batch_blocks(blocks: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    append 한 번의 한도(최상위 100개, 하위 포함 1000개) 안으로 블록을 묶습니다.
+    """
+    batches: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_count = 0
+    for block in blocks:
+        size = count_blocks(block)
+        if current and (len(current) >= MAX_CHILDREN_PER_REQUEST or current_count + size > MAX_BLOCKS_PER_REQUEST):
+            batches.append(current)
+            current = []
+            current_count = 0
+        current.append(block)
+        current_count += size
+    if current:
+        batches.append(current)
+    return batches
+
+def append_blocks(notion, block_id: str, blocks: List[Dict[str, Any]], skip_blocks: int = 0, after: Optional[str] = None) -> Dict[str, Any]:
+    """
+    blocks 를 묶음 단위로 순서대로 추가합니다.
+
+    Notion 은 append 순서대로 블록을 붙이므로 묶음은 앞 묶음이 끝난 뒤에 보냅니다.
+    (호출 간격은 공유 클라이언트의 속도 제한이 맞춥니다)
+
+    Args:
+        skip_blocks: 이전 시도에서 이미 추가된 최상위 블록 수
+        after: 이 블록 뒤에 끼워 넣음 (비우면 맨 끝)
+
+    Returns:
+        appended_block_ids, appended_count(skip 포함), total, error, error_status(실패한 요청의 HTTP 상태)
+    """
+    remaining = blocks[skip_blocks:]
+    appended_ids: List[str] = []
+    result = {"appended_block_ids": appended_ids, "appended_count": skip_blocks, "total": len(blocks), "error": "", "error_status": None}
+
+    for batch in batch_blocks(remaining):
+        kwargs = {"block_id": block_id, "children": batch}
+        if after:
+            kwargs["after"] = after
+        try:
+            response = notion.blocks.children.append(**kwargs)
+        except Exception as e:
+            result["error"] = str(e)
+            result["error_status"] = getattr(e, "status", None)
+            logger.error(f"블록 추가 실패: {result['appended_count']}/{len(blocks)}개 추가 후 중단 ({e})")
+            return result
+
+        # 응답 results 에는 새로 추가된 최상위 블록이 순서대로 들어 있음
+        # (예전 API 버전은 부모의 자식 목록 전체를 돌려주므로 끝에서 batch 개수만큼만 씀)
+        result_ids = [block["id"] for block in response.get("results", [])]
+        new_ids = result_ids[:len(batch)] if after else result_ids[-len(batch):]
+        appended_ids.extend(new_ids)
+        result["appended_count"] += len(batch)
+        if after and new_ids:
+            after = new_ids[-1]
+
+    logger.info(f"블록 추가 성공: {len(remaining)}개 블록, {len(appended_ids)}개 ID")
+    return result
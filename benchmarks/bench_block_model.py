@@ -0,0 +1,143 @@
+"""
+블록 트리 메모리/직렬화 벤치마크
+
+합성한 10k 블록 트리(Notion API 원본 모양)를 정규화해
+- 예전 dict 블록과 Block(__slots__) 의 메모리 (tracemalloc 최대치, 프로세스 최대 RSS)
+- json.dumps(indent=2) 와 notion_model.dumps(compact/pretty) 의 직렬화 시간과 출력 크기
+를 비교합니다. 메모리는 변형마다 별도 프로세스에서 잽니다.
+
+    python benchmarks/bench_block_model.py [--blocks 10000] [--json]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application"))
+
+import notion_model
+import notion_tree
+
+TYPES = ["paragraph", "heading_2", "bulleted_list_item", "paragraph", "to_do", "image", "code", "toggle"]
+
+def synth_raw_tree(total: int, fanout: int = 4):
+    """원본 블록 total 개를 부모 id -> 자식 목록으로 만듭니다. (절반 정도는 하위 블록을 가짐)"""
+    children = {"root": []}
+    queue = ["root"]
+    count = 0
+    while count < total:
+        parent = queue.pop(0)
+        for i in range(fanout if parent != "root" else 50):
+            if count >= total:
+                break
+            block_type = TYPES[count % len(TYPES)]
+            block_id = str(uuid.UUID(int=count))
+            raw = {
+                "object": "block",
+                "id": block_id,
+                "type": block_type,
+                "has_children": block_type in ("paragraph", "toggle", "bulleted_list_item"),
+                "last_edited_time": "2024-05-01T12:00:00.000Z",
+            }
+            if block_type == "image":
+                raw["image"] = {"type": "external", "external": {"url": f"https://example.com/{count}.png"}, "caption": []}
+            else:
+                raw[block_type] = {"rich_text": [{"plain_text": f"서울 여행 {count}일차 일정과 메모 text {count}"}]}
+            children.setdefault(parent, []).append(raw)
+            if raw["has_children"]:
+                queue.append(block_id)
+            count += 1
+    return children
+
+def build(children, parent, as_dict: bool):
+    tree = []
+    for raw in children.get(parent, []):
+        block = notion_tree.normalize_block(raw)
+        block.children = build(children, raw["id"], as_dict)
+        if as_dict:
+            # 예전 표현: 모든 필드를 가진 dict
+            block = {**{key: block[key] for key in block.keys()}}
+        tree.append(block)
+    return tree
+
+def measure_memory(variant: str, total: int) -> dict:
+    raw = synth_raw_tree(total)
+    tracemalloc.start()
+    tree = build(raw, "root", as_dict=(variant == "dict"))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss //= 1024
+    assert tree
+    return {"variant": variant, "tree_peak_kb": peak // 1024, "max_rss_kb": rss}
+
+def timed(fn, repeat: int = 5):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 2), len(out.encode("utf-8"))
+
+def measure_serialization(total: int) -> list:
+    raw = synth_raw_tree(total)
+    dict_tree = build(raw, "root", as_dict=True)
+    block_tree = build(raw, "root", as_dict=False)
+    cases = [
+        ("json indent=2 (dict)", lambda: json.dumps(dict_tree, ensure_ascii=False, indent=2)),
+        ("notion_model compact (Block)", lambda: notion_model.dumps(block_tree, pretty=False)),
+        ("notion_model pretty (Block)", lambda: notion_model.dumps(block_tree, pretty=True)),
+    ]
+    results = []
+    for name, fn in cases:
+        ms, size = timed(fn)
+        results.append({"case": name, "ms": ms, "bytes": size})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="블록 트리 메모리/직렬화 벤치마크")
+    parser.add_argument("--blocks", type=int, default=10000)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON 한 줄로 출력")
+    parser.add_argument("--variant", choices=["dict", "block"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(measure_memory(args.variant, args.blocks)))
+        return
+
+    memory = []
+    for variant in ["dict", "block"]:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--variant", variant, "--blocks", str(args.blocks)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        memory.append(json.loads(out.strip().splitlines()[-1]))
+    serialization = measure_serialization(args.blocks)
+
+    report = {
+        "blocks": args.blocks,
+        "orjson": notion_model.orjson is not None,
+        "memory": memory,
+        "serialization": serialization,
+    }
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False))
+        return
+
+    print(f"블록 {args.blocks}개, orjson={'사용' if report['orjson'] else '없음'}")
+    print(f"{'표현':<10}{'트리 최대(KB)':>16}{'최대 RSS(KB)':>16}")
+    for row in memory:
+        print(f"{row['variant']:<10}{row['tree_peak_kb']:>16}{row['max_rss_kb']:>16}")
+    print(f"{'직렬화':<32}{'ms':>10}{'bytes':>12}")
+    for row in serialization:
+        print(f"{row['case']:<32}{row['ms']:>10}{row['bytes']:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+MCP 도구 오프라인 벤치마크
+
+fake_notion_server.py 를 별도 프로세스로 띄우고 NOTION_BASE_URL 로 가리킨 뒤
+mcp_server_notion 의 도구를 정해진 순서대로 호출해 도구마다
+- 걸린 시간 (ms)
+- Notion API 호출 수 (서버가 받은 요청 수, 경로별), 429 수, 클라이언트 재시도 수
+- 메모리 (tracemalloc 최대 증가량, 프로세스 최대 RSS)
+- 응답 크기
+를 잽니다. 앞 도구가 채운 캐시를 뒤 도구가 쓰므로 (cold)/(warm) 이 순서의 일부입니다.
+데이터 디렉터리는 매번 새 임시 디렉터리라 디스크 캐시도 비어 있는 상태에서 시작합니다.
+
+    python benchmarks/bench_tools.py --blocks 5000 --latency 80 --jitter 40
+    python benchmarks/bench_tools.py --replay tree.json --rate 3 --client-rate 3   # Notion 제한 재현
+    python benchmarks/bench_tools.py --only markdown,changes --json
+
+서버 옵션(--blocks, --latency, --rate, --throttle-every ...)은 fake_notion_server.py serve 와 같습니다.
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(benchmarks_dir)
+sys.path.append(os.path.join(benchmarks_dir, "..", "application"))
+
+import fake_notion_server
+
+def max_rss_kb() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+class FakeServerProcess:
+    """fake_notion_server.py serve 를 빈 포트로 띄우고 첫 줄(주소, 루트 ID)을 읽습니다."""
+    def __init__(self, serve_args: list, verbose: bool = False):
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(benchmarks_dir, "fake_notion_server.py"), "serve", "--port", "0"] + serve_args,
+            stdout=subprocess.PIPE, stderr=None if verbose else subprocess.DEVNULL, text=True,
+        )
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError("가짜 Notion 서버를 시작하지 못했습니다.")
+        self.info = json.loads(line)
+        self.url = self.info["url"]
+
+    def call(self, path: str, body: dict = None) -> dict:
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        request = urllib.request.Request(self.url + path, data=data, method="POST" if data is not None else "GET")
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def stop(self) -> None:
+        self.process.terminate()
+        self.process.wait(timeout=10)
+
+def build_cases(server: FakeServerProcess, tools, workspace: dict) -> list:
+    """(이름, 호출 함수) 목록. 순서대로 실행됩니다."""
+    child_pages = [page_id for page_id in workspace["pages"] if page_id != workspace["root_id"]]
+    database_id = workspace["databases"][0] if workspace["databases"] else ""
+    state = {}
+
+    def changes_base():
+        out = tools.get_notion_changes()
+        state["version"] = json.loads(out).get("version", "")
+        return out
+
+    def changes_after_edit():
+        server.call("/_edit", {"count": 5, "seed": 1})
+        return tools.get_notion_changes(since=state.get("version", ""), refresh=True)
+
+    cases = [
+        ("get_notion_page", lambda: tools.get_notion_page()),
+        ("get_notion_blocks (cold)", lambda: tools.get_notion_blocks()),
+        ("get_notion_blocks (warm)", lambda: tools.get_notion_blocks()),
+        ("get_notion_blocks max_depth=1 page_size=20", lambda: tools.get_notion_blocks(max_depth=1, page_size=20)),
+        ("get_notion_markdown", lambda: tools.get_notion_markdown()),
+        ("get_notion_markdown max_tokens=500", lambda: tools.get_notion_markdown(max_tokens=500)),
+        ("get_child_pages", lambda: tools.get_child_pages()),
+        ("get_notion_images", lambda: tools.get_notion_images()),
+        ("get_notion_images local", lambda: tools.get_notion_images(local=True)),
+        ("get_notion_changes (base)", changes_base),
+        ("get_notion_changes 5 edits refresh", changes_after_edit),
+        ("search_notion_pages", lambda: tools.search_notion_pages("여행")),
+        ("search_notion_blocks", lambda: tools.search_notion_blocks("여행", limit=10)),
+        ("add_to_notion_page", lambda: tools.add_to_notion_page("벤치마크 보고서", "## 요약\n- 첫 줄\n- 둘째 줄\n\n본문")),
+        ("add_to_notion_page (same)", lambda: tools.add_to_notion_page("벤치마크 보고서", "## 요약\n- 첫 줄\n- 둘째 줄\n\n본문")),
+    ]
+    if child_pages:
+        cases.insert(7, ("get_notion_trees (4 child pages)", lambda: tools.get_notion_trees(",".join(child_pages[:4]))))
+    if database_id:
+        cases.append(("query_notion_database limit=100", lambda: tools.query_notion_database(database_id=database_id, limit=100)))
+    return cases
+
+def looks_failed(out: str) -> bool:
+    if "실패" in out[:200] or "설정되지 않았습니다" in out[:200]:
+        return True
+    try:
+        value = json.loads(out)
+    except ValueError:
+        return False
+    return isinstance(value, dict) and bool(value.get("error"))
+
+def run_case(name: str, fn, server: FakeServerProcess, notion_api, trace: bool) -> dict:
+    before_server = server.call("/_stats")
+    before_client = notion_api.get_stats()
+    if trace:
+        tracemalloc.reset_peak()
+        traced_before, _ = tracemalloc.get_traced_memory()
+
+    started = time.perf_counter()
+    try:
+        out = fn()
+        error = looks_failed(out)
+    except Exception as e:
+        out, error = f"{type(e).__name__}: {e}", True
+    elapsed = time.perf_counter() - started
+
+    peak_kb = None
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        peak_kb = (peak - traced_before) // 1024
+    after_server = server.call("/_stats")
+    after_client = notion_api.get_stats()
+
+    by_route = {
+        route: count - before_server["by_route"].get(route, 0)
+        for route, count in after_server["by_route"].items()
+        if count - before_server["by_route"].get(route, 0)
+    }
+    return {
+        "case": name,
+        "ms": round(elapsed * 1000, 1),
+        "calls": sum(count for route, count in by_route.items() if route != "files"),
+        "by_route": by_route,
+        "throttled": after_server["throttled"] - before_server["throttled"],
+        "retries": after_client["retries"] - before_client["retries"],
+        "peak_kb": peak_kb,
+        "max_rss_kb": max_rss_kb(),
+        "out_bytes": len(out.encode("utf-8")),
+        "ok": not error,
+        "error": out[:200] if error else "",
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP 도구 오프라인 벤치마크 (가짜 Notion 서버 사용)")
+    serve_actions = fake_notion_server.add_serve_arguments(parser)
+    group = parser.add_argument_group("클라이언트")
+    group.add_argument("--client-rate", type=float, default=30.0, help="NOTION_RATE_LIMIT (실제 Notion 재현은 3)")
+    group.add_argument("--client-burst", type=int, default=10, help="NOTION_RATE_BURST")
+    group.add_argument("--workers", type=int, default=0, help="NOTION_MAX_WORKERS (0이면 기본값)")
+    group.add_argument("--only", default="", help="이름에 이 문자열(쉼표로 여러 개)이 들어간 도구만 실행")
+    group.add_argument("--no-tracemalloc", action="store_true", help="메모리 추적 끄기 (시간 측정이 더 정확)")
+    group.add_argument("--json", action="store_true", help="결과를 JSON 한 줄로 출력")
+    group.add_argument("--verbose", action="store_true", help="서버/애플리케이션 로그 출력")
+    args = parser.parse_args()
+
+    serve_args = []
+    for action in serve_actions:
+        value = getattr(args, action.dest)
+        if value is not None and value != action.default:
+            serve_args += [action.option_strings[0], str(value)]
+
+    server = FakeServerProcess(serve_args, verbose=args.verbose)
+    data_dir = tempfile.mkdtemp(prefix="notion-bench-")
+    try:
+        workspace = server.call("/_workspace")
+        # 애플리케이션 모듈은 import 할 때 환경 변수를 읽으므로 먼저 설정
+        os.environ.update({
+            "NOTION_BASE_URL": server.url,
+            "NOTION_API_KEY": "fake-benchmark-token",
+            "NOTION_PAGE_ID": workspace["root_id"],
+            "NOTION_DATA_DIR": data_dir,
+            "NOTION_MIRROR_ENABLED": "false",
+            "NOTION_WRITE_BEHIND": "false",
+            "NOTION_RATE_LIMIT": str(args.client_rate),
+            "NOTION_RATE_BURST": str(args.client_burst),
+        })
+        if args.workers:
+            os.environ["NOTION_MAX_WORKERS"] = str(args.workers)
+
+        trace = not args.no_tracemalloc
+        if trace:
+            tracemalloc.start()
+        import mcp_server_notion
+        import notion_api
+        if not args.verbose:
+            logging.disable(logging.INFO)
+
+        cases = build_cases(server, mcp_server_notion, workspace)
+        if args.only:
+            keys = [key.strip() for key in args.only.split(",") if key.strip()]
+            cases = [case for case in cases if any(key in case[0] for key in keys)]
+
+        server.call("/_reset", {})
+        started = time.perf_counter()
+        results = [run_case(name, fn, server, notion_api, trace) for name, fn in cases]
+        total_ms = round((time.perf_counter() - started) * 1000, 1)
+        server_stats = server.call("/_stats")
+    finally:
+        server.stop()
+
+    report = {
+        "workspace": {"blocks": workspace["blocks"], "pages": len(workspace["pages"]), "databases": len(workspace["databases"])},
+        "server": {action.dest: getattr(args, action.dest) for action in serve_actions},
+        "client": {"rate": args.client_rate, "burst": args.client_burst, "workers": args.workers or None},
+        "results": results,
+        "total_ms": total_ms,
+        "total_calls": server_stats["total"],
+        "total_throttled": server_stats["throttled"],
+    }
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False))
+        return
+
+    print(f"블록 {workspace['blocks']}개, 페이지 {len(workspace['pages'])}개, "
+          f"지연 {args.latency}ms(+{args.jitter}), 서버 제한 {args.rate or '-'}/s, 클라이언트 {args.client_rate}/s")
+    print(f"{'도구':<44}{'ms':>10}{'호출':>7}{'429':>6}{'재시도':>7}{'메모리KB':>10}{'RSS KB':>10}{'응답B':>10}")
+    for row in results:
+        peak = "-" if row["peak_kb"] is None else row["peak_kb"]
+        mark = "" if row["ok"] else "  ! " + row["error"][:60]
+        print(f"{row['case']:<44}{row['ms']:>10}{row['calls']:>7}{row['throttled']:>6}{row['retries']:>7}"
+              f"{peak:>10}{row['max_rss_kb']:>10}{row['out_bytes']:>10}{mark}")
+    print(f"합계 {total_ms}ms, Notion 호출 {server_stats['total']}회, 429 {server_stats['throttled']}회")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,783 @@
+"""
+로컬 Notion API 대역 서버 (오프라인 벤치마크용)
+
+실제 워크스페이스 없이 mcp_server_notion.py 의 도구를 돌려 보기 위한 HTTP 서버입니다.
+notion_client 가 부르는 REST 경로(/v1/blocks, /v1/pages, /v1/search, /v1/databases)를
+Notion 과 같은 응답 모양으로 흉내 냅니다.
+
+- 합성 트리: 블록 수, 깊이, fan-out 을 정해 결정적으로 만듭니다. (하위 페이지, 이미지, 데이터베이스 포함)
+- 녹화/재생: record 로 실제 페이지 트리를 JSON 으로 떠 두고 --replay 로 그대로 내보냅니다.
+- 장애 주입: 응답 지연(--latency, --jitter), 초당 요청 제한을 넘으면 429(--rate),
+  N 번째 요청마다 429(--throttle-every), 무작위 503(--error-rate), 페이지 크기 상한(--page-size-cap)
+
+애플리케이션은 NOTION_BASE_URL 로 이 서버를 가리키면 됩니다.
+
+    python benchmarks/fake_notion_server.py serve --blocks 5000 --latency 80 --rate 3
+    NOTION_BASE_URL=http://127.0.0.1:8787 NOTION_API_KEY=fake NOTION_PAGE_ID=<root_id> python application/mcp_server_notion.py
+
+    # 실제 페이지를 녹화해 재생
+    NOTION_API_KEY=secret_xxx python benchmarks/fake_notion_server.py record --page-id <id> --out tree.json
+    python benchmarks/fake_notion_server.py serve --replay tree.json
+
+관리용 경로: GET /_stats (경로별 요청 수, 429/오류 수, 이미지 파일 요청은 files 로 따로 셈),
+POST /_reset (통계 초기화), POST /_edit {"count": n} (블록 n 개 내용 수정, 캐시/미러 무효화 측정용)
+"""
+import argparse
+import json
+import os
+import random
+import struct
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+MAX_PAGE_SIZE = 100
+# 이 Notion-Version 부터 데이터베이스 속성과 조회가 데이터 소스로 옮겨감
+DATA_SOURCE_VERSION = "2025-09-03"
+NAMESPACE = uuid.UUID("6f1c2a52-3d0e-4b8e-9a53-2f7a1d7c9e10")
+EPOCH = "2024-05-01T12:00:00.000Z"
+
+# 합성 트리에서 돌려 쓰는 블록 종류 (하위 블록을 가질 수 있는 것은 NESTABLE)
+TYPES = ["paragraph", "heading_2", "bulleted_list_item", "paragraph", "to_do", "image",
+         "numbered_list_item", "code", "toggle", "quote", "paragraph", "bookmark"]
+NESTABLE = ["paragraph", "bulleted_list_item", "numbered_list_item", "toggle", "quote", "to_do"]
+# 이 간격마다 블록 하나를 하위 페이지로 만듦
+CHILD_PAGE_EVERY = 40
+CITIES = ["서울", "부산", "제주", "강릉", "경주", "전주"]
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+def make_id(name: str) -> str:
+    return str(uuid.uuid5(NAMESPACE, name))
+
+def dashed_id(value: str) -> str:
+    """하이픈 없는 32자리 ID 를 실제 API 처럼 하이픈 있는 형식으로 (ID 가 아니면 그대로)"""
+    try:
+        return str(uuid.UUID(hex=value)) if len(value) == 32 else value
+    except ValueError:
+        return value
+
+def rich_text(text: str) -> List[Dict[str, Any]]:
+    return [{
+        "type": "text",
+        "text": {"content": text, "link": None},
+        "annotations": {"bold": False, "italic": False, "strikethrough": False, "underline": False, "code": False, "color": "default"},
+        "plain_text": text,
+        "href": None,
+    }]
+
+def page_object(page_id: str, title: str, parent: Dict[str, Any], last_edited_time: str = EPOCH,
+                properties: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {
+        "object": "page",
+        "id": page_id,
+        "created_time": EPOCH,
+        "last_edited_time": last_edited_time,
+        "archived": False,
+        "in_trash": False,
+        "parent": parent,
+        "url": f"https://www.notion.so/{page_id.replace('-', '')}",
+        "properties": properties or {"title": {"id": "title", "type": "title", "title": rich_text(title)}},
+    }
+
+def png_bytes(width: int, height: int, seed: int) -> bytes:
+    """표준 라이브러리만으로 만든 그라데이션 PNG (이미지마다 색이 달라 내용 해시가 겹치지 않음)"""
+    r, g, b = (seed * 37) % 256, (seed * 73) % 256, (seed * 151) % 256
+    rows = []
+    for y in range(height):
+        row = bytearray(b"\x00")
+        shade = y * 255 // max(height - 1, 1)
+        for x in range(width):
+            row += bytes(((r + x) % 256, (g + shade) % 256, b))
+        rows.append(bytes(row))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(b"".join(rows), 6)) + chunk(b"IEND", b"")
+
+class Workspace:
+    """
+    서버가 내보내는 데이터. 녹화 파일과 같은 모양입니다.
+
+        root_id, children(부모 id -> 원본 블록 목록), pages(id -> 페이지), databases(id -> {database, rows})
+    """
+    def __init__(self, data: Dict[str, Any]):
+        self.root_id = data["root_id"]
+        self.children: Dict[str, List[Dict[str, Any]]] = data["children"]
+        self.pages: Dict[str, Dict[str, Any]] = data.get("pages", {})
+        self.databases: Dict[str, Dict[str, Any]] = data.get("databases", {})
+        self.lock = threading.Lock()
+        # 데이터 소스 ID -> 데이터베이스 ID (예전 API 로 녹화한 데이터베이스는 같은 ID)
+        self.sources = {entry.get("data_source_id", database_id): database_id for database_id, entry in self.databases.items()}
+        self.blocks: Dict[str, Dict[str, Any]] = {}
+        self.parents: Dict[str, str] = {}
+        for parent, blocks in self.children.items():
+            for block in blocks:
+                self.blocks[block["id"]] = block
+                self.parents[block["id"]] = parent
+
+    @classmethod
+    def load(cls, path: str) -> "Workspace":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def dump(self) -> Dict[str, Any]:
+        return {"root_id": self.root_id, "children": self.children, "pages": self.pages, "databases": self.databases}
+
+    @classmethod
+    def synthetic(cls, blocks: int = 2000, depth: int = 4, fanout: int = 5, top: int = 40,
+                  rows: int = 200, seed: int = 0) -> "Workspace":
+        """
+        블록 blocks 개짜리 결정적 트리를 만듭니다.
+
+        Args:
+            depth: 최대 깊이 (최상위 블록이 1)
+            fanout: 하위 블록을 가진 블록 하나의 자식 수
+            top: 루트(와 하위 페이지) 바로 아래 블록 수
+            rows: 루트에 붙는 데이터베이스의 행 수 (0이면 만들지 않음)
+        """
+        rng = random.Random(seed)
+        root_id = make_id(f"root-{seed}")
+        children: Dict[str, List[Dict[str, Any]]] = {root_id: []}
+        pages = {root_id: page_object(root_id, "벤치마크 루트", {"type": "workspace", "workspace": True})}
+        databases: Dict[str, Dict[str, Any]] = {}
+
+        if rows:
+            database_id = make_id(f"database-{seed}")
+            children[root_id].append({
+                "object": "block", "id": database_id, "type": "child_database",
+                "has_children": False, "last_edited_time": EPOCH, "child_database": {"title": "여행 일정"},
+            })
+            databases[database_id] = cls._synthetic_database(database_id, rows, rng)
+
+        # (부모 id, 깊이) 순서로 너비 우선
+        queue: List[Tuple[str, int]] = [(root_id, 1)]
+        count = 0
+        while queue and count < blocks:
+            parent, level = queue.pop(0)
+            is_page = parent in pages
+            for _ in range(top if is_page else fanout):
+                if count >= blocks:
+                    break
+                block_id = make_id(f"block-{seed}-{count}")
+                if count % CHILD_PAGE_EVERY == CHILD_PAGE_EVERY - 1 and level < depth:
+                    block_type = "child_page"
+                else:
+                    block_type = TYPES[count % len(TYPES)]
+                nested = level < depth and (block_type == "child_page" or (block_type in NESTABLE and rng.random() < 0.5))
+                block = {
+                    "object": "block",
+                    "id": block_id,
+                    "type": block_type,
+                    "has_children": nested,
+                    "last_edited_time": EPOCH,
+                    block_type: cls._synthetic_content(block_type, count),
+                }
+                children.setdefault(parent, []).append(block)
+                if block_type == "child_page":
+                    pages[block_id] = page_object(block_id, block["child_page"]["title"], {"type": "page_id", "page_id": parent})
+                if nested:
+                    children.setdefault(block_id, [])
+                    queue.append((block_id, level + 1))
+                count += 1
+        # 블록 수를 다 채워 자식을 못 받은 블록
+        for siblings in children.values():
+            for block in siblings:
+                if block["has_children"] and not children.get(block["id"]):
+                    block["has_children"] = False
+        return cls({"root_id": root_id, "children": children, "pages": pages, "databases": databases})
+
+    @staticmethod
+    def _synthetic_content(block_type: str, n: int) -> Dict[str, Any]:
+        city = CITIES[n % len(CITIES)]
+        if block_type == "child_page":
+            return {"title": f"{city} 여행 {n}"}
+        if block_type == "image":
+            # 서버 주소는 응답할 때 붙임 (public_block)
+            return {"type": "file", "caption": rich_text(f"{city} 사진 {n}") if n % 3 else [],
+                    "file": {"url": f"/_files/{n}.png", "expiry_time": ""}}
+        if block_type == "bookmark":
+            return {"caption": [], "url": f"https://example.com/{city}/{n}"}
+        content: Dict[str, Any] = {"rich_text": rich_text(f"{city} 여행 {n}일차: 일정과 메모 note {n}"), "color": "default"}
+        if block_type == "to_do":
+            content["checked"] = n % 2 == 0
+        if block_type == "code":
+            content["language"] = "python"
+            content["rich_text"] = rich_text(f"def day_{n}():\n    return '{city}'")
+        return content
+
+    @staticmethod
+    def _synthetic_database(database_id: str, rows: int, rng: random.Random) -> Dict[str, Any]:
+        schema = {
+            "이름": {"id": "title", "type": "title", "title": {}},
+            "도시": {"id": "cty", "type": "select", "select": {"options": [{"name": city} for city in CITIES]}},
+            "날짜": {"id": "dt", "type": "date", "date": {}},
+            "완료": {"id": "dn", "type": "checkbox", "checkbox": {}},
+            "점수": {"id": "sc", "type": "number", "number": {"format": "number"}},
+            "메모": {"id": "mm", "type": "rich_text", "rich_text": {}},
+        }
+        for name, prop in schema.items():
+            prop["name"] = name
+        database = {
+            "object": "database", "id": database_id, "created_time": EPOCH, "last_edited_time": EPOCH,
+            "title": rich_text("여행 일정"), "properties": schema,
+            "url": f"https://www.notion.so/{database_id.replace('-', '')}",
+        }
+        entries = []
+        for n in range(rows):
+            row_id = make_id(f"{database_id}-row-{n}")
+            city = CITIES[n % len(CITIES)]
+            properties = {
+                "이름": {"id": "title", "type": "title", "title": rich_text(f"{city} 일정 {n}")},
+                "도시": {"id": "cty", "type": "select", "select": {"name": city}},
+                "날짜": {"id": "dt", "type": "date", "date": {"start": f"2024-{n % 12 + 1:02d}-{n % 28 + 1:02d}", "end": None}},
+                "완료": {"id": "dn", "type": "checkbox", "checkbox": rng.random() < 0.5},
+                "점수": {"id": "sc", "type": "number", "number": n % 100},
+                "메모": {"id": "mm", "type": "rich_text", "rich_text": rich_text(f"메모 {n}")},
+            }
+            entries.append(page_object(row_id, "", {"type": "database_id", "database_id": database_id}, properties=properties))
+        return {"database": database, "data_source_id": make_id(f"{database_id}-source"), "rows": entries}
+
+    # 변경
+
+    def append(self, parent: str, new_blocks: List[Dict[str, Any]], after: str = "") -> List[Dict[str, Any]]:
+        created = []
+        with self.lock:
+            siblings = self.children.setdefault(parent, [])
+            position = len(siblings)
+            if after:
+                # 실제 API 처럼 없는(지워진) 블록 뒤에는 끼워 넣지 않음
+                position = next((i + 1 for i, block in enumerate(siblings) if block["id"] == after), None)
+                if position is None:
+                    raise KeyError(after)
+            for raw in new_blocks:
+                block_type = raw.get("type") or next(key for key in raw if key not in ("object", "children"))
+                block = {
+                    "object": "block",
+                    "id": str(uuid.uuid4()),
+                    "type": block_type,
+                    "has_children": False,
+                    "last_edited_time": now_iso(),
+                    block_type: raw.get(block_type, {}),
+                }
+                siblings.insert(position, block)
+                position += 1
+                self.blocks[block["id"]] = block
+                self.parents[block["id"]] = parent
+                created.append(block)
+            if parent in self.blocks:
+                self.blocks[parent]["has_children"] = True
+            self._touch(parent)
+        return created
+
+    def update(self, block_id: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+        with self.lock:
+            block = self.blocks[block_id]
+            if block["type"] in changes:
+                block[block["type"]] = changes[block["type"]]
+            block["last_edited_time"] = now_iso()
+            self._touch(self.parents.get(block_id, ""))
+            return block
+
+    def delete(self, block_id: str) -> Dict[str, Any]:
+        with self.lock:
+            block = self.blocks.pop(block_id)
+            parent = self.parents.pop(block_id)
+            self.children[parent] = [sibling for sibling in self.children[parent] if sibling["id"] != block_id]
+            self._touch(parent)
+            return dict(block, archived=True, in_trash=True)
+
+    def edit_random(self, count: int, seed: Optional[int] = None) -> List[str]:
+        """글이 있는 블록 count 개의 텍스트를 바꿉니다."""
+        rng = random.Random(seed)
+        with self.lock:
+            candidates = [block for block in self.blocks.values() if "rich_text" in block.get(block["type"], {})]
+            chosen = rng.sample(candidates, min(count, len(candidates)))
+        for block in chosen:
+            content = dict(block[block["type"]])
+            content["rich_text"] = rich_text(content["rich_text"][0]["plain_text"] + " (수정됨)" if content["rich_text"] else "수정됨")
+            self.update(block["id"], {block["type"]: content})
+        return [block["id"] for block in chosen]
+
+    def _touch(self, block_id: str) -> None:
+        """블록이 속한 페이지들의 last_edited_time 을 갱신합니다. (lock 안에서 호출)"""
+        stamp = now_iso()
+        while block_id:
+            if block_id in self.pages:
+                self.pages[block_id]["last_edited_time"] = stamp
+            if block_id in self.blocks:
+                self.blocks[block_id]["last_edited_time"] = stamp
+            block_id = self.parents.get(block_id, "")
+
+    def count(self) -> int:
+        return len(self.blocks)
+
+class ApiError(Exception):
+    def __init__(self, status: int, code: str, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.headers = headers or {}
+
+def paginate(items: List[Dict[str, Any]], start_cursor: str, page_size: int) -> Dict[str, Any]:
+    """Notion 처럼 다음 항목의 id 를 next_cursor 로 씁니다."""
+    start = 0
+    if start_cursor:
+        start = next((i for i, item in enumerate(items) if item["id"] == start_cursor), None)
+        if start is None:
+            raise ApiError(400, "validation_error", f"start_cursor {start_cursor} 가 올바르지 않습니다.")
+    page = items[start:start + page_size]
+    has_more = start + page_size < len(items)
+    return {
+        "object": "list",
+        "results": page,
+        "next_cursor": items[start + page_size]["id"] if has_more else None,
+        "has_more": has_more,
+    }
+
+def matches(row: Dict[str, Any], condition: Optional[Dict[str, Any]]) -> bool:
+    """자주 쓰는 필터만 평가합니다 (and/or, checkbox/select/number equals, title/rich_text contains). 나머지는 통과"""
+    if not condition:
+        return True
+    if "and" in condition:
+        return all(matches(row, item) for item in condition["and"])
+    if "or" in condition:
+        return any(matches(row, item) for item in condition["or"])
+    prop = row["properties"].get(condition.get("property", ""))
+    if prop is None:
+        return True
+    kind = prop["type"]
+    test = condition.get(kind) or {}
+    value = prop.get(kind)
+    if kind in ("title", "rich_text") and "contains" in test:
+        return test["contains"] in "".join(part["plain_text"] for part in value)
+    if kind == "select" and "equals" in test:
+        return (value or {}).get("name") == test["equals"]
+    if "equals" in test:
+        return value == test["equals"]
+    return True
+
+class FakeNotionServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], workspace: Workspace, latency: float = 0.0, jitter: float = 0.0,
+                 rate: float = 0.0, burst: int = 10, throttle_every: int = 0, retry_after: float = 1.0,
+                 error_rate: float = 0.0, page_size_cap: int = MAX_PAGE_SIZE, image_size: Tuple[int, int] = (320, 240),
+                 verbose: bool = False):
+        super().__init__(address, Handler)
+        self.workspace = workspace
+        self.latency = latency
+        self.jitter = jitter
+        self.rate = rate
+        self.burst = burst
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.page_size_cap = page_size_cap
+        self.image_size = image_size
+        self.verbose = verbose
+        self.stats_lock = threading.Lock()
+        self.images: Dict[str, bytes] = {}
+        self.reset_stats()
+        self.tokens = float(burst)
+        self.tokens_updated = time.monotonic()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset_stats(self) -> None:
+        with self.stats_lock:
+            self.requests: Counter = Counter()
+            self.total = 0
+            self.throttled = 0
+            self.errors = 0
+            self.bytes_out = 0
+            self.started = time.time()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.stats_lock:
+            return {
+                "total": self.total,
+                "throttled": self.throttled,
+                "errors": self.errors,
+                "bytes_out": self.bytes_out,
+                "by_route": dict(self.requests),
+                "seconds": round(time.time() - self.started, 3),
+                "blocks": self.workspace.count(),
+            }
+
+    def admit(self) -> None:
+        """장애 주입. 429/503 이면 ApiError"""
+        with self.stats_lock:
+            self.total += 1
+            number = self.total
+            if self.rate:
+                now = time.monotonic()
+                self.tokens = min(float(self.burst), self.tokens + (now - self.tokens_updated) * self.rate)
+                self.tokens_updated = now
+                if self.tokens < 1:
+                    self.throttled += 1
+                    wait = max((1 - self.tokens) / self.rate, self.retry_after)
+                    raise ApiError(429, "rate_limited", "You have been rate limited. Please try again in a few minutes.",
+                                   {"Retry-After": f"{wait:g}"})
+                self.tokens -= 1
+            if self.throttle_every and number % self.throttle_every == 0:
+                self.throttled += 1
+                raise ApiError(429, "rate_limited", "You have been rate limited. Please try again in a few minutes.",
+                               {"Retry-After": f"{self.retry_after:g}"})
+            if self.error_rate and random.random() < self.error_rate:
+                self.errors += 1
+                raise ApiError(503, "service_unavailable", "Notion is unavailable, please try again later.")
+
+    def delay(self) -> None:
+        seconds = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def image(self, name: str) -> bytes:
+        with self.stats_lock:
+            data = self.images.get(name)
+        if data is None:
+            seed = int("".join(ch for ch in name if ch.isdigit()) or 0)
+            data = png_bytes(self.image_size[0], self.image_size[1], seed)
+            with self.stats_lock:
+                self.images[name] = data
+        return data
+
+    def public_block(self, block: Dict[str, Any]) -> Dict[str, Any]:
+        """합성 이미지 블록의 상대 경로 URL 을 만료 시각이 붙은 서명 URL 모양으로 바꿉니다."""
+        content = block.get(block["type"])
+        if not isinstance(content, dict) or content.get("type") != "file" or not content["file"]["url"].startswith("/_files/"):
+            return block
+        signed = datetime.now(timezone.utc)
+        block = dict(block)
+        block[block["type"]] = dict(content, file={
+            "url": f"{self.url}{content['file']['url']}?X-Amz-Date={signed.strftime('%Y%m%dT%H%M%SZ')}&X-Amz-Expires=3600",
+            "expiry_time": datetime.fromtimestamp(signed.timestamp() + 3600, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        })
+        return block
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeNotionServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            sys.stderr.write("fake-notion | " + format % args + "\n")
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_PATCH(self):
+        self.dispatch("PATCH")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def read_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length).decode("utf-8"))
+
+    def send(self, status: int, body: bytes, content_type: str = "application/json", headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.stats_lock:
+            self.server.bytes_out += len(body)
+
+    def send_json(self, status: int, value: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send(status, json.dumps(value, ensure_ascii=False).encode("utf-8"), headers=headers)
+
+    def dispatch(self, method: str) -> None:
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        query = parse_qs(url.query)
+        try:
+            body = self.read_body()
+            if parts and parts[0] == "_files":
+                with self.server.stats_lock:
+                    self.server.requests["files"] += 1
+                self.send(200, self.server.image(parts[-1]), "image/png")
+                return
+            if parts and parts[0].startswith("_"):
+                self.send_json(200, self.control(method, parts, body))
+                return
+            if not parts or parts[0] != "v1":
+                raise ApiError(404, "invalid_request_url", f"Invalid request URL: {url.path}")
+
+            self.server.delay()
+            self.server.admit()
+            # 실제 API 는 하이픈 없는 ID 도 받음
+            if body.get("after"):
+                body["after"] = dashed_id(body["after"])
+            route, result = self.route(method, [dashed_id(part) for part in parts[1:]], query, body)
+            with self.server.stats_lock:
+                self.server.requests[route] += 1
+            self.send_json(200, result)
+        except ApiError as e:
+            self.send_json(e.status, {"object": "error", "status": e.status, "code": e.code, "message": str(e)}, e.headers)
+        except KeyError as e:
+            self.send_json(404, {"object": "error", "status": 404, "code": "object_not_found",
+                                 "message": f"Could not find object with ID: {e.args[0]}."})
+        except Exception as e:
+            self.send_json(500, {"object": "error", "status": 500, "code": "internal_server_error", "message": str(e)})
+
+    def control(self, method: str, parts: List[str], body: Dict[str, Any]) -> Dict[str, Any]:
+        name = parts[0]
+        if name == "_stats":
+            return self.server.stats()
+        if name == "_reset" and method == "POST":
+            self.server.reset_stats()
+            return {"ok": True}
+        if name == "_edit" and method == "POST":
+            return {"edited": self.server.workspace.edit_random(int(body.get("count", 1)), body.get("seed"))}
+        if name == "_workspace":
+            workspace = self.server.workspace
+            return {"root_id": workspace.root_id, "databases": list(workspace.databases),
+                    "pages": list(workspace.pages), "blocks": workspace.count()}
+        raise ApiError(404, "invalid_request_url", f"Unknown control path: /{name}")
+
+    def page_size(self, value: Any) -> int:
+        size = int(value or MAX_PAGE_SIZE)
+        if size < 1 or size > MAX_PAGE_SIZE:
+            raise ApiError(400, "validation_error", f"body.page_size should be ≤ {MAX_PAGE_SIZE}, instead was {size}.")
+        return min(size, self.server.page_size_cap)
+
+    def route(self, method: str, parts: List[str], query: Dict[str, List[str]], body: Dict[str, Any]) -> Tuple[str, Any]:
+        """(통계용 경로 이름, 응답)"""
+        workspace = self.server.workspace
+        first = lambda key: (query.get(key) or [""])[0]
+
+        if parts[:1] == ["blocks"] and len(parts) == 3 and parts[2] == "children":
+            block_id = parts[1]
+            if method == "GET":
+                if block_id not in workspace.children and block_id not in workspace.blocks:
+                    raise KeyError(block_id)
+                with workspace.lock:
+                    items = list(workspace.children.get(block_id, []))
+                response = paginate(items, first("start_cursor"), self.page_size(first("page_size")))
+                response["results"] = [self.server.public_block(block) for block in response["results"]]
+                response.update(type="block", block={})
+                return "blocks.children.list", response
+            if method == "PATCH":
+                created = workspace.append(block_id, body.get("children", []), body.get("after", ""))
+                return "blocks.children.append", {"object": "list", "results": created, "next_cursor": None, "has_more": False}
+
+        if parts[:1] == ["blocks"] and len(parts) == 2:
+            block_id = parts[1]
+            if method == "GET":
+                return "blocks.retrieve", self.server.public_block(workspace.blocks[block_id])
+            if method == "PATCH":
+                return "blocks.update", workspace.update(block_id, body)
+            if method == "DELETE":
+                return "blocks.delete", workspace.delete(block_id)
+
+        if parts[:1] == ["pages"] and len(parts) == 2 and method == "GET":
+            return "pages.retrieve", workspace.pages[parts[1]]
+
+        if parts == ["search"] and method == "POST":
+            text = (body.get("query") or "").casefold()
+            kind = (body.get("filter") or {}).get("value", "")
+            items = []
+            if kind in ("", "page"):
+                items += [page for page in workspace.pages.values()
+                          if page["parent"].get("type") != "database_id" and text in self._title(page).casefold()]
+            if kind in ("", "database", "data_source"):
+                items += [entry["database"] for entry in workspace.databases.values()
+                          if text in "".join(part["plain_text"] for part in entry["database"]["title"]).casefold()]
+            items.sort(key=lambda item: item["last_edited_time"], reverse=True)
+            return "search", paginate(items, body.get("start_cursor", ""), self.page_size(body.get("page_size")))
+
+        if parts[:1] in (["databases"], ["data_sources"]) and len(parts) >= 2:
+            kind = parts[0]
+            database_id = parts[1] if kind == "databases" else workspace.sources[parts[1]]
+            entry = workspace.databases[database_id]
+            if len(parts) == 2 and method == "GET":
+                database = entry["database"]
+                if kind == "data_sources":
+                    return "data_sources.retrieve", dict(database, object="data_source", id=parts[1],
+                                                         parent={"type": "database_id", "database_id": database_id})
+                if self.headers.get("Notion-Version", "") >= DATA_SOURCE_VERSION:
+                    # 새 API: 속성 대신 데이터 소스 목록
+                    database = {key: value for key, value in database.items() if key != "properties"}
+                    database["data_sources"] = [{"id": entry.get("data_source_id", database_id),
+                                                 "name": "".join(part["plain_text"] for part in database["title"])}]
+                return "databases.retrieve", database
+            if len(parts) == 3 and parts[2] == "query" and method == "POST":
+                rows = [row for row in entry["rows"] if matches(row, body.get("filter"))]
+                for sort in reversed(body.get("sorts") or []):
+                    if "property" in sort:
+                        key = lambda row, name=sort["property"]: json.dumps(row["properties"].get(name), ensure_ascii=False, sort_keys=True)
+                    else:
+                        key = lambda row, name=sort.get("timestamp", "last_edited_time"): row[name]
+                    rows.sort(key=key, reverse=sort.get("direction") == "descending")
+                response = paginate(rows, body.get("start_cursor", ""), self.page_size(body.get("page_size")))
+                wanted = set(query.get("filter_properties") or [])
+                if wanted:
+                    response["results"] = [
+                        dict(row, properties={name: prop for name, prop in row["properties"].items() if prop["id"] in wanted})
+                        for row in response["results"]
+                    ]
+                return f"{kind}.query", response
+
+        raise ApiError(400, "invalid_request_url", f"Invalid request URL: {method} /v1/{'/'.join(parts)}")
+
+    @staticmethod
+    def _title(page: Dict[str, Any]) -> str:
+        for prop in page.get("properties", {}).values():
+            if prop.get("type") == "title":
+                return "".join(part["plain_text"] for part in prop["title"])
+        return ""
+
+def start_server(workspace: Workspace, host: str = "127.0.0.1", port: int = 0, **options: Any) -> FakeNotionServer:
+    """백그라운드 스레드에서 서버를 띄웁니다. (port=0 이면 빈 포트)"""
+    server = FakeNotionServer((host, port), workspace, **options)
+    threading.Thread(target=server.serve_forever, name="fake-notion", daemon=True).start()
+    return server
+
+def record(page_id: str, out: str, api_key: str = "") -> Dict[str, Any]:
+    """
+    실제 Notion 페이지 트리(하위 페이지, 데이터베이스 행 포함)를 원본 응답 그대로 녹화합니다.
+    """
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application"))
+    import notion_api
+    import notion_database
+    import notion_tree
+    from concurrent.futures import ThreadPoolExecutor
+
+    notion = notion_api.get_client(api_key or os.getenv("NOTION_API_KEY"))
+    root_id = notion_tree.parse_id(page_id)
+    children: Dict[str, List[Dict[str, Any]]] = {}
+    pages = {root_id: notion.pages.retrieve(page_id=root_id)}
+    databases: Dict[str, Dict[str, Any]] = {}
+
+    with ThreadPoolExecutor(max_workers=notion_tree.MAX_WORKERS) as pool:
+        level = [root_id]
+        while level:
+            results = list(pool.map(lambda block_id: (block_id, notion_tree.list_children(notion, block_id)), level))
+            level = []
+            for block_id, blocks in results:
+                children[block_id] = blocks
+                for block in blocks:
+                    if block.get("has_children"):
+                        level.append(block["id"])
+                    if block["type"] == "child_page":
+                        pages[block["id"]] = notion.pages.retrieve(page_id=block["id"])
+                    elif block["type"] == "child_database":
+                        try:
+                            rows = [row for response in notion_database.iter_query(notion, block["id"]) for row in response["results"]]
+                            database = notion.databases.retrieve(database_id=block["id"])
+                            entry = {"database": database, "rows": rows}
+                            if "properties" not in database and database.get("data_sources"):
+                                # 새 API 는 속성을 데이터 소스에 둠. 재생할 때 두 API 모두 답하도록 합쳐 저장
+                                entry["data_source_id"] = database["data_sources"][0]["id"]
+                                database["properties"] = notion.data_sources.retrieve(data_source_id=entry["data_source_id"])["properties"]
+                                del database["data_sources"]
+                            databases[block["id"]] = entry
+                        except Exception as e:
+                            print(f"데이터베이스 녹화 실패 ({block['id']}): {e}", file=sys.stderr)
+
+    data = {"root_id": root_id, "children": children, "pages": pages, "databases": databases}
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    return {"root_id": root_id, "blocks": sum(len(blocks) for blocks in children.values()),
+            "pages": len(pages), "databases": len(databases), "out": out}
+
+def add_serve_arguments(parser: argparse.ArgumentParser) -> List[argparse.Action]:
+    """serve 의 데이터/장애 주입 옵션을 붙이고, 붙인 옵션 목록을 반환합니다. (bench_tools.py 가 그대로 넘김)"""
+    actions = []
+    group = parser.add_argument_group("데이터")
+    actions.append(group.add_argument("--replay", help="record 로 만든 JSON 을 그대로 내보냄"))
+    actions.append(group.add_argument("--blocks", type=int, default=2000, help="합성 트리 블록 수"))
+    actions.append(group.add_argument("--depth", type=int, default=4, help="합성 트리 최대 깊이"))
+    actions.append(group.add_argument("--fanout", type=int, default=5, help="하위 블록을 가진 블록의 자식 수"))
+    actions.append(group.add_argument("--top", type=int, default=40, help="페이지 바로 아래 블록 수"))
+    actions.append(group.add_argument("--rows", type=int, default=200, help="데이터베이스 행 수"))
+    actions.append(group.add_argument("--seed", type=int, default=0))
+    group = parser.add_argument_group("장애 주입")
+    actions.append(group.add_argument("--latency", type=float, default=0.0, help="요청마다 더하는 지연 (ms)"))
+    actions.append(group.add_argument("--jitter", type=float, default=0.0, help="지연에 더하는 0~jitter 무작위 값 (ms)"))
+    actions.append(group.add_argument("--rate", type=float, default=0.0, help="초당 요청 제한, 넘으면 429 (Notion 은 3, 0이면 없음)"))
+    actions.append(group.add_argument("--burst", type=int, default=10, help="--rate 의 버스트 크기"))
+    actions.append(group.add_argument("--throttle-every", type=int, default=0, help="N 번째 요청마다 429"))
+    actions.append(group.add_argument("--retry-after", type=float, default=1.0, help="429 의 Retry-After (초)"))
+    actions.append(group.add_argument("--error-rate", type=float, default=0.0, help="무작위 503 비율 (0~1)"))
+    actions.append(group.add_argument("--page-size-cap", type=int, default=MAX_PAGE_SIZE, help="한 페이지에 돌려줄 최대 항목 수"))
+    return actions
+
+def workspace_from_args(args: argparse.Namespace) -> Workspace:
+    if args.replay:
+        return Workspace.load(args.replay)
+    return Workspace.synthetic(args.blocks, args.depth, args.fanout, args.top, args.rows, args.seed)
+
+def server_options(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "latency": args.latency / 1000,
+        "jitter": args.jitter / 1000,
+        "rate": args.rate,
+        "burst": args.burst,
+        "throttle_every": args.throttle_every,
+        "retry_after": args.retry_after,
+        "error_rate": args.error_rate,
+        "page_size_cap": max(1, min(args.page_size_cap, MAX_PAGE_SIZE)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 Notion API 대역 서버")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="서버 실행")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8787, help="0 이면 빈 포트")
+    serve.add_argument("--save", help="합성 트리를 녹화 파일 형식으로 저장")
+    serve.add_argument("--verbose", action="store_true", help="요청 로그 출력")
+    add_serve_arguments(serve)
+
+    rec = commands.add_parser("record", help="실제 Notion 페이지 트리를 녹화")
+    rec.add_argument("--page-id", required=True, help="페이지 ID 또는 URL")
+    rec.add_argument("--out", required=True)
+    rec.add_argument("--api-key", default="", help="없으면 NOTION_API_KEY")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        print(json.dumps(record(args.page_id, args.out, args.api_key), ensure_ascii=False))
+        return
+
+    workspace = workspace_from_args(args)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(workspace.dump(), f, ensure_ascii=False)
+    server = FakeNotionServer((args.host, args.port), workspace, verbose=args.verbose, **server_options(args))
+    # 첫 줄은 벤치마크가 읽는 JSON (주소, 루트 ID)
+    print(json.dumps({"url": server.url, "root_id": workspace.root_id, "databases": list(workspace.databases),
+                      "blocks": workspace.count()}, ensure_ascii=False), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+테스트 공용 설정
+
+application/ 와 benchmarks/ 를 import 경로에 넣고, 애플리케이션 모듈이 import 할 때 읽는 환경 변수를
+먼저 정합니다. fake_notion 픽스처는 benchmarks/fake_notion_server.py 를 빈 포트로 띄우고
+공유 클라이언트가 그 서버를 가리키게 하며, 테스트마다 데이터 디렉터리와 프로세스 전역 캐시를 비웁니다.
+"""
+import os
+import sys
+import tempfile
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(root_dir, "application"), os.path.join(root_dir, "benchmarks")]
+
+os.environ.update({
+    "NOTION_API_KEY": "fake-test-token",
+    "NOTION_DATA_DIR": tempfile.mkdtemp(prefix="notion-test-"),
+    "NOTION_MIRROR_ENABLED": "false",
+    "NOTION_WRITE_BEHIND": "false",
+    "NOTION_RATE_LIMIT": "1000",
+    "NOTION_RATE_BURST": "100",
+})
+
+import pytest
+
+import fake_notion_server
+
+# 모듈 전역 싱글턴 (테스트마다 새로 만듦)
+SINGLETONS = {
+    "notion_cache": ["_cache"],
+    "notion_diff": ["_store"],
+    "notion_images": ["_store"],
+    "notion_mirror": ["_store"],
+    "notion_queue": ["_journal", "_worker"],
+    "notion_report": ["_ledger"],
+    "notion_search": ["_index"],
+}
+
+@pytest.fixture
+def workspace():
+    return fake_notion_server.Workspace.synthetic(blocks=300, depth=4, fanout=3, top=20, rows=20)
+
+@pytest.fixture
+def fake_notion(workspace, monkeypatch, tmp_path):
+    import importlib
+    import notion_api
+    import notion_cache
+    import notion_database
+    import notion_tree
+
+    server = fake_notion_server.start_server(workspace)
+    monkeypatch.setattr(notion_api, "BASE_URL", server.url)
+    monkeypatch.setattr(notion_api, "_clients", {})
+    monkeypatch.setattr(notion_cache, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(notion_tree, "_tree_cache", {})
+    monkeypatch.setattr(notion_database, "_schemas", {})
+    for module_name, names in SINGLETONS.items():
+        module = importlib.import_module(module_name)
+        for name in names:
+            monkeypatch.setattr(module, name, None)
+    monkeypatch.setenv("NOTION_PAGE_ID", workspace.root_id)
+    yield server
+    server.shutdown()
+    server.server_close()
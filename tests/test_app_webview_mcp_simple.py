@@ -0,0 +1,37 @@
+import app_webview_mcp_simple as viewer
+
+def test_page_cache_checks_notion_once_per_ttl(fake_notion, workspace, monkeypatch):
+    monkeypatch.setattr(viewer, "VIEWER_TTL", 60.0)
+    cache = viewer.PageCache()
+    entry = cache.entry(workspace.root_id)
+    tree = cache.tree(entry)
+    fake_notion.reset_stats()
+
+    assert cache.entry(workspace.root_id) is entry
+    assert cache.tree(entry) is tree
+    assert fake_notion.stats()["by_route"].get("pages.retrieve", 0) == 0
+
+def test_page_cache_refetches_only_changed_pages(fake_notion, workspace, monkeypatch):
+    monkeypatch.setattr(viewer, "VIEWER_TTL", 0.0)
+    cache = viewer.PageCache()
+    entry = cache.entry(workspace.root_id)
+    tree = cache.tree(entry)
+
+    cache.entry(workspace.root_id)
+    assert cache.tree(entry) is tree
+
+    first = workspace.children[workspace.root_id][0]
+    workspace.update(first["id"], {first["type"]: dict(first[first["type"]], rich_text=[])})
+    cache.entry(workspace.root_id)
+    assert cache.tree(entry) is not tree
+
+def test_prefetch_fills_child_page_trees(fake_notion, workspace):
+    cache = viewer.PageCache()
+    pages = [page for page_id, page in workspace.pages.items()
+             if page_id != workspace.root_id and page["parent"].get("type") != "database_id"][:3]
+
+    assert pages and cache.prefetch(pages) == len(pages)
+    cache.pool.shutdown(wait=True)
+
+    assert all(cache.is_ready(page["id"]) for page in pages)
+    assert cache.prefetch(pages) == 0
@@ -0,0 +1,28 @@
+import json
+
+import mcp_server_notion
+
+def test_undashed_page_id_env(fake_notion, workspace, monkeypatch):
+    monkeypatch.setenv("NOTION_PAGE_ID", workspace.root_id.replace("-", ""))
+    assert mcp_server_notion.get_notion_target() == ("fake-test-token", workspace.root_id)
+
+def test_same_report_by_url_is_skipped(fake_notion, workspace):
+    content = "## 요약\n- 첫 줄\n- 둘째 줄\n\n본문"
+    first = mcp_server_notion.add_to_notion_page("보고서", content)
+    assert "추가된 블록" in first
+    blocks = len(workspace.children[workspace.root_id])
+
+    url = f"https://www.notion.so/Root-{workspace.root_id.replace('-', '')}"
+    second = mcp_server_notion.add_to_notion_page("보고서", content, page_id=url)
+
+    assert "이미 저장되어 있어" in second
+    assert len(workspace.children[workspace.root_id]) == blocks
+
+def test_query_database_by_url(fake_notion, workspace):
+    database_id = next(iter(workspace.databases))
+    url = f"https://www.notion.so/ws/{database_id.replace('-', '')}?v={'a' * 32}"
+
+    by_url = json.loads(mcp_server_notion.query_notion_database(database_id=url, properties="이름", limit=5))
+    by_id = json.loads(mcp_server_notion.query_notion_database(database_id=database_id, properties="이름", limit=5))
+
+    assert by_url["rows"] == by_id["rows"] and len(by_url["rows"]) == 5
@@ -0,0 +1,93 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import notion_api
+
+def test_search_endpoint_goes_through_scheduler(fake_notion):
+    client = notion_api.get_client()
+    before = notion_api.get_stats()["requests"]
+
+    result = client.search(query="x")
+
+    assert result["object"] == "list"
+    assert notion_api.get_stats()["requests"] == before + 1
+    assert fake_notion.stats()["by_route"]["search"] == 1
+
+def test_search_endpoint_finds_pages(fake_notion, workspace):
+    result = notion_api.get_client().search(query="", filter={"property": "object", "value": "page"})
+    assert {page["id"] for page in result["results"]} <= set(workspace.pages)
+    assert result["results"]
+
+def test_namespace_is_not_callable(fake_notion):
+    with pytest.raises(TypeError):
+        notion_api.get_client().blocks()
+
+def test_retry_option_only_when_supported(monkeypatch):
+    created = []
+    monkeypatch.setattr(notion_api, "Client", lambda **options: created.append(options) or object())
+    monkeypatch.setattr(notion_api, "_clients", {})
+    monkeypatch.setattr(notion_api, "CLIENT_HAS_RETRY", False)
+    notion_api.get_client("old-sdk")
+    monkeypatch.setattr(notion_api, "CLIENT_HAS_RETRY", True)
+    notion_api.get_client("new-sdk")
+
+    assert "retry" not in created[0]
+    assert created[1]["retry"] is False
+
+def test_undashed_ids_are_accepted(fake_notion, workspace):
+    client = notion_api.get_client()
+    dashed = client.blocks.children.list(block_id=workspace.root_id)
+    undashed = client.blocks.children.list(block_id=workspace.root_id.replace("-", ""))
+    assert undashed["results"] == dashed["results"]
+
+def test_single_flight_shares_concurrent_calls():
+    flight = notion_api.SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"results": [1, 2]}
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(flight.do, "key", fetch) for _ in range(4)]
+        while flight.stats()["inflight_shared"] < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert results == [{"results": [1, 2]}] * 4
+    assert len({id(result) for result in results}) == 4
+    assert flight.stats()["inflight"] == 0
+
+def test_single_flight_does_not_keep_errors():
+    flight = notion_api.SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: "again") == "again"
+
+def test_timed_out_append_is_not_sent_twice(fake_notion, workspace, monkeypatch):
+    monkeypatch.setattr(notion_api, "TIMEOUT", 0.2)
+    monkeypatch.setattr(notion_api, "BACKOFF_BASE", 0.01)
+    client = notion_api.get_client()
+    before = len(workspace.children[workspace.root_id])
+    fake_notion.latency = 0.5
+
+    with pytest.raises(Exception):
+        client.blocks.children.append(block_id=workspace.root_id, children=[{"type": "paragraph", "paragraph": {"rich_text": []}}])
+    with pytest.raises(Exception):
+        client.blocks.retrieve(block_id=workspace.children[workspace.root_id][0]["id"])
+    threading.Event().wait(1.0)
+
+    # 쓰기는 한 번만 보내고(서버에는 반영됨), 읽기는 재시도함
+    assert fake_notion.stats()["by_route"]["blocks.children.append"] == 1
+    assert len(workspace.children[workspace.root_id]) == before + 1
+    assert fake_notion.stats()["by_route"]["blocks.retrieve"] > 1
@@ -0,0 +1,51 @@
+import notion_api
+import notion_cache
+import notion_model
+import notion_tree
+from notion_model import Block
+
+def outline(blocks):
+    return [(block["id"], block["text"], outline(block["children"])) for block in blocks]
+
+def test_children_roundtrip_and_invalidation(tmp_path):
+    cache = notion_cache.BlockCache(str(tmp_path / "blocks.sqlite"))
+    child = Block("c1", "toggle", "토글", last_edited_time="t1", has_children=True)
+    grandchild = Block("g1", "paragraph", "안쪽", last_edited_time="t1")
+    cache.put_children("root", "t0", [child])
+    cache.put_children("c1", "t1", [grandchild])
+
+    children = cache.get_children("root", "t0")
+
+    assert notion_model.dumps(children) == notion_model.dumps([child.copy(children=[grandchild])])
+    assert cache.get_children("root", "t-changed") is None
+    cache.invalidate(["c1"])
+    assert cache.get_children("root", "t0") is None
+
+def test_recrawl_reuses_unchanged_subtrees(fake_notion, workspace):
+    notion = notion_api.get_client()
+    cache = notion_cache.get_cache()
+    first = notion_tree.fetch_block_tree(notion, workspace.root_id, cache=cache)
+    fake_notion.reset_stats()
+
+    second = notion_tree.fetch_block_tree(notion, workspace.root_id, cache=cache)
+
+    # 이미지 URL 은 목록을 받을 때마다 다시 서명되므로 ID 와 텍스트만 비교
+    assert outline(second) == outline(first)
+    assert fake_notion.stats()["by_route"]["blocks.children.list"] == 1
+
+def test_depth_limited_crawl_does_not_hide_nested_changes(fake_notion, workspace):
+    notion = notion_api.get_client()
+    cache = notion_cache.get_cache()
+    notion_tree.fetch_block_tree(notion, workspace.root_id, cache=cache)
+    nested = next(child for top in workspace.children[workspace.root_id]
+                  for child in workspace.children.get(top["id"], []) if child["type"] != "child_page")
+    added = workspace.append(nested["id"], [{"type": "paragraph", "paragraph": {"rich_text": []}}])[0]
+
+    notion_tree.fetch_block_tree(notion, workspace.root_id, cache=cache, max_depth=1)
+    tree = notion_tree.fetch_block_tree(notion, workspace.root_id, cache=cache)
+
+    def ids(blocks):
+        for block in blocks:
+            yield block["id"]
+            yield from ids(block["children"])
+    assert added["id"] in set(ids(tree))
@@ -0,0 +1,30 @@
+import pytest
+from notion_client import Client
+
+import notion_api
+import notion_database
+
+@pytest.mark.parametrize("notion_version", ["2025-09-03", "2022-06-28"])
+def test_query_filters_on_server(fake_notion, workspace, notion_version):
+    notion = Client(auth="fake-test-token", base_url=fake_notion.url, notion_version=notion_version)
+    database_id = next(iter(workspace.databases))
+    rows = workspace.databases[database_id]["rows"]
+    expected = [row["id"] for row in rows if row["properties"]["도시"]["select"]["name"] == "서울"]
+
+    result = notion_database.query_database(
+        notion, database_id, filter={"property": "도시", "select": {"equals": "서울"}}, properties=["이름", "도시"], limit=0
+    )
+
+    assert result["columns"] == ["id", "url", "이름", "도시"]
+    assert [row[0] for row in result["rows"]] == expected
+    assert {row[3] for row in result["rows"]} == {"서울"}
+
+def test_query_pages_with_cursor(fake_notion, workspace):
+    notion = notion_api.get_client("fake-test-token")
+    database_id = next(iter(workspace.databases))
+
+    first = notion_database.query_database(notion, database_id, properties=["이름"], limit=5)
+    rest = notion_database.query_database(notion, database_id, properties=["이름"], limit=0, cursor=first["next_cursor"])
+
+    assert first["has_more"] and len(first["rows"]) == 5
+    assert [row[0] for row in first["rows"] + rest["rows"]] == [row["id"] for row in workspace.databases[database_id]["rows"]]
@@ -0,0 +1,46 @@
+import notion_diff
+from notion_model import Block
+
+def block(block_id, text, block_type="paragraph", children=None):
+    return Block(block_id, block_type, text, children=children or [])
+
+def sample_tree():
+    return [
+        block("h1", "일정", "heading_2"),
+        block("a", "첫째 날"),
+        block("b", "둘째 날", children=[block("b1", "오전"), block("b2", "오후")]),
+        block("c", "셋째 날"),
+        block("d", "넷째 날"),
+    ]
+
+def test_version_depends_only_on_content():
+    assert notion_diff.tree_version(sample_tree()) == notion_diff.tree_version(sample_tree())
+    changed = sample_tree()
+    changed[1].text = "첫째 날 (수정)"
+    assert notion_diff.tree_version(changed) != notion_diff.tree_version(sample_tree())
+
+def test_diff_reports_each_kind_of_change():
+    new = sample_tree()
+    new[1].text = "첫째 날 (수정)"
+    new.insert(2, block("x", "새 블록"))
+    new[3].children.pop()
+    new.append(new.pop(4))  # c 를 d 뒤로
+
+    changes = notion_diff.diff_trees(sample_tree(), new)
+
+    assert [entry["id"] for entry in changes["inserted"]] == ["x"]
+    assert [entry["id"] for entry in changes["removed"]] == ["b2"]
+    assert [entry["id"] for entry in changes["edited"]] == ["a"]
+    assert len(changes["moved"]) == 1 and changes["moved"][0]["id"] in ("c", "d")
+    assert changes["changed_headings"] == ["일정"]
+
+def test_changes_since_recorded_version(fake_notion):
+    first = notion_diff.changes_since("root", sample_tree())
+    new = sample_tree()
+    new[-1].text = "넷째 날 (수정)"
+
+    result = notion_diff.changes_since("root", new, since=first["version"])
+
+    assert [entry["id"] for entry in result["edited"]] == ["d"]
+    assert result["unchanged"] == 6
+    assert "error" in notion_diff.changes_since("root", new, since="unknown")
@@ -0,0 +1,51 @@
+import notion_api
+import notion_images
+import notion_tree
+
+def image_block(workspace):
+    block_id = next(block_id for block_id, block in workspace.blocks.items()
+                    if block["type"] == "image" and block["image"]["type"] == "file")
+    notion = notion_api.get_client()
+    return notion, block_id, notion_tree.normalize_block(notion.blocks.retrieve(block_id=block_id))["url"]
+
+def test_url_key_ignores_signature():
+    first = "https://s3.example.com/a/b.png?X-Amz-Date=20240101T000000Z&X-Amz-Expires=3600&X-Amz-Signature=1"
+    second = "https://s3.example.com/a/b.png?X-Amz-Date=20240102T000000Z&X-Amz-Expires=3600&X-Amz-Signature=2"
+    assert notion_images.url_key(first) == notion_images.url_key(second) == "https://s3.example.com/a/b.png"
+    assert notion_images.is_expired(first)
+    assert notion_images.url_key("https://example.com/x.png?v=1") == "https://example.com/x.png?v=1"
+
+def test_image_downloaded_once(fake_notion, workspace):
+    notion, block_id, url = image_block(workspace)
+    store = notion_images.get_store()
+
+    first = store.get(notion, block_id, url)
+    second = store.get(notion, block_id, url)
+
+    assert first["error"] == "" and first["path"] == second["path"]
+    assert store.stats()["downloads"] == 1 and store.stats()["hits"] == 1
+    assert fake_notion.stats()["by_route"]["files"] == 1
+
+def test_expired_url_is_resigned(fake_notion, workspace):
+    notion, block_id, url = image_block(workspace)
+    expired = url.split("?")[0] + "?X-Amz-Date=20240101T000000Z&X-Amz-Expires=3600"
+    store = notion_images.get_store()
+
+    result = store.get(notion, block_id, expired)
+
+    assert result["error"] == ""
+    assert store.stats()["resigned"] == 1
+
+def test_iter_fetch_yields_every_image_once(fake_notion, workspace):
+    notion = notion_api.get_client()
+    block_ids = [block_id for block_id, block in workspace.blocks.items()
+                 if block["type"] == "image" and block["image"]["type"] == "file"][:5]
+    images = [{"block_id": block_id, "url": notion_tree.normalize_block(notion.blocks.retrieve(block_id=block_id))["url"]}
+              for block_id in block_ids]
+    store = notion_images.get_store()
+
+    fetched = dict(store.iter_fetch(notion, images, width=0))
+
+    assert len(images) > 1 and sorted(fetched) == list(range(len(images)))
+    assert all(result["error"] == "" for result in fetched.values())
+    assert [result["block_id"] for result in store.fetch_many(notion, images, width=0)] == block_ids
@@ -0,0 +1,67 @@
+import pytest
+
+import notion_markdown
+import notion_writer
+
+def rich_text_length(blocks):
+    return sum(len(item["text"]["content"]) for block in blocks for item in block[block["type"]].get("rich_text", []))
+
+def nesting_depth(blocks, depth=0):
+    deepest = depth
+    for block in blocks:
+        children = block[block["type"]].get("children")
+        if children:
+            deepest = max(deepest, nesting_depth(children, depth + 1))
+    return deepest
+
+def all_blocks(blocks):
+    for block in blocks:
+        yield block
+        yield from all_blocks(block[block["type"]].get("children", []))
+
+@pytest.mark.parametrize("markdown, block_type, text", [
+    ("## C#", "heading_2", "C#"),
+    ("## 제목 ##", "heading_2", "제목"),
+    ("# F# 입문 #", "heading_1", "F# 입문"),
+    ("### 끝  ###   ", "heading_3", "끝"),
+])
+def test_heading_closing_hashes(markdown, block_type, text):
+    blocks = notion_markdown.convert(markdown)
+    assert [block["type"] for block in blocks] == [block_type]
+    assert "".join(item["text"]["content"] for item in blocks[0][block_type]["rich_text"]) == text
+
+def test_long_heading_keeps_all_text():
+    text = "가" * 250_000
+    blocks = notion_markdown.convert(f"# {text}")
+
+    assert {block["type"] for block in blocks} == {"heading_1"}
+    assert all(len(block["heading_1"]["rich_text"]) <= notion_writer.MAX_RICH_TEXT_ITEMS for block in blocks)
+
+def test_list_continuation_lines_respect_item_limit():
+    lines = ["- 항목 **굵게** 첫 줄"] + [f"  이어지는 줄 {i} **굵게** 끝" for i in range(200)]
+    blocks = notion_markdown.convert("\n".join(lines))
+
+    assert len(blocks) > 1
+    assert {block["type"] for block in blocks} == {"bulleted_list_item"}
+    assert all(len(block["bulleted_list_item"]["rich_text"]) <= notion_writer.MAX_RICH_TEXT_ITEMS for block in blocks)
+    assert "이어지는 줄 199" in "".join(item["text"]["content"] for block in blocks for item in block["bulleted_list_item"]["rich_text"])
+
+def test_nested_table_is_lifted_within_nesting_limit():
+    markdown = "\n".join([
+        "<details><summary>바깥</summary>",
+        "",
+        "<details><summary>안쪽</summary>",
+        "",
+        "| a | b |",
+        "|---|---|",
+        "| 1 | 2 |",
+        "",
+        "</details>",
+        "",
+        "</details>",
+    ])
+    blocks = notion_markdown.convert(markdown)
+
+    assert nesting_depth(blocks) <= notion_markdown.MAX_NESTING
+    tables = [block for block in all_blocks(blocks) if block["type"] == "table"]
+    assert len(tables) == 1 and len(tables[0]["table"]["children"]) == 2
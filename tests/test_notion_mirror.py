@@ -0,0 +1,64 @@
+import pytest
+
+import notion_api
+import notion_mirror
+
+@pytest.fixture
+def store(tmp_path):
+    return notion_mirror.MirrorStore(str(tmp_path / "mirror.sqlite"))
+
+def test_incremental_sync_detects_edit_with_undashed_root(fake_notion, workspace, store):
+    notion = notion_api.get_client()
+    undashed = workspace.root_id.replace("-", "")
+
+    first = notion_mirror.sync_once(notion, undashed, store)
+    assert first["full"] and first["root_id"] == workspace.root_id
+
+    unchanged = notion_mirror.sync_once(notion, undashed, store)
+    assert not unchanged["full"] and unchanged["changed_pages"] == 0
+
+    block_id = workspace.children[workspace.root_id][0]["id"]
+    workspace.update(block_id, {})
+    changed = notion_mirror.sync_once(notion, undashed, store)
+    assert not changed["full"] and changed["changed_pages"] >= 1
+    assert store.get_tree(workspace.root_id) is not None
+
+def test_new_child_page_is_detected(fake_notion, workspace, store):
+    notion = notion_api.get_client()
+    notion_mirror.sync_once(notion, workspace.root_id, store)
+    new_page = fake_notion_page(workspace, "새 하위 페이지")
+
+    result = notion_mirror.sync_once(notion, workspace.root_id, store)
+
+    assert not result["full"] and result["changed_pages"] >= 1
+    assert new_page in store.known_pages(workspace.root_id)
+
+def test_failed_sync_forces_full_sync(fake_notion, workspace, store):
+    notion = notion_api.get_client()
+    notion_mirror.sync_once(notion, workspace.root_id, store)
+
+    class BrokenSearch:
+        def __getattr__(self, name):
+            return getattr(notion, name)
+
+        def search(self, **kwargs):
+            raise RuntimeError("search down")
+
+    with pytest.raises(RuntimeError):
+        notion_mirror.sync_once(BrokenSearch(), workspace.root_id, store)
+    # 실패한 미러는 요청 경로에서 쓰지 않음
+    assert store.get_tree(workspace.root_id) is None
+
+    result = notion_mirror.sync_once(notion, workspace.root_id, store)
+    assert result["full"]
+    assert store.get_tree(workspace.root_id) is not None
+
+def fake_notion_page(workspace, title):
+    """루트 아래에 child_page 블록과 페이지를 만듭니다. (Notion 에서 하위 페이지를 만든 것과 같음)"""
+    import fake_notion_server
+    created = workspace.append(workspace.root_id, [{"type": "child_page", "child_page": {"title": title}}])[0]
+    with workspace.lock:
+        workspace.pages[created["id"]] = fake_notion_server.page_object(
+            created["id"], title, {"type": "page_id", "page_id": workspace.root_id}, fake_notion_server.now_iso()
+        )
+    return created["id"]
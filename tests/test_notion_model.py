@@ -0,0 +1,14 @@
+import notion_model
+import notion_tree
+
+def test_block_json_keeps_every_field():
+    raw = {"id": "b1", "type": "to_do", "has_children": False, "last_edited_time": "2024-01-01T00:00:00.000Z",
+           "to_do": {"rich_text": [], "checked": True}}
+    block = notion_tree.normalize_block(raw)
+
+    data = notion_model.loads(notion_model.dumps(block))
+
+    assert data == {"id": "b1", "type": "to_do", "text": "", "url": "", "caption": "",
+                    "last_edited_time": "2024-01-01T00:00:00.000Z", "has_children": False,
+                    "children": [], "checked": True}
+    assert notion_model.Block.from_dict(data).to_dict() == block.to_dict()
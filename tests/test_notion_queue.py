@@ -0,0 +1,40 @@
+import json
+import time
+
+import mcp_server_notion
+import notion_queue
+
+def test_two_journals_never_claim_the_same_entry(tmp_path):
+    path = str(tmp_path / "queue.sqlite")
+    first, second = notion_queue.WriteJournal(path), notion_queue.WriteJournal(path)
+    for i in range(6):
+        first.append("page", f"보고서 {i}", "내용")
+
+    taken = [entry["seq"] for entry in first.take_batch(4)] + [entry["seq"] for entry in second.take_batch(4)]
+
+    assert sorted(taken) == list(range(1, 7))
+    assert first.take_batch(4) == [] and second.take_batch(4) == []
+
+def test_expired_claim_is_taken_again(tmp_path, monkeypatch):
+    journal = notion_queue.WriteJournal(str(tmp_path / "queue.sqlite"))
+    journal.append("page", "보고서", "내용")
+    monkeypatch.setattr(notion_queue, "QUEUE_LEASE", 0.0)
+
+    assert [entry["seq"] for entry in journal.take_batch(1)] == [1]
+    assert [entry["seq"] for entry in journal.take_batch(1)] == [1]
+
+def test_queued_write_returns_job_id(fake_notion, workspace, monkeypatch):
+    monkeypatch.setattr(notion_queue, "QUEUE_ENABLED", True)
+    before = len(workspace.children[workspace.root_id])
+
+    response = mcp_server_notion.add_to_notion_page("보고서", "대기열 본문")
+
+    assert "작업 번호 1" in response and "저장된 전체 내용" not in response
+    try:
+        deadline = time.time() + 10
+        while json.loads(mcp_server_notion.get_notion_write_queue_status(seq=1))["status"] != "done" and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        notion_queue._worker.stop()
+    assert json.loads(mcp_server_notion.get_notion_write_queue_status(seq=1))["status"] == "done"
+    assert len(workspace.children[workspace.root_id]) == before + 2
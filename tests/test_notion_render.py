@@ -0,0 +1,66 @@
+import notion_render
+from notion_model import Block
+
+def block(block_type, text="", children=None, **extra):
+    return Block(f"{block_type}-{text}", block_type, text, children=children or [], extra=extra)
+
+def sample_tree():
+    return [
+        block("heading_1", "개요"),
+        block("paragraph", "소개 문단"),
+        block("heading_2", "준비물"),
+        block("bulleted_list_item", "여권", [block("bulleted_list_item", "사본")]),
+        block("to_do", "환전", checked=True),
+        block("heading_2", "일정"),
+        block("code", "print('서울')", language="python"),
+        block("heading_1", "부록"),
+        block("paragraph", "끝"),
+    ]
+
+def test_render_markdown_keeps_structure():
+    markdown = notion_render.render_markdown(sample_tree())["markdown"]
+    assert markdown.startswith("# 개요\n\n소개 문단\n\n## 준비물\n\n- 여권\n  - 사본\n- [x] 환전")
+    assert "```python\nprint('서울')\n```" in markdown
+
+def test_heading_selects_section_until_same_level():
+    result = notion_render.render_markdown(sample_tree(), heading="준비물")
+    assert result["found"]
+    assert result["markdown"] == "## 준비물\n\n- 여권\n  - 사본\n- [x] 환전"
+    assert not notion_render.render_markdown(sample_tree(), heading="없는 제목")["found"]
+
+def test_token_budget_lists_remaining_headings():
+    result = notion_render.render_markdown(sample_tree(), max_tokens=12)
+    assert result["truncated"] and result["tokens"] <= 12
+    assert result["remaining_headings"][-2:] == ["일정", "부록"]
+
+def test_render_html_separates_top_level_images():
+    tree = [
+        block("paragraph", "a < b"),
+        block("bulleted_list_item", "하나"),
+        block("bulleted_list_item", "둘"),
+        Block("img", "image", url="https://example.com/1.png", caption="사진"),
+        block("toggle", "접힘", [block("paragraph", "안쪽")]),
+    ]
+
+    segments = notion_render.render_html(tree)
+
+    assert [kind for kind, _ in segments] == ["html", "image", "html"]
+    assert "<p>a &lt; b</p><ul><li>하나</li><li>둘</li></ul>" in segments[0][1]
+    assert segments[1][1] == {"id": "img", "url": "https://example.com/1.png", "caption": "사진"}
+    assert "<details><summary>접힘</summary><p>안쪽</p></details>" in segments[2][1]
+
+def test_render_html_chunks_at_top_level_blocks():
+    tree = [block("paragraph", f"문단 {i} " + "가" * 100) for i in range(30)]
+    segments = notion_render.render_html(tree, chunk_chars=1000)
+    assert len(segments) > 1
+    assert all(kind == "html" for kind, _ in segments)
+    assert "".join(document for _, document in segments).count("<p>") == 30
+
+def test_split_sections_by_heading_and_size():
+    tree = [block("paragraph", "머리말")] + [block("heading_2", "본문")] + [block("paragraph", str(i)) for i in range(5)]
+
+    sections = notion_render.split_sections(tree, max_blocks=3)
+
+    assert [(section["title"], len(section["blocks"])) for section in sections] == [
+        ("", 1), ("본문", 3), ("본문 (계속)", 3)
+    ]
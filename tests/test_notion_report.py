@@ -0,0 +1,41 @@
+import notion_api
+import notion_report
+import notion_writer
+
+def page_texts(workspace, count):
+    blocks = workspace.children[workspace.root_id][-count:]
+    return ["".join(item["text"]["content"] for item in block[block["type"]].get("rich_text", [])) for block in blocks]
+
+def report_texts(title, content):
+    blocks = notion_report.report_blocks(title, content)
+    return ["".join(item["text"]["content"] for item in block[block["type"]].get("rich_text", [])) for block in blocks]
+
+def test_resumed_report_records_skipped_blocks(fake_notion, workspace):
+    notion = notion_api.get_client("fake-test-token")
+    content = "첫 문단\n\n둘째 문단\n\n셋째 문단"
+    # 이전 호출이 제목과 첫 문단까지만 추가하고 실패한 상황
+    notion_writer.append_blocks(notion, workspace.root_id, notion_report.report_blocks("보고서", content)[:2])
+
+    created = notion_report.write_report(notion, workspace.root_id, "보고서", content, skip_blocks=2)
+    assert created["appended"] == 2
+    entry = notion_report.get_ledger().get(workspace.root_id, "보고서")
+    assert entry["block_ids"] == [block["id"] for block in workspace.children[workspace.root_id][-4:]]
+
+    changed = content.replace("셋째", "고친 셋째")
+    patched = notion_report.write_report(notion, workspace.root_id, "보고서", changed)
+    assert patched["status"] == "patched" and patched["appended"] == 0
+    assert page_texts(workspace, 5)[1:] == report_texts("보고서", changed)
+
+def test_report_rewritten_when_block_deleted_by_hand(fake_notion, workspace):
+    notion = notion_api.get_client("fake-test-token")
+    before = len(workspace.children[workspace.root_id])
+    notion_report.write_report(notion, workspace.root_id, "보고서", "A\n\nB\n\nC")
+    entry = notion_report.get_ledger().get(workspace.root_id, "보고서")
+    workspace.delete(entry["block_ids"][1])
+
+    changed = "A\n\nX\n\nB\n\nC"
+    result = notion_report.write_report(notion, workspace.root_id, "보고서", changed)
+
+    assert result["error"] == ""
+    assert len(workspace.children[workspace.root_id]) == before + 5
+    assert page_texts(workspace, 5) == report_texts("보고서", changed)
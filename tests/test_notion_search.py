@@ -0,0 +1,43 @@
+import json
+
+import mcp_server_notion
+import notion_api
+import notion_search
+import notion_tree
+from notion_model import Block
+
+def test_tokenize_bigrams():
+    assert notion_search.tokenize("서울에서 Trip") == ["서울", "울에", "에서", "trip"]
+
+def test_single_character_query_uses_substring(tmp_path):
+    index = notion_search.SearchIndex(str(tmp_path / "search.sqlite"))
+    tree = [Block("b1", "paragraph", "부산 여행"), Block("b2", "paragraph", "제주 일정")]
+    index.index_tree("p1", tree, root_title="여행")
+
+    assert [hit["block_id"] for hit in index.search("산")] == ["b1"]
+    assert [hit["block_id"] for hit in index.search("부산")] == ["b1"]
+    assert index.search("서") == []
+
+def test_block_root_is_not_indexed_as_page(fake_notion, workspace):
+    notion = notion_api.get_client()
+    notion_tree.get_tree(notion, workspace.root_id)
+    block = next(block for block in workspace.children[workspace.root_id] if block["has_children"] and block["type"] != "child_page")
+    notion_tree.get_tree(notion, block["id"])
+
+    index = notion_search.get_index()
+    assert block["id"] not in index.indexed_page_ids()
+    titles = dict(index.conn.execute("SELECT page_id, title FROM indexed_pages").fetchall())
+    assert titles[workspace.root_id] == notion_tree.page_title(workspace.pages[workspace.root_id])
+    # 같은 블록이 두 페이지에 중복 인덱싱되지 않음
+    assert index.conn.execute("SELECT count(*) FROM block_fts WHERE block_id = ?", (block["id"],)).fetchone()[0] == 1
+
+def test_search_pages_has_titles(fake_notion, workspace):
+    notion_tree.get_tree(notion_api.get_client(), workspace.root_id)
+    block = next(block for block in workspace.children[workspace.root_id] if block[block["type"]].get("rich_text"))
+    query = block[block["type"]]["rich_text"][0]["plain_text"].split()[0]
+
+    pages = json.loads(mcp_server_notion.search_notion_pages(query))
+
+    assert pages
+    assert all(page["title"] != "제목 없음" for page in pages)
+    assert len({page["id"] for page in pages}) == len(pages)
@@ -0,0 +1,76 @@
+import pytest
+
+import notion_tree
+
+PAGE_ID = "1a2b3c4d-5e6f-4a1b-8c2d-3e4f5a6b7c8d"
+
+@pytest.mark.parametrize("value", [
+    PAGE_ID,
+    PAGE_ID.upper(),
+    PAGE_ID.replace("-", ""),
+    f"https://www.notion.so/workspace/Travel-Plan-{PAGE_ID.replace('-', '')}",
+    f"https://www.notion.so/{PAGE_ID.replace('-', '')}?pvs=4",
+    f"  {PAGE_ID.replace('-', '')}\n",
+])
+def test_parse_id_canonical(value):
+    assert notion_tree.parse_id(value) == PAGE_ID
+
+def test_parse_id_block_anchor():
+    block_id = "0f0e0d0c-0b0a-4909-8807-060504030201"
+    url = f"https://www.notion.so/Page-{PAGE_ID.replace('-', '')}#{block_id.replace('-', '')}"
+    assert notion_tree.parse_id(url) == block_id
+
+def test_parse_id_keeps_non_ids():
+    assert notion_tree.parse_id("not-an-id") == "not-an-id"
+    assert notion_tree.parse_id("") == ""
+
+def test_parse_ids_dedupes_forms():
+    assert notion_tree.parse_ids(f"{PAGE_ID}, {PAGE_ID.replace('-', '')}") == [PAGE_ID]
+
+class StubNotion:
+    """blocks.children.list 만 흉내 내는 클라이언트. 각 블록 아래에 fanout 개씩 depth 단계까지"""
+    def __init__(self, depth: int, fanout: int = 2):
+        self.depth = depth
+        self.fanout = fanout
+        self.blocks = self
+        self.children = self
+
+    def list(self, block_id: str, page_size: int = 100, start_cursor: str = ""):
+        level = 0 if block_id == "root" else block_id.count(".") + 1
+        results = [
+            {
+                "object": "block",
+                "id": f"{block_id}.{i}" if level else str(i),
+                "type": "paragraph",
+                "paragraph": {"rich_text": []},
+                "has_children": level + 1 < self.depth,
+                "last_edited_time": "2024-05-01T12:00:00.000Z",
+            }
+            for i in range(self.fanout)
+        ]
+        return {"results": results, "has_more": False, "next_cursor": None}
+
+def _depths(tree, depth=1, out=None):
+    out = [] if out is None else out
+    for block in tree:
+        out.append((depth, block))
+        _depths(block["children"], depth + 1, out)
+    return out
+
+@pytest.mark.parametrize("max_depth", [1, 2, 3, 4])
+def test_fetch_block_tree_max_depth(max_depth):
+    tree = notion_tree.fetch_block_tree(StubNotion(depth=6), "root", max_depth=max_depth)
+    blocks = _depths(tree)
+
+    assert max(depth for depth, _ in blocks) == max_depth
+    for depth, block in blocks:
+        if depth < max_depth:
+            assert block["children"] and not block.get("collapsed")
+        else:
+            # 잘린 블록은 빈 children 과 collapsed 표시
+            assert block["children"] == [] and block.get("collapsed") is True
+
+def test_fetch_block_tree_full_depth():
+    blocks = _depths(notion_tree.fetch_block_tree(StubNotion(depth=4), "root"))
+    assert max(depth for depth, _ in blocks) == 4
+    assert not any(block.get("collapsed") for _, block in blocks)
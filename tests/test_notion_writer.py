@@ -0,0 +1,18 @@
+import notion_writer
+
+def test_split_text_prefers_sentence_boundaries():
+    text = "첫 문장입니다. " * 300
+    chunks = notion_writer.split_text(text, limit=100)
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert all(chunk.endswith(". ") for chunk in chunks)
+
+def test_text_block_splits_rich_text_items():
+    blocks = notion_writer.text_block("paragraph", "가" * (notion_writer.MAX_TEXT_LENGTH * 150))
+    assert [len(block["paragraph"]["rich_text"]) for block in blocks] == [100, 50]
+
+def test_batch_blocks_limits():
+    nested = {"type": "toggle", "toggle": {"rich_text": [], "children": [{"type": "paragraph", "paragraph": {}}] * 99}}
+    batches = notion_writer.batch_blocks([nested] * 25)
+    assert all(sum(notion_writer.count_blocks(block) for block in batch) <= notion_writer.MAX_BLOCKS_PER_REQUEST for batch in batches)
+    assert sum(len(batch) for batch in batches) == 25